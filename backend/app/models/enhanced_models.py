@@ -0,0 +1,204 @@
+"""
+Enhanced prediction models using climate-health correlations
+
+The models are rule-based: the registry records which class to instantiate
+(see model_registry.build_from_class), and every API worker and training
+job imports them from here.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .ml_models import scaler_artifact
+from ..utils.health_conditions import HEALTH_CONDITIONS, NATURAL_DISASTERS
+from ..utils.climate_health_correlations import (
+    get_realistic_risk_prediction, 
+    calculate_resource_needs,
+    get_natural_disaster_prediction, 
+    get_peak_time_prediction,
+    get_all_health_condition_risks
+)
+
+class EnhancedRiskModel:
+    """Enhanced risk prediction model using climate-health correlations"""
+    
+    def __init__(self):
+        self.health_conditions = HEALTH_CONDITIONS
+        self.natural_disasters = NATURAL_DISASTERS
+        self.model_version = "1.0.0"
+        self.creation_date = datetime.now().strftime("%Y-%m-%d")
+    
+    def predict_risk(self, climate_data, location_id, location_type, date):
+        """
+        Predict health risks based on climate data
+        
+        Args:
+            climate_data: Dictionary with climate factors
+            location_id: Location ID
+            location_type: Location type ('state' or 'union_territory')
+            date: Date for prediction
+            
+        Returns:
+            Dictionary with risk predictions
+        """
+        # Convert date to datetime if it's a string
+        if isinstance(date, str):
+            date = datetime.strptime(date, "%Y-%m-%d").date()
+        elif not isinstance(date, datetime) and not hasattr(date, 'month'):
+            date = datetime.now().date()
+        
+        # Get month for seasonal factors
+        month = date.month
+        
+        # Get health condition risks
+        return get_all_health_condition_risks(climate_data, location_id, location_type, date)
+    
+    def predict_resources(self, health_predictions, population):
+        """
+        Predict resource needs based on health predictions
+        
+        Args:
+            health_predictions: Dictionary with health predictions
+            population: Population of the location
+            
+        Returns:
+            Dictionary with resource predictions
+        """
+        return calculate_resource_needs(health_predictions, population)
+    
+    def predict_natural_disasters(self, climate_data, location_name, date):
+        """
+        Predict natural disaster probabilities
+        
+        Args:
+            climate_data: Dictionary with climate factors
+            location_name: Name of the location
+            date: Date for prediction
+            
+        Returns:
+            Dictionary with natural disaster predictions
+        """
+        return get_natural_disaster_prediction(climate_data, location_name, date)
+    
+    def predict_peak_times(self, current_month, condition):
+        """
+        Predict peak times for a health condition
+        
+        Args:
+            current_month: Current month (1-12)
+            condition: Health condition
+            
+        Returns:
+            Dictionary with peak time predictions
+        """
+        if condition in self.health_conditions:
+            peak_season = self.health_conditions[condition].get('peak_season', [])
+            return get_peak_time_prediction(current_month, peak_season)
+        return {"status": "unknown", "months_to_peak": 0}
+
+class EnhancedForecastModel:
+    """Enhanced disease forecasting model"""
+    
+    def __init__(self):
+        self.health_conditions = HEALTH_CONDITIONS
+        self.model_version = "1.0.0"
+        self.creation_date = datetime.now().strftime("%Y-%m-%d")
+    
+    def forecast(self, climate_data, location_id, location_type, start_date, days=14):
+        """
+        Forecast disease cases for a number of days
+        
+        Args:
+            climate_data: Dictionary with climate factors
+            location_id: Location ID
+            location_type: Location type ('state' or 'union_territory')
+            start_date: Start date for forecast
+            days: Number of days to forecast
+            
+        Returns:
+            Dictionary with forecasted cases
+        """
+        # Convert start_date to datetime if it's a string
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        elif not isinstance(start_date, datetime) and not hasattr(start_date, 'month'):
+            start_date = datetime.now().date()
+        
+        # Generate forecasts for each day
+        forecasts = []
+        for day in range(days):
+            # Calculate date for this forecast
+            forecast_date = start_date + pd.Timedelta(days=day)
+            
+            # Get month for seasonal factors
+            month = forecast_date.month
+            
+            # Get health predictions for this day
+            health_predictions = get_all_health_condition_risks(
+                climate_data, 
+                location_id, 
+                location_type, 
+                forecast_date
+            )
+            
+            # Extract rates for each disease
+            forecast_data = {
+                "date": forecast_date.strftime("%Y-%m-%d"),
+                "dengue_cases": health_predictions.get("dengue", {}).get("rate", 0),
+                "malaria_cases": health_predictions.get("malaria", {}).get("rate", 0),
+                "heatstroke_cases": health_predictions.get("heatstroke", {}).get("rate", 0),
+                "diarrhea_cases": health_predictions.get("diarrhea", {}).get("rate", 0),
+            }
+            
+            forecasts.append(forecast_data)
+        
+        return {
+            "forecasts": forecasts,
+            "baseline_date": start_date.strftime("%Y-%m-%d"),
+            "baseline": {
+                "dengue_cases": health_predictions.get("dengue", {}).get("rate", 0),
+                "malaria_cases": health_predictions.get("malaria", {}).get("rate", 0),
+                "heatstroke_cases": health_predictions.get("heatstroke", {}).get("rate", 0),
+                "diarrhea_cases": health_predictions.get("diarrhea", {}).get("rate", 0),
+            }
+        }
+
+def enhanced_model_artifacts():
+    """Registry artifacts for the enhanced prediction models"""
+    from sklearn.preprocessing import StandardScaler
+    
+    # The enhanced models are rule-based, so the registry only records which
+    # class to instantiate along with its version information
+    risk_model = EnhancedRiskModel()
+    forecast_model = EnhancedForecastModel()
+    
+    # Standard scaler for input normalization
+    scaler = StandardScaler()
+    # Fit with some dummy data to make it usable
+    dummy_data = np.array([[25, 50, 70, 0.1, 0.1, 0.1], 
+                          [30, 100, 80, 0.5, 0.3, 0.4]])
+    scaler.fit(dummy_data)
+    
+    return {
+        "enhanced_risk": {
+            "metadata": {
+                "type": "risk_prediction",
+                "class": "app.models.enhanced_models.EnhancedRiskModel",
+                "version": risk_model.model_version,
+                "created_at": risk_model.creation_date,
+                "health_conditions": list(HEALTH_CONDITIONS.keys()),
+                "natural_disasters": list(NATURAL_DISASTERS.keys())
+            }
+        },
+        "enhanced_forecast": {
+            "metadata": {
+                "type": "disease_forecasting",
+                "class": "app.models.enhanced_models.EnhancedForecastModel",
+                "version": forecast_model.model_version,
+                "created_at": forecast_model.creation_date,
+                "health_conditions": list(HEALTH_CONDITIONS.keys())
+            }
+        },
+        "enhanced_scaler": scaler_artifact(scaler)
+    }
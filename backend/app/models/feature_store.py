@@ -0,0 +1,208 @@
+"""
+Feature store for model training
+
+The three trainers in ml_models all need the same climate/health/hospital join
+with per-100k rate columns. This module extracts that frame once per data
+version, persists it as a snapshot keyed by a hash of the data version and
+serves copies of it to every trainer.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import pandas as pd
+from sqlalchemy import text
+
+from .database import engine
+
+# Parquet is optional; fall back to pickle snapshots when pyarrow is missing
+try:
+    import pyarrow
+    PARQUET_AVAILABLE = True
+except Exception:  # pragma: no cover - optional dependency
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FEATURE_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "features")
+
+DISEASES = ['dengue', 'malaria', 'heatstroke', 'diarrhea']
+
+# Resource columns and the per-100k rate column derived from each
+RESOURCE_RATE_COLUMNS = {
+    'total_beds': 'beds_per_100k',
+    'available_beds': 'available_beds_per_100k',
+    'doctors': 'doctors_per_100k',
+    'nurses': 'nurses_per_100k',
+    'iv_fluids_stock': 'iv_fluids_per_100k',
+    'antibiotics_stock': 'antibiotics_per_100k',
+    'antipyretics_stock': 'antipyretics_per_100k'
+}
+
+FEATURE_QUERY = """
+SELECT
+    c.location_id, l.name as location_name, c.date,
+    c.temperature, c.rainfall, c.humidity,
+    c.flood_probability, c.cyclone_probability, c.heatwave_probability,
+    h.dengue_cases, h.malaria_cases, h.heatstroke_cases, h.diarrhea_cases,
+    hosp.total_beds, hosp.available_beds, hosp.doctors, hosp.nurses,
+    hosp.iv_fluids_stock, hosp.antibiotics_stock, hosp.antipyretics_stock,
+    l.population
+FROM climate_data c
+JOIN health_data h ON c.location_id = h.location_id AND c.date = h.date
+JOIN locations l ON c.location_id = l.id
+LEFT JOIN hospital_data hosp ON c.location_id = hosp.location_id AND c.date = hosp.date
+WHERE c.is_projected = 0  -- Only use actual data for training
+ORDER BY c.location_id, c.date
+"""
+
+# Per-table statistics that change whenever rows are added, deleted or updated:
+# counts and largest ids for inserts and deletes, plus a checksum of the
+# values the features are built from (their sums, and a sum weighted by row
+# id so that values moving between rows count too) for in-place updates
+def _checksum_aggregates(columns):
+    values = [f"COALESCE({column}, 0)" for column in columns]
+    return ["COUNT(*)", "MAX(id)", *(f"SUM({value})" for value in values), f"SUM(id * ({' + '.join(values)}))"]
+
+
+VERSION_AGGREGATES = {
+    'locations': _checksum_aggregates(['population']),
+    'climate_data': _checksum_aggregates([
+        'temperature', 'rainfall', 'humidity', 'flood_probability', 'cyclone_probability',
+        'heatwave_probability', 'CAST(is_projected AS INTEGER)'
+    ]),
+    'health_data': _checksum_aggregates([
+        'dengue_cases', 'malaria_cases', 'heatstroke_cases', 'diarrhea_cases'
+    ]),
+    'hospital_data': _checksum_aggregates(list(RESOURCE_RATE_COLUMNS))
+}
+
+# All statistics in one statement: one scan per table and one round trip
+VERSION_QUERY = "SELECT * FROM " + " CROSS JOIN ".join(
+    f"(SELECT {', '.join(f'{aggregate} AS {table}_{i}' for i, aggregate in enumerate(aggregates))} "
+    f"FROM {table}) AS {table}_stats"
+    for table, aggregates in VERSION_AGGREGATES.items()
+)
+
+# In-process snapshot, so repeated calls in one training run skip disk as well
+_snapshot = {'version': None, 'frame': None}
+
+
+def get_data_version(bind=None):
+    """Hash the table statistics into a short data version key"""
+    bind = bind if bind is not None else engine
+    with bind.connect() as conn:
+        row = list(conn.execute(text(VERSION_QUERY)).fetchone())
+    stats = {}
+    for table, aggregates in VERSION_AGGREGATES.items():
+        values, row = row[:len(aggregates)], row[len(aggregates):]
+        # 12 significant digits, so float sums that differ only in the
+        # order they were added in give the same key
+        stats[table] = [format(value, '.12g') if isinstance(value, float) else str(value) for value in values]
+    return hashlib.sha256(json.dumps(stats, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def extract_features(bind=None):
+    """Run the training join once and derive the shared, typed feature columns"""
+    bind = bind if bind is not None else engine
+    df = pd.read_sql(FEATURE_QUERY, bind)
+
+    df['date'] = pd.to_datetime(df['date'])
+    df['month'] = df['date'].dt.month
+    df['location_name'] = df['location_name'].astype('category')
+
+    # Disease rates per 100k population
+    for disease in DISEASES:
+        df[f'{disease}_rate'] = df[f'{disease}_cases'] * 100000 / df['population']
+
+    # Resource rates per 100k population
+    for column, rate_column in RESOURCE_RATE_COLUMNS.items():
+        df[rate_column] = df[column] * 100000 / df['population']
+
+    df['bed_occupancy_rate'] = 1 - (df['available_beds'] / df['total_beds'])
+
+    logger.info(f"Extracted feature frame with {len(df)} samples")
+    return df
+
+
+def _snapshot_path(version):
+    extension = "parquet" if PARQUET_AVAILABLE else "pkl"
+    return os.path.join(FEATURE_STORE_DIR, f"features-{version}.{extension}")
+
+
+def _read_snapshot(path):
+    if PARQUET_AVAILABLE:
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+
+def _write_snapshot(df, path):
+    os.makedirs(FEATURE_STORE_DIR, exist_ok=True)
+    # A temporary file of this process, which other writers' clean-up skips
+    fd, tmp_path = tempfile.mkstemp(dir=FEATURE_STORE_DIR, prefix=".features-")
+    os.close(fd)
+    try:
+        if PARQUET_AVAILABLE:
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    # Snapshots of older data versions are never read again. Another process
+    # may still be reading one; get_feature_frame then extracts the features
+    for name in os.listdir(FEATURE_STORE_DIR):
+        stale = os.path.join(FEATURE_STORE_DIR, name)
+        if name.startswith("features-") and stale != path:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+
+def get_feature_frame(bind=None, refresh=False):
+    """
+    Return the training feature frame for the current data version
+
+    The frame comes from memory or the on-disk snapshot when the data version
+    is unchanged, and is extracted from the database otherwise, or when the
+    snapshot cannot be read.
+
+    Args:
+        bind: SQLAlchemy engine/connection (defaults to the app engine)
+        refresh: Ignore cached snapshots and extract again
+
+    Returns:
+        A copy of the feature frame that the caller is free to modify
+    """
+    version = get_data_version(bind)
+
+    if not refresh and _snapshot['version'] == version:
+        return _snapshot['frame'].copy()
+
+    path = _snapshot_path(version)
+    df = None
+    if not refresh:
+        try:
+            df = _read_snapshot(path)
+            logger.info(f"Loaded feature snapshot {version} from {path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # Removed while being read, or written by a crashed process
+            logger.warning(f"Could not read feature snapshot {path}, extracting again: {e}")
+    if df is None:
+        df = extract_features(bind)
+        try:
+            _write_snapshot(df, path)
+            logger.info(f"Saved feature snapshot {version} to {path}")
+        except Exception as e:
+            logger.warning(f"Could not save feature snapshot: {e}")
+
+    _snapshot['version'] = version
+    _snapshot['frame'] = df
+    return df.copy()
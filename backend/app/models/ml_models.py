@@ -1,28 +1,65 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 import os
-import pickle
 import logging
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.metrics import mean_squared_error, classification_report, confusion_matrix
-import xgboost as xgb
 import sqlite3
-import joblib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Import custom scaler for model loading
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from app.utils.scalers import DummyScaler
+from app.utils.scalers import DummyScaler, FittedScaler
 from app.models.database import engine  # Use SQLAlchemy engine for DB access (SQLite or Postgres)
+from app.models.feature_store import get_feature_frame
+from app.models.model_registry import get_registry, LazyModels
+from app.models.tree_ensemble import TreeEnsemble
+
+# Backend serving the risk and resource models: 'xgboost', or 'numpy' to score
+# exported tree ensembles without importing XGBoost or scikit-learn, which
+# only training needs
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "auto")
+if MODEL_BACKEND not in ("auto", "xgboost", "numpy"):
+    raise ValueError(f"Unknown MODEL_BACKEND {MODEL_BACKEND!r}; use 'auto', 'xgboost' or 'numpy'")
+XGBOOST_AVAILABLE = False
+PREPROCESSOR_BASES = ()
+if MODEL_BACKEND != "numpy":
+    try:
+        import xgboost as xgb
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler, LabelEncoder
+        from sklearn.base import BaseEstimator, TransformerMixin
+        from sklearn.metrics import mean_squared_error, classification_report
+        from app.models.tree_ensemble import export_booster
+        PREPROCESSOR_BASES = (BaseEstimator, TransformerMixin)
+        XGBOOST_AVAILABLE = True
+    except Exception as e:  # pragma: no cover - optional dependency
+        if MODEL_BACKEND == "xgboost":
+            raise ImportError(
+                "MODEL_BACKEND=xgboost needs XGBoost and scikit-learn; install them "
+                "or set MODEL_BACKEND=numpy to serve exported tree ensembles"
+            ) from e
+if MODEL_BACKEND == "auto":
+    MODEL_BACKEND = "xgboost" if XGBOOST_AVAILABLE else "numpy"
+
+
+def serving_key(name):
+    """Registry name of a model for the serving backend"""
+    return f"{name}_trees" if MODEL_BACKEND == "numpy" else name
+
+
+def require_xgboost():
+    if not XGBOOST_AVAILABLE:
+        raise RuntimeError("XGBoost/scikit-learn not available; model training disabled")
 
 # TensorFlow is optional for quick local setup; guard its import
+SEQUENCE_BASES = ()
 try:
     from tensorflow.keras.models import Sequential, load_model
     from tensorflow.keras.layers import Dense, LSTM, Dropout
     from tensorflow.keras.callbacks import EarlyStopping
+    from tensorflow.keras.utils import Sequence
+    SEQUENCE_BASES = (Sequence,)
     TENSORFLOW_AVAILABLE = True
 except Exception:  # pragma: no cover - optional dependency
     TENSORFLOW_AVAILABLE = False
@@ -35,6 +72,310 @@ logger = logging.getLogger(__name__)
 MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# Climate inputs of the forecasting models and the physical range of each
+FORECAST_FEATURES = ['temperature', 'rainfall', 'humidity',
+                     'flood_probability', 'cyclone_probability', 'heatwave_probability']
+FORECAST_FEATURE_BOUNDS = (
+    np.array([-50.0, 0.0, 0.0, 0.0, 0.0, 0.0]),
+    np.array([60.0, np.inf, 100.0, 1.0, 1.0, 1.0])
+)
+
+# Share of the window's daily trend carried into each projected day
+FORECAST_TREND_DAMPING = 0.5
+
+# Confidence kept per additional day of forecast horizon
+FORECAST_CONFIDENCE_DECAY = 0.99
+
+# Diseases forecast by DiseaseForecaster, in output order
+FORECAST_DISEASES = ['dengue', 'malaria', 'heatstroke', 'diarrhea']
+
+# Response of each disease's forecast to (temperature, rainfall) trends
+FORECAST_TREND_WEIGHTS = {
+    'dengue': (1.0, 1.0),
+    'malaria': (0.5, 1.5),
+    'heatstroke': (2.0, -0.5),
+    'diarrhea': (0.8, 0.8)
+}
+
+class WindowBatches(*SEQUENCE_BASES):
+    """
+    Keras training batches gathered from a sliding-window view
+    
+    Only one batch of windows is copied out of the view at a time, so the
+    training set never exists as a (samples, seq_length, features) array.
+    
+    Args:
+        windows: View of build_sequences, one window per start row
+        starts: Windows to serve, as positions in windows
+        y: Target of each of those windows
+        batch_size: Windows per batch
+        shuffle: Whether to serve the windows in a new random order every epoch
+    """
+    
+    def __init__(self, windows, starts, y, batch_size=32, shuffle=False, seed=42):
+        if SEQUENCE_BASES:
+            super().__init__()
+        self.windows = windows
+        self.starts = np.asarray(starts)
+        self.y = np.asarray(y)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self._order = np.arange(len(self.starts))
+        if shuffle:
+            self._rng.shuffle(self._order)
+    
+    def __len__(self):
+        return -(-len(self.starts) // self.batch_size)
+    
+    def __getitem__(self, index):
+        batch = self._order[index * self.batch_size:(index + 1) * self.batch_size]
+        return self.windows[self.starts[batch]], self.y[batch]
+    
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+
+class CategoricalPreprocessor(*PREPROCESSOR_BASES):
+    """
+    Scale numeric features and encode categorical ones as pandas categoricals
+    
+    The output frame is meant for XGBoost with enable_categorical=True, so the
+    width stays fixed however many locations there are. Category levels are
+    learned in fit; unseen values become missing and follow the default branch.
+    
+    encode is the low-latency equivalent of transform: it applies the fitted
+    means, scales and category levels as plain NumPy arrays and returns the
+    float matrix that Booster.inplace_predict takes, with category codes in
+    the categorical columns.
+    """
+    
+    def __init__(self, numeric_features, categorical_features):
+        self.numeric_features = numeric_features
+        self.categorical_features = categorical_features
+    
+    def fit(self, X, y=None):
+        self.scaler_ = StandardScaler().fit(X[self.numeric_features].to_numpy(dtype=float))
+        self.categories_ = {
+            column: np.sort(pd.unique(X[column].astype(int)))
+            for column in self.categorical_features
+        }
+        return self.compile()
+    
+    def compile(self):
+        """Cache the fitted scaling as arrays for encode"""
+        self.mean_ = np.asarray(self.scaler_.mean_, dtype=float)
+        self.scale_ = np.asarray(self.scaler_.scale_, dtype=float)
+        return self
+    
+    def encode(self, X):
+        """
+        Encode features into a float matrix without building a DataFrame
+        
+        Args:
+            X: DataFrame, or mapping of feature name to a value or array
+            
+        Returns:
+            Array of shape (rows, features) in the same column order as transform
+        """
+        numeric = np.column_stack([np.atleast_1d(np.asarray(X[column], dtype=float)) for column in self.numeric_features])
+        encoded = np.empty((numeric.shape[0], numeric.shape[1] + len(self.categories_)))
+        encoded[:, :numeric.shape[1]] = (numeric - self.mean_) / self.scale_
+        
+        for i, (column, categories) in enumerate(self.categories_.items(), start=numeric.shape[1]):
+            values = np.atleast_1d(np.asarray(X[column])).astype(int)
+            codes = np.minimum(np.searchsorted(categories, values), len(categories) - 1)
+            encoded[:, i] = np.where(categories[codes] == values, codes, np.nan)
+        
+        return encoded
+    
+    def transform(self, X):
+        scaled = self.scaler_.transform(X[self.numeric_features].to_numpy(dtype=float))
+        columns = {column: scaled[:, i] for i, column in enumerate(self.numeric_features)}
+        for column, categories in self.categories_.items():
+            columns[column] = pd.Categorical(X[column].astype(int), categories=categories)
+        return pd.DataFrame(columns, index=X.index)
+    
+    def to_schema(self):
+        """JSON-serialisable feature schema with the fitted scaling and category levels"""
+        return {
+            'numeric': {
+                'features': list(self.numeric_features),
+                'mean': self.scaler_.mean_.tolist(),
+                'scale': self.scaler_.scale_.tolist()
+            },
+            'categorical': {column: categories.tolist() for column, categories in self.categories_.items()}
+        }
+    
+    @classmethod
+    def from_schema(cls, schema):
+        """Rebuild a fitted preprocessor from to_schema output"""
+        preprocessor = cls(schema['numeric']['features'], list(schema['categorical']))
+        preprocessor.scaler_ = scaler_from_stats(schema['numeric']['mean'], schema['numeric']['scale'])
+        preprocessor.categories_ = {
+            column: np.asarray(categories) for column, categories in schema['categorical'].items()
+        }
+        return preprocessor.compile()
+
+
+def scaler_from_stats(mean, scale):
+    """Fitted StandardScaler with the given per-feature mean and scale"""
+    if MODEL_BACKEND == "numpy":
+        return FittedScaler(mean, scale)
+    scaler = StandardScaler()
+    scaler.mean_ = np.asarray(mean, dtype=float)
+    scaler.scale_ = np.asarray(scale, dtype=float)
+    scaler.var_ = scaler.scale_ ** 2
+    scaler.n_features_in_ = len(scaler.mean_)
+    return scaler
+
+
+def scaler_artifact(scaler):
+    """Registry artifact storing a fitted StandardScaler as metadata"""
+    return {'metadata': {'type': 'scaler', 'mean': scaler.mean_.tolist(), 'scale': scaler.scale_.tolist()}}
+
+
+def build_scaler(entry, path):
+    """Registry builder for scaler_artifact entries"""
+    return scaler_from_stats(entry['metadata']['mean'], entry['metadata']['scale'])
+
+
+def build_forecast_model(entry, path):
+    """Registry builder for Keras forecasting models (None without TensorFlow)"""
+    if not TENSORFLOW_AVAILABLE:
+        return None
+    return load_model(path)
+
+
+def columns_to_records(columns, n_rows):
+    """
+    Turn batch predictions into one result dictionary per row
+    
+    Args:
+        columns: Mapping of key to {field: array of n_rows values}
+        n_rows: Number of rows in the batch
+        
+    Returns:
+        List of {key: {field: value}} dictionaries with plain Python values
+    """
+    records = [{} for _ in range(n_rows)]
+    for key, fields in columns.items():
+        values = {field: np.asarray(array).tolist() for field, array in fields.items()}
+        for i, record in enumerate(records):
+            record[key] = {field: column[i] for field, column in values.items()}
+    return records
+
+
+class RiskModel:
+    """
+    Fitted risk classifier for one disease
+    
+    Wraps an XGBoost classifier trained on encoded risk levels, or the
+    TreeEnsemble exported from it, together with the preprocessor shared by all
+    risk models, exposing the same predict and predict_proba interface as an
+    sklearn Pipeline. Predictions go straight to the booster with the encoded
+    feature matrix.
+    """
+    
+    def __init__(self, preprocessor, classifier, classes):
+        self.preprocessor = preprocessor
+        self.classifier = classifier
+        self.booster = classifier.get_booster() if hasattr(classifier, 'get_booster') else classifier
+        self.classes_ = np.asarray(classes)
+    
+    def predict_proba(self, X):
+        proba = self.booster.inplace_predict(self.preprocessor.encode(X))
+        if proba.ndim == 1:
+            # Binary objectives only return the probability of the second class
+            proba = np.column_stack([1 - proba, proba])
+        return proba
+    
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+    
+    def predict_with_proba(self, X):
+        """Predicted classes and their probabilities from a single model call"""
+        proba = self.predict_proba(X)
+        best = np.argmax(proba, axis=1)
+        return self.classes_[best], proba[np.arange(len(best)), best]
+    
+    def to_artifact(self, trees=False):
+        """
+        Registry artifact: the booster, or its exported tree ensemble, plus its
+        feature schema and class labels
+        """
+        return {
+            'booster': export_booster(self.booster) if trees else self.classifier,
+            'format': 'npz' if trees else 'ubj',
+            'metadata': {
+                'type': 'risk',
+                'schema': self.preprocessor.to_schema(),
+                'classes': self.classes_.tolist()
+            }
+        }
+    
+    @classmethod
+    def from_artifact(cls, entry, path):
+        """Registry builder for to_artifact entries"""
+        if entry['format'] == 'npz':
+            classifier = TreeEnsemble.load(path)
+        else:
+            classifier = xgb.XGBClassifier()
+            classifier.load_model(path)
+        metadata = entry['metadata']
+        return cls(CategoricalPreprocessor.from_schema(metadata['schema']), classifier, metadata['classes'])
+
+
+class ResourceModel:
+    """
+    Fitted multi-output resource regressor
+    
+    A single XGBoost regressor trained on every resource target at once (or
+    the TreeEnsemble exported from it), together with its preprocessor.
+    predict returns one column per target (per 100k population) for any
+    number of input rows.
+    """
+    
+    def __init__(self, preprocessor, regressor, targets):
+        self.preprocessor = preprocessor
+        self.regressor = regressor
+        self.booster = regressor.get_booster() if hasattr(regressor, 'get_booster') else regressor
+        self.targets = list(targets)
+    
+    def predict(self, X):
+        encoded = self.preprocessor.encode(X)
+        return self.booster.inplace_predict(encoded).reshape(len(encoded), -1)
+    
+    def predict_frame(self, X):
+        return pd.DataFrame(self.predict(X), columns=self.targets, index=X.index)
+    
+    def to_artifact(self, trees=False):
+        """
+        Registry artifact: the booster, or its exported tree ensemble, plus its
+        feature schema and target names
+        """
+        return {
+            'booster': export_booster(self.booster) if trees else self.regressor,
+            'format': 'npz' if trees else 'ubj',
+            'metadata': {
+                'type': 'resource',
+                'schema': self.preprocessor.to_schema(),
+                'targets': self.targets
+            }
+        }
+    
+    @classmethod
+    def from_artifact(cls, entry, path):
+        """Registry builder for to_artifact entries"""
+        if entry['format'] == 'npz':
+            regressor = TreeEnsemble.load(path)
+        else:
+            regressor = xgb.XGBRegressor()
+            regressor.load_model(path)
+        metadata = entry['metadata']
+        return cls(CategoricalPreprocessor.from_schema(metadata['schema']), regressor, metadata['targets'])
+
+
 class RiskClassifier:
     """XGBoost classifier for health risk prediction"""
     
@@ -54,34 +395,15 @@ class RiskClassifier:
             'overall': None
         }
     
-    def load_training_data(self):
-        """Load data from SQLite database for training"""
-        # Query to join climate and health data
-        query = """
-        SELECT 
-            c.location_id, l.name as location_name, c.date, 
-            c.temperature, c.rainfall, c.humidity, 
-            c.flood_probability, c.cyclone_probability, c.heatwave_probability,
-            h.dengue_cases, h.malaria_cases, h.heatstroke_cases, h.diarrhea_cases,
-            l.population
-        FROM climate_data c
-        JOIN health_data h ON c.location_id = h.location_id AND c.date = h.date
-        JOIN locations l ON c.location_id = l.id
-        WHERE c.is_projected = 0  -- Only use actual data for training
-        """
-        
-        # Load data into DataFrame (works for SQLite or Postgres via SQLAlchemy engine)
-        df = pd.read_sql(query, engine)
-        
-        # Convert date to datetime and extract features
-        df['date'] = pd.to_datetime(df['date'])
-        df['month'] = df['date'].dt.month
-        
-        # Calculate disease rates per 100k population
-        df['dengue_rate'] = df['dengue_cases'] * 100000 / df['population']
-        df['malaria_rate'] = df['malaria_cases'] * 100000 / df['population']
-        df['heatstroke_rate'] = df['heatstroke_cases'] * 100000 / df['population']
-        df['diarrhea_rate'] = df['diarrhea_cases'] * 100000 / df['population']
+    def load_training_data(self, features=None):
+        """
+        Load training data from the shared feature store
+        
+        Args:
+            features: Feature frame from feature_store.get_feature_frame (loaded
+                if omitted); it is modified in place
+        """
+        df = features if features is not None else get_feature_frame()
         
         # Define risk levels based on disease rates
         risk_thresholds = {
@@ -100,7 +422,8 @@ class RiskClassifier:
             df[risk_col] = pd.cut(
                 df[rate_col],
                 bins=[0] + thresholds + [float('inf')],
-                labels=['low', 'medium', 'high', 'critical']
+                labels=['low', 'medium', 'high', 'critical'],
+                include_lowest=True  # A rate of exactly 0 is low risk, not missing
             )
         
         # Create overall risk level based on maximum risk of any disease
@@ -124,10 +447,6 @@ class RiskClassifier:
             'flood_probability', 'cyclone_probability', 'heatwave_probability'
         ]
         
-        # Ensure location_id and month are treated as strings (categorical)
-        df['location_id'] = df['location_id'].astype(str)
-        df['month'] = df['month'].astype(str)
-        
         # Target
         if disease == 'overall':
             target = 'overall_risk_level'
@@ -139,85 +458,109 @@ class RiskClassifier:
         
         return X, y
     
-    def train_risk_models(self):
-        """Train risk classification models for each disease and overall risk"""
+    def train_risk_models(self, n_jobs=None, max_workers=None, features=None, publish=True):
+        """
+        Train risk classification models for each disease and overall risk
+        
+        All five models use the same features, so the preprocessor is fitted once
+        and shared. The models are then trained concurrently, splitting the CPU
+        budget between them.
+        
+        Args:
+            n_jobs: Total number of threads to use (defaults to all cores)
+            max_workers: Number of models trained at the same time (defaults to
+                all five, or fewer if the CPU budget is smaller)
+            features: Optional feature frame from the feature store
+            publish: Publish the models as a new registry version
+        
+        Returns:
+            Registry artifacts keyed by model name
+        """
+        require_xgboost()
+        
         # Load data
-        df = self.load_training_data()
+        df = self.load_training_data(features)
         
         # Train models for each disease and overall risk
         diseases = ['dengue', 'malaria', 'heatstroke', 'diarrhea', 'overall']
         
+        # Features are identical for every disease; only the target changes
+        targets = {}
         for disease in diseases:
-            logger.info(f"Training {disease} risk classification model")
-            
-            # Prepare features and target
-            X, y = self.prepare_features_target(df, disease)
-            
-            # Train-test split
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            # Preprocessing pipeline with explicit feature separation
-            numeric_features = ['temperature', 'rainfall', 'humidity', 
-                              'flood_probability', 'cyclone_probability', 'heatwave_probability']
-            categorical_features = ['location_id', 'month']
-                
-            # Ensure categorical features are strings
-            X_train[categorical_features] = X_train[categorical_features].astype(str)
-            X_test[categorical_features] = X_test[categorical_features].astype(str)
-                
-            # Create preprocessing pipeline
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', StandardScaler(), numeric_features),
-                    ('cat', OneHotEncoder(handle_unknown='ignore'), categorical_features)
-                ]
-            )
+            X, targets[disease] = self.prepare_features_target(df, disease)
+        
+        # Train-test split (same rows for every model)
+        train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+        
+        # Preprocessing pipeline with explicit feature separation
+        numeric_features = ['temperature', 'rainfall', 'humidity', 
+                          'flood_probability', 'cyclone_probability', 'heatwave_probability']
+        categorical_features = ['location_id', 'month']
+        
+        preprocessor = CategoricalPreprocessor(numeric_features, categorical_features)
+        
+        # Fit the shared preprocessor once
+        X_train = preprocessor.fit_transform(X.iloc[train_idx])
+        X_test = preprocessor.transform(X.iloc[test_idx])
+        
+        # Split the CPU budget between concurrently trained models
+        n_jobs = n_jobs or os.cpu_count() or 1
+        max_workers = max(1, min(max_workers or len(diseases), len(diseases), n_jobs))
+        threads_per_model = max(1, n_jobs // max_workers)
+        logger.info(f"Training {len(diseases)} risk models, {max_workers} at a time with {threads_per_model} threads each")
+        
+        def fit_model(disease):
+            # XGBoost needs integer class labels
+            y_train = targets[disease].iloc[train_idx].astype(str)
+            label_encoder = LabelEncoder().fit(y_train)
             
-            # XGBoost classifier
             xgb_model = xgb.XGBClassifier(
                 n_estimators=100,
                 learning_rate=0.1,
                 max_depth=5,
-                random_state=42
+                tree_method='hist',
+                enable_categorical=True,
+                random_state=42,
+                n_jobs=threads_per_model
             )
+            xgb_model.fit(X_train, label_encoder.transform(y_train))
             
-            # Pipeline
-            pipeline = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('classifier', xgb_model)
-            ])
-            
-            # Train model
-            pipeline.fit(X_train, y_train)
+            return RiskModel(preprocessor, xgb_model, label_encoder.classes_)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fitted = dict(zip(diseases, executor.map(fit_model, diseases)))
+        
+        artifacts = {}
+        for disease in diseases:
+            model = fitted[disease]
             
             # Evaluate model
-            y_pred = pipeline.predict(X_test)
-            accuracy = (y_pred == y_test).mean()
+            y_test = targets[disease].iloc[test_idx].astype(str)
+            y_pred = model.classes_[np.argmax(model.classifier.predict_proba(X_test), axis=1)]
+            accuracy = (y_pred == y_test.to_numpy()).mean()
             logger.info(f"{disease} model accuracy: {accuracy:.4f}")
-            logger.info("\n" + classification_report(y_test, y_pred))
+            logger.info("\n" + classification_report(y_test, y_pred, zero_division=0))
             
-            # Save model
-            self.models[disease] = pipeline
+            self.models[disease] = model
             self.preprocessors[disease] = preprocessor
-            
-            model_path = os.path.join(MODEL_DIR, f"{disease}_risk_model.pkl")
-            with open(model_path, 'wb') as f:
-                pickle.dump(pipeline, f)
-            
-            logger.info(f"Saved {disease} model to {model_path}")
+            artifacts[f"{disease}_risk"] = model.to_artifact()
+            artifacts[f"{disease}_risk_trees"] = model.to_artifact(trees=True)
+        
+        # Save models
+        if publish:
+            get_registry().publish(artifacts, note="risk models")
+        
+        return artifacts
     
     def load_models(self):
-        """Load trained models from disk"""
-        diseases = ['dengue', 'malaria', 'heatstroke', 'diarrhea', 'overall']
+        """Serve models from the active registry version, loading each on first use"""
+        registry = get_registry()
+        self.models = LazyModels(
+            registry, self.models, RiskModel.from_artifact, key=lambda disease: serving_key(f"{disease}_risk")
+        )
         
-        for disease in diseases:
-            model_path = os.path.join(MODEL_DIR, f"{disease}_risk_model.pkl")
-            try:
-                with open(model_path, 'rb') as f:
-                    self.models[disease] = pickle.load(f)
-                logger.info(f"Loaded {disease} model from {model_path}")
-            except FileNotFoundError:
-                logger.warning(f"Model not found at {model_path}. Train models first.")
+        if registry.entry(serving_key('overall_risk')) is None:
+            logger.warning("No registered risk models. Train models first.")
     
     def predict_risk(self, climate_data, location_id, date_obj):
         """
@@ -282,26 +625,20 @@ class RiskClassifier:
                 'heatwave_probability': climate_data['heatwave_probability']
             }
             
-            input_df = pd.DataFrame([features])
-            
             # Make predictions for each disease and overall risk
             results = {}
             
             for disease in self.models:
                 if self.models[disease] is not None:
-                    prediction = self.models[disease].predict(input_df)
-                    prediction_proba = self.models[disease].predict_proba(input_df)
-                    
-                    # Get highest probability class and its probability
-                    max_prob_idx = np.argmax(prediction_proba[0])
-                    max_prob = prediction_proba[0][max_prob_idx]
+                    # Highest probability class and its probability from one model call
+                    prediction, max_prob = self.models[disease].predict_with_proba(features)
                     
                     # Add realistic disease rate for visualization
                     disease_rate = np.random.gamma(shape=2.0, scale=10.0)  # Random realistic-looking rate
                     
                     results[disease] = {
-                        'risk_level': prediction[0],
-                        'probability': float(max_prob),
+                        'risk_level': str(prediction[0]),
+                        'probability': float(max_prob[0]),
                         'rate_per_100k': float(disease_rate)
                     }
                 else:
@@ -314,6 +651,80 @@ class RiskClassifier:
             return results
 
 
+    def predict_risk_batch(self, climate_df, location_ids=None, dates=None):
+        """
+        Predict health risks for many (location, date) pairs at once
+        
+        Every model is called once with the whole batch rather than once per
+        row.
+        
+        Args:
+            climate_df: DataFrame with the climate features, plus location_id
+                and date columns unless they are given separately
+            location_ids: Optional location IDs, one per row
+            dates: Optional dates, one per row
+            
+        Returns:
+            List of risk prediction dictionaries (as returned by predict_risk)
+            in the order of the input rows
+        """
+        climate_df = climate_df.reset_index(drop=True)
+        n_rows = len(climate_df)
+        location_ids = np.asarray(climate_df['location_id'] if location_ids is None else location_ids)
+        months = pd.DatetimeIndex(climate_df['date'] if dates is None else dates).month.to_numpy()
+        
+        try:
+            from ..utils.climate_health_correlations import get_realistic_risk_prediction_batch
+            
+            # Use the realistic model for all rows at once
+            predictions = get_realistic_risk_prediction_batch(climate_df, months)
+            
+            # Add disease rates to the predictions to show in frontend
+            for disease in ['dengue', 'malaria', 'heatstroke', 'diarrhea']:
+                predictions[disease]['rate_per_100k'] = predictions[disease]['rate']
+            
+            return columns_to_records(predictions, n_rows)
+            
+        except Exception as e:
+            logger.error(f"Error using realistic risk model: {e}. Falling back to basic model.")
+            
+            # Prepare input features
+            input_df = pd.DataFrame({
+                'location_id': location_ids,
+                'month': months,
+                'temperature': climate_df['temperature'],
+                'rainfall': climate_df['rainfall'],
+                'humidity': climate_df['humidity'],
+                'flood_probability': climate_df['flood_probability'],
+                'cyclone_probability': climate_df['cyclone_probability'],
+                'heatwave_probability': climate_df['heatwave_probability']
+            })
+            
+            # One model call per disease for the whole batch
+            results = {}
+            
+            for disease in self.models:
+                model = self.models[disease]
+                if model is not None:
+                    # Highest probability class and its probability from one model call
+                    risk_levels, probabilities = model.predict_with_proba(input_df)
+                    
+                    results[disease] = {
+                        'risk_level': risk_levels,
+                        'probability': probabilities,
+                        # Add realistic disease rate for visualization
+                        'rate_per_100k': np.random.gamma(shape=2.0, scale=10.0, size=n_rows)
+                    }
+                else:
+                    results[disease] = {
+                        'risk_level': np.full(n_rows, 'medium'),
+                        'probability': np.full(n_rows, 0.5),
+                        'rate_per_100k': np.full(n_rows, 5.0)
+                    }
+            
+            return columns_to_records(results, n_rows)
+
+
 class DiseaseForecaster:
     """LSTM model for disease case prediction"""
     
@@ -333,76 +744,85 @@ class DiseaseForecaster:
         }
         self.seq_length = 7  # Use 7 days of data to predict
     
-    def load_training_data(self):
-        """Load time series data for LSTM training"""
-        # Query to join climate and health data
-        query = """
-        SELECT 
-            c.location_id, l.name as location_name, c.date, 
-            c.temperature, c.rainfall, c.humidity, 
-            c.flood_probability, c.cyclone_probability, c.heatwave_probability,
-            h.dengue_cases, h.malaria_cases, h.heatstroke_cases, h.diarrhea_cases,
-            l.population
-        FROM climate_data c
-        JOIN health_data h ON c.location_id = h.location_id AND c.date = h.date
-        JOIN locations l ON c.location_id = l.id
-        WHERE c.is_projected = 0  -- Only use actual data for training
-        ORDER BY c.location_id, c.date
-        """
-        
-        # Load data into DataFrame via SQLAlchemy engine
-        df = pd.read_sql(query, engine)
-        
-        # Convert date to datetime and sort
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values(['location_id', 'date'])
+    def load_training_data(self, features=None):
+        """
+        Load time series data for LSTM training from the shared feature store
+        
+        Args:
+            features: Feature frame from feature_store.get_feature_frame (loaded
+                if omitted); it is modified in place
+        """
+        df = features if features is not None else get_feature_frame()
         
-        # Normalize disease cases by population
-        df['dengue_rate'] = df['dengue_cases'] * 100000 / df['population']
-        df['malaria_rate'] = df['malaria_cases'] * 100000 / df['population']
-        df['heatstroke_rate'] = df['heatstroke_cases'] * 100000 / df['population']
-        df['diarrhea_rate'] = df['diarrhea_cases'] * 100000 / df['population']
+        # Sort by location and date (rates per 100k come from the feature store)
+        df = df.sort_values(['location_id', 'date'])
         
         logger.info(f"Loaded time series data with {len(df)} samples")
         return df
     
-    def prepare_sequences(self, data, target_col):
-        """Prepare input sequences for LSTM"""
-        X, y = [], []
+    def build_sequences(self, data):
+        """
+        Build the scaled input windows shared by every forecasting target
         
-        for location_id in data['location_id'].unique():
-            location_data = data[data['location_id'] == location_id]
-            
-            # Skip if not enough data for this location
-            if len(location_data) <= self.seq_length:
-                continue
-            
-            # Features for LSTM input
-            features = ['temperature', 'rainfall', 'humidity', 
-                       'flood_probability', 'cyclone_probability', 'heatwave_probability']
-            
-            # Scale the features
-            if self.scalers['input'] is None:
-                self.scalers['input'] = StandardScaler()
-                location_data[features] = self.scalers['input'].fit_transform(location_data[features])
-            else:
-                location_data[features] = self.scalers['input'].transform(location_data[features])
-            
-            # Scale the target
-            target_scaler = StandardScaler()
-            y_values = location_data[target_col].values.reshape(-1, 1)
-            y_scaled = target_scaler.fit_transform(y_values)
-            
-            # Save the target scaler for later use
-            target_name = target_col.split('_')[0]  # Extract disease name from column
-            self.scalers[target_name] = target_scaler
-            
-            # Create sequences
-            for i in range(len(location_data) - self.seq_length):
-                X.append(location_data[features].values[i:i+self.seq_length])
-                y.append(y_scaled[i+self.seq_length][0])
+        Rows are sorted once by location and date, scaled in a single pass and
+        windowed with sliding_window_view. A window is kept only when the row it
+        predicts belongs to the same location, which also skips locations with
+        no more than seq_length rows.
+        
+        Returns:
+            Tuple of (windows, starts): windows is a zero-copy view of shape
+            (rows - seq_length + 1, seq_length, features) over the scaled
+            rows, and starts holds the positions of the windows to use. The
+            target of window i is row i + seq_length of the sorted data.
+        """
+        features = FORECAST_FEATURES
+        
+        data = data.sort_values(['location_id', 'date'], kind='stable')
+        values = data[features].to_numpy(dtype=float)
+        location_ids = data['location_id'].to_numpy()
+        
+        # Scale the features
+        if self.scalers['input'] is None:
+            self.scalers['input'] = StandardScaler()
+            values = self.scalers['input'].fit_transform(values)
+        else:
+            values = self.scalers['input'].transform(values)
+        
+        # (rows - seq_length + 1, seq_length, features) view over the scaled rows
+        windows = sliding_window_view(values, self.seq_length, axis=0).transpose(0, 2, 1)
+        
+        starts = np.arange(max(0, len(values) - self.seq_length))
+        starts = starts[location_ids[starts] == location_ids[starts + self.seq_length]]
+        
+        return windows, starts
+    
+    def prepare_sequences(self, data, target_col, sequences=None):
+        """
+        Prepare input sequences for LSTM
+        
+        Args:
+            data: Training data
+            target_col: Target column (e.g. 'dengue_rate')
+            sequences: Output of build_sequences(data), to reuse windows across
+                targets; built here if omitted
+        
+        Returns:
+            Tuple of (windows, starts, y): the window view and positions of
+            build_sequences, and the scaled target of each of those windows
+        """
+        windows, starts = sequences if sequences is not None else self.build_sequences(data)
+        
+        # Target values in the same sorted order as the windows
+        target_values = data.sort_values(['location_id', 'date'], kind='stable')[target_col].to_numpy(dtype=float)
         
-        return np.array(X), np.array(y)
+        # Scale the target and save the scaler for later use
+        target_scaler = StandardScaler()
+        y = target_scaler.fit_transform(target_values[starts + self.seq_length].reshape(-1, 1)).ravel()
+        
+        target_name = target_col.split('_')[0]  # Extract disease name from column
+        self.scalers[target_name] = target_scaler
+        
+        return windows, starts, y
     
     def build_lstm_model(self, input_shape):
         """Build LSTM model for time series forecasting"""
@@ -418,94 +838,102 @@ class DiseaseForecaster:
         model.compile(optimizer='adam', loss='mse', metrics=['mae'])
         return model
     
-    def train_forecasting_models(self):
-        """Train LSTM models for disease case forecasting"""
+    def train_forecasting_models(self, features=None, publish=True):
+        """
+        Train LSTM models for disease case forecasting
+        
+        Args:
+            features: Optional feature frame from the feature store
+            publish: Publish the models as a new registry version
+        
+        Returns:
+            Registry artifacts keyed by model name
+        """
         if not TENSORFLOW_AVAILABLE:
             logger.warning("TensorFlow not installed; skipping LSTM forecasting model training")
-            return
+            return {}
+        require_xgboost()
         # Load data
-        df = self.load_training_data()
+        df = self.load_training_data(features)
         
         # Train models for each disease
         diseases = ['dengue', 'malaria', 'heatstroke', 'diarrhea']
         
+        # Input windows are identical for every disease, so build them once
+        sequences = self.build_sequences(df)
+        artifacts = {'forecast_input_scaler': scaler_artifact(self.scalers['input'])}
+        
+        # Keras writes models to files, which the registry copies when publishing
+        staging_dir = os.path.join(MODEL_DIR, "staging")
+        os.makedirs(staging_dir, exist_ok=True)
+        
         for disease in diseases:
             target_col = f'{disease}_rate'
             logger.info(f"Training {disease} forecasting model")
             
             # Prepare sequences
-            X, y = self.prepare_sequences(df, target_col)
+            windows, starts, y = self.prepare_sequences(df, target_col, sequences)
             
-            if len(X) == 0:
+            if len(starts) == 0:
                 logger.warning(f"Not enough data for {disease} model. Skipping.")
                 continue
             
-            # Train-test split
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            # Train-test split of the window positions; batches are copied
+            # out of the window view as Keras asks for them
+            train_idx, test_idx = train_test_split(np.arange(len(starts)), test_size=0.2, random_state=42)
+            train_batches = WindowBatches(windows, starts[train_idx], y[train_idx], batch_size=32, shuffle=True)
+            test_batches = WindowBatches(windows, starts[test_idx], y[test_idx], batch_size=32)
             
             # Build model
-            model = self.build_lstm_model((self.seq_length, X.shape[2]))
+            model = self.build_lstm_model((self.seq_length, windows.shape[2]))
             
             # Early stopping
             early_stopping = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)
             
             # Train model
             model.fit(
-                X_train, y_train,
+                train_batches,
                 epochs=50,
-                batch_size=32,
-                validation_data=(X_test, y_test),
+                validation_data=test_batches,
                 callbacks=[early_stopping],
                 verbose=0
             )
             
             # Evaluate model
-            loss, mae = model.evaluate(X_test, y_test, verbose=0)
+            loss, mae = model.evaluate(test_batches, verbose=0)
             logger.info(f"{disease} model MAE: {mae:.4f}")
             
-            # Save model
             self.models[disease] = model
-            model.save(os.path.join(MODEL_DIR, f"{disease}_forecast_model.h5"))
-            
-            # Save scaler
-            joblib.dump(self.scalers[disease], os.path.join(MODEL_DIR, f"{disease}_scaler.joblib"))
+            model_path = os.path.join(staging_dir, f"{disease}_forecast_model.h5")
+            model.save(model_path)
+            artifacts[f"{disease}_forecast"] = {
+                'file': model_path,
+                'metadata': {'type': 'forecast', 'seq_length': self.seq_length}
+            }
+            artifacts[f"{disease}_forecast_scaler"] = scaler_artifact(self.scalers[disease])
             
-            logger.info(f"Saved {disease} forecasting model")
+            logger.info(f"Trained {disease} forecasting model")
+        
+        # Save models
+        if publish:
+            get_registry().publish(artifacts, note="forecasting models")
+        
+        return artifacts
     
     def load_models(self):
-        """Load trained models from disk"""
+        """Serve models and scalers from the active registry version, loading each on first use"""
         if not TENSORFLOW_AVAILABLE:
-            logger.warning("TensorFlow not installed; attempting to load pickle-based models instead")
-            # We'll still try to load pickle models that might have been created by train_real_models.py
-        
-        diseases = ['dengue', 'malaria', 'heatstroke', 'diarrhea']
+            logger.warning("TensorFlow not installed; registered forecasting models cannot be loaded")
         
-        try:
-            # Load input scaler
-            self.scalers['input'] = joblib.load(os.path.join(MODEL_DIR, "input_scaler.joblib"))
-        except FileNotFoundError:
-            logger.warning("Input scaler not found. Train models first.")
+        registry = get_registry()
+        self.models = LazyModels(registry, self.models, build_forecast_model, key=lambda disease: f"{disease}_forecast")
+        self.scalers = LazyModels(
+            registry, self.scalers, build_scaler,
+            key=lambda name: "forecast_input_scaler" if name == 'input' else f"{name}_forecast_scaler"
+        )
         
-        for disease in diseases:
-            try:
-                # Try to load H5 model (TensorFlow) first, then fallback to pickle
-                model_path_h5 = os.path.join(MODEL_DIR, f"{disease}_forecast_model.h5")
-                model_path_pkl = os.path.join(MODEL_DIR, f"{disease}_forecast_model.pkl")
-                
-                if os.path.exists(model_path_h5) and TENSORFLOW_AVAILABLE:
-                    self.models[disease] = load_model(model_path_h5)
-                    logger.info(f"Loaded {disease} TensorFlow forecasting model from {model_path_h5}")
-                elif os.path.exists(model_path_pkl):
-                    with open(model_path_pkl, 'rb') as f:
-                        self.models[disease] = pickle.load(f)
-                    logger.info(f"Loaded {disease} pickle forecasting model from {model_path_pkl}")
-                else:
-                    logger.warning(f"No forecasting model found for {disease}")
-                
-                # Load disease scaler
-                self.scalers[disease] = joblib.load(os.path.join(MODEL_DIR, f"{disease}_scaler.joblib"))
-            except (FileNotFoundError, IOError):
-                logger.warning(f"{disease} forecasting model not found. Train models first.")
+        if registry.entry('forecast_input_scaler') is None:
+            logger.warning("No registered forecasting models. Train models first.")
     
     def forecast_cases(self, location_id, recent_climate_data):
         """
@@ -658,8 +1086,7 @@ class DiseaseForecaster:
             recent_data = recent_climate_data[-self.seq_length:]
             
             # Prepare input features
-            features = ['temperature', 'rainfall', 'humidity', 
-                       'flood_probability', 'cyclone_probability', 'heatwave_probability']
+            features = FORECAST_FEATURES
             
             X = np.array([[d[f] for f in features] for d in recent_data])
             
@@ -678,12 +1105,8 @@ class DiseaseForecaster:
             
             for disease in self.models:
                 if self.models[disease] is not None and self.scalers[disease] is not None:
-                    # Make prediction - handling both TensorFlow and XGBoost model formats
-                    if hasattr(self.models[disease], 'predict_on_batch'):  # TensorFlow model
-                        y_scaled = self.models[disease].predict(X)[0][0]
-                    else:  # XGBoost model expects flattened input
-                        X_flat = X.reshape(X.shape[0], -1)
-                        y_scaled = self.models[disease].predict(X_flat)[0]
+                    # Make prediction
+                    y_scaled = self.models[disease].predict(X)[0][0]
                     
                     # Inverse transform to get actual rate
                     y_pred = self.scalers[disease].inverse_transform([[y_scaled]])[0][0]
@@ -701,59 +1124,354 @@ class DiseaseForecaster:
             return results
 
 
+    def simple_forecast_columns(self, temperature, rainfall, confidence):
+        """Plausible rates from base rates and climate factors, for when no model is available"""
+        temp_factor = temperature / 30.0  # Normalize around 30°C
+        rain_factor = rainfall / 10.0  # Normalize around 10mm
+        
+        columns = {}
+        for disease in FORECAST_DISEASES:
+            base_rate = {'dengue': 10.0, 'malaria': 8.0, 'heatstroke': 5.0, 'diarrhea': 15.0}[disease]
+            # Different adjustments for different diseases
+            if disease == 'dengue' or disease == 'malaria':
+                rate = base_rate * (0.5 + 0.5 * temp_factor) * (0.5 + 0.5 * rain_factor)
+            elif disease == 'heatstroke':
+                rate = base_rate * (0.2 + 0.8 * temp_factor) * (1.2 - 0.2 * rain_factor)
+            else:  # diarrhea
+                rate = base_rate * (0.7 + 0.3 * temp_factor) * (0.8 + 0.2 * rain_factor)
+            columns[disease] = {'forecasted_rate': np.maximum(0, rate), 'confidence': confidence}
+        return columns
+    
+    def rule_based_columns(self, climate_df, months, temp_trend, rain_trend, data_confidence, decay=1.0):
+        """
+        Rates from the climate-health correlations, one per row of climate_df
+        
+        Args:
+            climate_df: DataFrame with the climate feature columns
+            months: Month (1-12) of each row, for seasonality
+            temp_trend, rain_trend: Change of temperature and rainfall over the
+                week before each row
+            data_confidence: Confidence from the amount of data behind each row
+            decay: Factor applied to the confidence of each row
+        """
+        from ..utils.climate_health_correlations import calculate_disease_risk_batch, calculate_risk_level_batch
+        
+        # Normalize trends to small adjustment factors (-0.2 to +0.2)
+        temp_factor = np.clip(temp_trend / 10.0, -0.2, 0.2)
+        rain_factor = np.clip(rain_trend / 20.0, -0.2, 0.2)
+        
+        # Calculate confidence based on amount of data and trends
+        trend_confidence = 0.9 - (np.abs(temp_factor) + np.abs(rain_factor)) / 2.0
+        confidence = (data_confidence + trend_confidence) / 2.0 * decay
+        
+        columns = {}
+        for disease in FORECAST_DISEASES:
+            base_risk = calculate_disease_risk_batch(climate_df, months, disease)
+            # Different diseases respond differently to temperature and rainfall trends
+            temp_weight, rain_weight = FORECAST_TREND_WEIGHTS[disease]
+            forecasted_rate = base_risk * (1.0 + temp_weight * temp_factor + rain_weight * rain_factor)
+            
+            # Add some random variation for realistic forecasting (±5%)
+            forecasted_rate *= 0.95 + np.random.random(len(forecasted_rate)) * 0.1
+            
+            columns[disease] = {
+                'forecasted_rate': np.maximum(0, forecasted_rate),
+                'confidence': confidence,
+                'risk_level': calculate_risk_level_batch(forecasted_rate, disease)
+            }
+        return columns
+    
+    def model_columns(self, X, confidence):
+        """
+        Rates from the registered forecasting models, one model call per disease
+        
+        Args:
+            X: Scaled input windows, shape (rows, seq_length, features)
+            confidence: Confidence of each row
+        """
+        columns = {}
+        for disease in self.models:
+            if self.models[disease] is not None and self.scalers[disease] is not None:
+                y_scaled = self.models[disease].predict(X)[:, 0]
+                
+                # Inverse transform to get actual rates
+                y_pred = self.scalers[disease].inverse_transform(np.reshape(y_scaled, (-1, 1)))[:, 0]
+                
+                columns[disease] = {
+                    'forecasted_rate': np.maximum(0, y_pred),  # Ensure non-negative rate
+                    'confidence': confidence
+                }
+            else:
+                columns[disease] = {
+                    'forecasted_rate': np.zeros(len(X)),
+                    'confidence': np.zeros(len(X))
+                }
+        return columns
+    
+    def group_recent(self, recent_climate_df):
+        """
+        Group recent climate data by location, most recent reading last
+        
+        Returns:
+            Tuple of the groupby over location_id, each location's latest row
+            (indexed by location ID) and each location's number of rows
+        """
+        data = recent_climate_df.sort_values(['location_id', 'date'], kind='stable')
+        groups = data.groupby('location_id', sort=False)
+        latest = groups.tail(1).set_index('location_id')
+        counts = groups.size().reindex(latest.index).to_numpy()
+        return groups, latest, counts
+    
+    def forecast_cases_batch(self, recent_climate_df):
+        """
+        Forecast disease cases for many locations at once
+        
+        Args:
+            recent_climate_df: DataFrame of recent climate data with location_id,
+                date and the climate feature columns, any number of rows per
+                location
+            
+        Returns:
+            Dictionary mapping location ID to the forecast_cases result for that
+            location (None where there is not enough data)
+        """
+        features = FORECAST_FEATURES
+        groups, latest, counts = self.group_recent(recent_climate_df)
+        location_ids = latest.index.tolist()
+        
+        try:
+            # Try to use realistic forecasting based on our climate-health correlations
+            months = pd.DatetimeIndex(latest['date']).month.to_numpy()
+            
+            # Trend factors against the reading 7 days back, where there is one
+            week_ago = groups.nth(-7).set_index('location_id').reindex(latest.index)
+            columns = self.rule_based_columns(
+                latest, months,
+                (latest['temperature'] - week_ago['temperature']).fillna(0).to_numpy(),
+                (latest['rainfall'] - week_ago['rainfall']).fillna(0).to_numpy(),
+                np.minimum(0.9, 0.6 + counts / 20.0)
+            )
+            return dict(zip(location_ids, columns_to_records(columns, len(location_ids))))
+            
+        except Exception as e:
+            logger.error(f"Error using realistic forecasting model: {e}. Falling back to ML model.")
+            
+            # Fallback to ML models
+            if not TENSORFLOW_AVAILABLE and not any(self.models.values()):
+                logger.error("No forecasting models available; using simple forecasting")
+                
+                columns = self.simple_forecast_columns(
+                    latest['temperature'].to_numpy(), latest['rainfall'].to_numpy(),
+                    np.full(len(location_ids), 0.6)  # Lower confidence for simple forecasting
+                )
+                return dict(zip(location_ids, columns_to_records(columns, len(location_ids))))
+            
+            results = {location_id: None for location_id in location_ids}
+            
+            if self.scalers['input'] is None:
+                logger.error("Input scaler not loaded. Cannot make predictions.")
+                return results
+            
+            # Locations with at least self.seq_length days of data
+            eligible = [location_id for location_id, count in zip(location_ids, counts) if count >= self.seq_length]
+            if not eligible:
+                logger.error(f"Need at least {self.seq_length} days of climate data for forecasting")
+                return results
+            
+            # Last self.seq_length days of every eligible location, scaled in one pass
+            recent = groups.tail(self.seq_length)
+            recent = recent[recent['location_id'].isin(eligible)]
+            X = self.scalers['input'].transform(recent[features].to_numpy(dtype=float))
+            X = X.reshape(len(eligible), self.seq_length, len(features))
+            
+            # Fixed confidence for now, could be improved
+            columns = self.model_columns(X, np.full(len(eligible), 0.8))
+            results.update(zip(eligible, columns_to_records(columns, len(eligible))))
+            return results
+    
+    def project_climate(self, history, days):
+        """
+        Roll climate windows forward autoregressively
+        
+        Each projected day continues the previous one by the daily trend of the
+        seq_length days before it, damped by FORECAST_TREND_DAMPING, so the
+        trend is re-estimated from a window that includes the projected days
+        and levels off over long horizons. All locations advance together, one
+        array operation per day.
+        
+        Args:
+            history: Array of shape (locations, seq_length, features), oldest
+                day first, in FORECAST_FEATURES order
+            days: Number of days to project
+            
+        Returns:
+            Array of shape (locations, seq_length + days, features): the
+            history followed by the projected days
+        """
+        n_locations, seq_length, n_features = history.shape
+        series = np.empty((n_locations, seq_length + days, n_features))
+        series[:, :seq_length] = history
+        lower, upper = FORECAST_FEATURE_BOUNDS
+        
+        for t in range(seq_length, seq_length + days):
+            trend = (series[:, t - 1] - series[:, t - seq_length]) / max(1, seq_length - 1)
+            np.clip(series[:, t - 1] + FORECAST_TREND_DAMPING * trend, lower, upper, out=series[:, t])
+        
+        return series
+    
+    def forecast_horizon_batch(self, recent_climate_df, days=7):
+        """
+        Forecast daily disease rates over a horizon for many locations at once
+        
+        The last seq_length days of every location (the oldest reading repeated
+        where there are fewer) are rolled forward with project_climate, and
+        every projected day of every location is then scored in one model call
+        per disease, so the cost hardly grows with the horizon.
+        
+        Args:
+            recent_climate_df: DataFrame of recent climate data with location_id,
+                date and the climate feature columns
+            days: Number of days to forecast
+            
+        Returns:
+            Dictionary mapping location ID to a list with one forecast per day,
+            each {'date': date, disease: {'forecasted_rate', 'confidence', ...}},
+            or None where there is not enough data
+        """
+        features = FORECAST_FEATURES
+        groups, latest, counts = self.group_recent(recent_climate_df)
+        location_ids = latest.index.tolist()
+        n_locations = len(location_ids)
+        
+        # (locations, seq_length, features) windows, right-aligned and padded
+        # at the front with each location's oldest reading
+        recent = groups.tail(self.seq_length)
+        available = np.minimum(counts, self.seq_length)
+        location_index = np.repeat(np.arange(n_locations), available)
+        offset = recent.groupby('location_id', sort=False).cumcount().to_numpy()
+        history = np.empty((n_locations, self.seq_length, len(features)))
+        history[location_index, offset + (self.seq_length - available)[location_index]] = \
+            recent[features].to_numpy(dtype=float)
+        source = np.maximum(np.arange(self.seq_length)[None, :], (self.seq_length - available)[:, None])
+        history = history[np.arange(n_locations)[:, None], source]
+        
+        series = self.project_climate(history, days)
+        projected = series[:, self.seq_length:].reshape(-1, len(features))
+        
+        # Forecast dates and the horizon of every (location, day) row
+        latest_dates = pd.to_datetime(latest['date']).to_numpy().astype('datetime64[D]')
+        forecast_dates = (latest_dates[:, None] + np.arange(1, days + 1)).ravel()
+        horizon = np.tile(np.arange(days), n_locations)
+        decay = FORECAST_CONFIDENCE_DECAY ** horizon
+        
+        def to_results(columns, rows_for):
+            records = columns_to_records(columns, len(rows_for) * days)
+            for record, forecast_date in zip(records, forecast_dates.reshape(n_locations, days)[rows_for].ravel()):
+                record['date'] = forecast_date.item()
+            return [records[i * days:(i + 1) * days] for i in range(len(rows_for))]
+        
+        try:
+            # Try to use realistic forecasting based on our climate-health correlations
+            months = pd.DatetimeIndex(forecast_dates).month.to_numpy()
+            
+            # Trend factors of each projected day against the reading 6 days
+            # before it; confidence fades with the horizon
+            week_ago = series[:, self.seq_length - 6:self.seq_length - 6 + days].reshape(-1, len(features))
+            columns = self.rule_based_columns(
+                pd.DataFrame(projected, columns=features), months,
+                projected[:, 0] - week_ago[:, 0],
+                projected[:, 1] - week_ago[:, 1],
+                np.repeat(np.minimum(0.9, 0.6 + counts / 20.0), days),
+                decay
+            )
+            return dict(zip(location_ids, to_results(columns, np.arange(n_locations))))
+            
+        except Exception as e:
+            logger.error(f"Error using realistic forecasting model: {e}. Falling back to ML model.")
+            
+            # Fallback to ML models
+            if not TENSORFLOW_AVAILABLE and not any(self.models.values()):
+                logger.error("No forecasting models available; using simple forecasting")
+                
+                columns = self.simple_forecast_columns(
+                    projected[:, 0], projected[:, 1],
+                    0.6 * decay  # Lower confidence for simple forecasting
+                )
+                return dict(zip(location_ids, to_results(columns, np.arange(n_locations))))
+            
+            results = {location_id: None for location_id in location_ids}
+            
+            if self.scalers['input'] is None:
+                logger.error("Input scaler not loaded. Cannot make predictions.")
+                return results
+            
+            # Locations with at least self.seq_length days of data
+            eligible = np.flatnonzero(counts >= self.seq_length)
+            if len(eligible) == 0:
+                logger.error(f"Need at least {self.seq_length} days of climate data for forecasting")
+                return results
+            
+            # The window ending the day before each projected day, for every
+            # eligible location and day, scaled in one pass
+            windows = sliding_window_view(series[eligible], self.seq_length, axis=1)[:, :days]
+            X = windows.transpose(0, 1, 3, 2).reshape(-1, len(features))
+            X = self.scalers['input'].transform(X).reshape(-1, self.seq_length, len(features))
+            
+            # One model call per disease for all locations and days
+            columns = self.model_columns(X, 0.8 * decay[:len(X)])
+            results.update(zip([location_ids[i] for i in eligible], to_results(columns, eligible)))
+            return results
+
+
 class ResourcePredictor:
     """XGBoost regressor for hospital resource needs prediction"""
     
     def __init__(self):
-        self.model = None
-    
-    def load_training_data(self):
-        """Load data from SQLite database for training"""
-        # Query to join health and hospital data
-        query = """
-        SELECT 
-            h.location_id, l.name as location_name, h.date, 
-            h.dengue_cases, h.malaria_cases, h.heatstroke_cases, h.diarrhea_cases,
-            hosp.total_beds, hosp.available_beds, hosp.doctors, hosp.nurses,
-            hosp.iv_fluids_stock, hosp.antibiotics_stock, hosp.antipyretics_stock,
-            l.population
-        FROM health_data h
-        JOIN hospital_data hosp ON h.location_id = hosp.location_id AND h.date = hosp.date
-        JOIN locations l ON h.location_id = l.id
-        WHERE h.is_projected = 0  -- Only use actual data for training
-        """
-        
-        # Load data into DataFrame via SQLAlchemy engine
-        df = pd.read_sql(query, engine)
-        
-        # Convert date to datetime and extract features
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Calculate disease rates per 100k population
-        df['dengue_rate'] = df['dengue_cases'] * 100000 / df['population']
-        df['malaria_rate'] = df['malaria_cases'] * 100000 / df['population']
-        df['heatstroke_rate'] = df['heatstroke_cases'] * 100000 / df['population']
-        df['diarrhea_rate'] = df['diarrhea_cases'] * 100000 / df['population']
-        
-        # Calculate resource rates per 100k population
-        df['beds_per_100k'] = df['total_beds'] * 100000 / df['population']
-        df['available_beds_per_100k'] = df['available_beds'] * 100000 / df['population']
-        df['doctors_per_100k'] = df['doctors'] * 100000 / df['population']
-        df['nurses_per_100k'] = df['nurses'] * 100000 / df['population']
-        df['iv_fluids_per_100k'] = df['iv_fluids_stock'] * 100000 / df['population']
-        df['antibiotics_per_100k'] = df['antibiotics_stock'] * 100000 / df['population']
-        df['antipyretics_per_100k'] = df['antipyretics_stock'] * 100000 / df['population']
-        
-        # Calculate bed occupancy rate
-        df['bed_occupancy_rate'] = 1 - (df['available_beds'] / df['total_beds'])
+        self.models = {'resource': None}
+    
+    @property
+    def model(self):
+        return self.models['resource']
+    
+    @model.setter
+    def model(self, model):
+        self.models['resource'] = model
+    
+    def load_training_data(self, features=None):
+        """
+        Load training data from the shared feature store
+        
+        Args:
+            features: Feature frame from feature_store.get_feature_frame (loaded
+                if omitted); it is modified in place
+        """
+        df = features if features is not None else get_feature_frame()
+        
+        # Only rows with hospital data can be used (disease and resource rates
+        # per 100k come from the feature store)
+        df = df.dropna(subset=['total_beds'])
         
         logger.info(f"Loaded training data with {len(df)} samples")
         return df
     
-    def train_resource_model(self):
-        """Train XGBoost model for resource needs prediction"""
+    def train_resource_model(self, features=None, publish=True):
+        """
+        Train one multi-output XGBoost model for all resource needs
+        
+        Every target shares the same features, split and preprocessor, so a
+        single regressor is fitted on the (samples, targets) matrix.
+        
+        Args:
+            features: Optional feature frame from the feature store
+            publish: Publish the model as a new registry version
+        
+        Returns:
+            Registry artifacts keyed by model name
+        """
+        require_xgboost()
+        
         # Load data
-        df = self.load_training_data()
+        df = self.load_training_data(features)
         
         # Features for prediction
         features = [
@@ -766,80 +1484,67 @@ class ResourcePredictor:
             'iv_fluids_per_100k', 'antibiotics_per_100k', 'antipyretics_per_100k'
         ]
         
-        # Dictionary to store individual models
-        models = {}
-        preprocessors = {}
+        X = df[features]
+        y = df[targets]
         
-        for target in targets:
-            logger.info(f"Training model for {target}")
-            
-            X = df[features]
-            y = df[target]
-            
-            # Train-test split
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            # Preprocessing pipeline
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', StandardScaler(), ['dengue_rate', 'malaria_rate', 'heatstroke_rate', 'diarrhea_rate']),
-                    ('cat', OneHotEncoder(handle_unknown='ignore'), ['location_id'])
-                ]
-            )
-            
-            # XGBoost regressor
-            xgb_model = xgb.XGBRegressor(
-                n_estimators=100,
-                learning_rate=0.1,
-                max_depth=5,
-                random_state=42
-            )
-            
-            # Pipeline
-            pipeline = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', xgb_model)
-            ])
-            
-            # Train model
-            pipeline.fit(X_train, y_train)
-            
-            # Evaluate model
-            y_pred = pipeline.predict(X_test)
-            rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+        # Train-test split
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        
+        # Preprocessing pipeline
+        preprocessor = CategoricalPreprocessor(
+            ['dengue_rate', 'malaria_rate', 'heatstroke_rate', 'diarrhea_rate'],
+            ['location_id']
+        )
+        
+        # XGBoost regressor (one tree per target per boosting round)
+        xgb_model = xgb.XGBRegressor(
+            n_estimators=100,
+            learning_rate=0.1,
+            max_depth=5,
+            tree_method='hist',
+            enable_categorical=True,
+            random_state=42
+        )
+        
+        # Train model
+        logger.info(f"Training resource model for {len(targets)} targets")
+        xgb_model.fit(preprocessor.fit_transform(X_train), y_train.to_numpy())
+        model = ResourceModel(preprocessor, xgb_model, targets)
+        
+        # Evaluate model
+        y_pred = model.predict(X_test)
+        for i, target in enumerate(targets):
+            rmse = np.sqrt(mean_squared_error(y_test[target], y_pred[:, i]))
             logger.info(f"{target} model RMSE: {rmse:.4f}")
-            
-            # Save individual model
-            models[target] = pipeline
-            preprocessors[target] = preprocessor
-            
-            model_path = os.path.join(MODEL_DIR, f"{target}_model.pkl")
-            with open(model_path, 'wb') as f:
-                pickle.dump(pipeline, f)
-            
-            logger.info(f"Saved {target} model to {model_path}")
         
-        # Save the composite model
-        self.model = {
-            'models': models,
-            'preprocessors': preprocessors
-        }
+        self.model = model
+        artifacts = {'resource': model.to_artifact(), 'resource_trees': model.to_artifact(trees=True)}
         
-        # Save full model dict
-        with open(os.path.join(MODEL_DIR, "resource_predictor.pkl"), 'wb') as f:
-            pickle.dump(self.model, f)
+        # Save model
+        if publish:
+            get_registry().publish(artifacts, note="resource model")
         
-        logger.info("Saved complete resource predictor model")
+        return artifacts
     
     def load_model(self):
-        """Load trained resource prediction model from disk"""
-        model_path = os.path.join(MODEL_DIR, "resource_predictor.pkl")
-        try:
-            with open(model_path, 'rb') as f:
-                self.model = pickle.load(f)
-            logger.info(f"Loaded resource predictor model from {model_path}")
-        except FileNotFoundError:
-            logger.warning(f"Model not found at {model_path}. Train model first.")
+        """Serve the model from the active registry version, loading it on first use"""
+        registry = get_registry()
+        self.models = LazyModels(registry, ['resource'], ResourceModel.from_artifact, key=serving_key)
+        
+        if registry.entry(serving_key('resource')) is None:
+            logger.warning("No registered resource model. Train model first.")
+    
+    def predict_resource_rates(self, input_df):
+        """
+        Predict resource needs per 100k population for many rows in one call
+        
+        Args:
+            input_df: DataFrame with location_id and the four disease rate columns
+            
+        Returns:
+            DataFrame of per-100k predictions, one column per resource target
+        """
+        return self.model.predict_frame(input_df)
     
     def predict_resources(self, health_data, location_id, population):
         """
@@ -881,7 +1586,7 @@ class ResourcePredictor:
             logger.error(f"Error using realistic resource model: {e}. Falling back to ML model.")
             
             # Fallback to the ML model if available
-            if self.model is None or not self.model.get('models'):
+            if self.model is None:
                 logger.error("Resource predictor model not loaded")
                 
                 # Emergency fallback - generate plausible values based on disease cases
@@ -908,25 +1613,75 @@ class ResourcePredictor:
                 'diarrhea_rate': health_data['diarrhea_cases'] * 100000 / population
             }
             
-            # Create input DataFrame
-            input_df = pd.DataFrame([input_data])
+            # Predict every resource need per 100k in one call
+            rates = self.model.predict(input_data)[0]
             
-            # Make predictions for each resource type
-            results = {}
+            # Convert back to absolute values keyed by resource name
+            results = {
+                target.replace('_per_100k', ''): int(rate * population / 100000)
+                for target, rate in zip(self.model.targets, rates)
+            }
             
-            for target, model in self.model['models'].items():
-                # Predict resource need per 100k
-                predicted_value = model.predict(input_df)[0]
-                
-                # Convert back to absolute value
-                absolute_value = int(predicted_value * population / 100000)
+            return results
+    
+    def predict_resources_batch(self, health_df):
+        """
+        Predict hospital resource needs for many locations at once
+        
+        Args:
+            health_df: DataFrame with location_id, population and the four
+                disease case columns, one row per prediction
+            
+        Returns:
+            List of resource need dictionaries (as returned by
+            predict_resources) in the order of the input rows
+        """
+        health_df = health_df.reset_index(drop=True)
+        case_columns = ['dengue_cases', 'malaria_cases', 'heatstroke_cases', 'diarrhea_cases']
+        location_ids = health_df['location_id'].to_numpy()
+        population = health_df['population'].to_numpy(dtype=float)
+        total_cases = health_df[case_columns].sum(axis=1).to_numpy()
+        
+        try:
+            # Try to use the realistic resource model
+            from ..utils.climate_health_correlations import calculate_resource_needs_batch
+            
+            needs = calculate_resource_needs_batch(total_cases)
+            
+            # Add some variability based on location (0.95-1.00 range based on location ID)
+            location_factor = (location_ids % 5 + 95) / 100.0
+            columns = {key: (values * location_factor).astype(int) for key, values in needs.items()}
+            
+        except Exception as e:
+            logger.error(f"Error using realistic resource model: {e}. Falling back to ML model.")
+            
+            if self.model is None:
+                logger.error("Resource predictor model not loaded")
                 
-                # Extract resource name from target
-                resource_name = target.replace('_per_100k', '')
+                # Emergency fallback - basic resource estimation ratios
+                columns = {
+                    'beds': (total_cases * 0.6).astype(int),
+                    'doctors': np.maximum(5, (total_cases * 0.05).astype(int)),
+                    'nurses': np.maximum(10, (total_cases * 0.15).astype(int)),
+                    'iv_fluids': (total_cases * 3).astype(int),
+                    'antibiotics': (total_cases * 0.5).astype(int),
+                    'antipyretics': (total_cases * 3).astype(int)
+                }
+            else:
+                # Calculate disease rates per 100k
+                input_df = pd.DataFrame({'location_id': location_ids})
+                for column in case_columns:
+                    input_df[column.replace('_cases', '_rate')] = health_df[column].to_numpy() * 100000 / population
                 
-                results[resource_name] = absolute_value
-            
-            return results
+                # One model call for every resource and location
+                rates = self.predict_resource_rates(input_df)
+                columns = {
+                    target.replace('_per_100k', ''): (rates[target].to_numpy() * population / 100000).astype(int)
+                    for target in rates.columns
+                }
+        
+        values = {key: np.asarray(array).tolist() for key, array in columns.items()}
+        return [{key: column[i] for key, column in values.items()} for i in range(len(health_df))]
 
 
 def train_all_models():
@@ -934,19 +1689,26 @@ def train_all_models():
     logger.info("Starting training of all ML models")
     
     try:
+        # One database extraction shared by all trainers
+        features = get_feature_frame()
+        artifacts = {}
+        
         # Train risk classifier
         risk_classifier = RiskClassifier()
-        risk_classifier.train_risk_models()
+        artifacts.update(risk_classifier.train_risk_models(features=features.copy(), publish=False))
         
         # Train disease forecaster
         disease_forecaster = DiseaseForecaster()
-        disease_forecaster.train_forecasting_models()
+        artifacts.update(disease_forecaster.train_forecasting_models(features=features.copy(), publish=False))
         
         # Train resource predictor
         resource_predictor = ResourcePredictor()
-        resource_predictor.train_resource_model()
+        artifacts.update(resource_predictor.train_resource_model(features=features.copy(), publish=False))
+        
+        # Publish everything as one registry version
+        version = get_registry().publish(artifacts, note="all models")
         
-        logger.info("All models trained successfully")
+        logger.info(f"All models trained successfully (version {version})")
         return True
     except Exception as e:
         logger.error(f"Error training models: {e}")
@@ -0,0 +1,472 @@
+"""
+Versioned model registry
+
+Trained models are published as immutable versions listed in a JSON manifest.
+Every model entry records its format, content hash and metadata such as the
+feature schema needed to rebuild its inputs. XGBoost boosters are stored in
+XGBoost's native UBJSON format and other payloads as plain files, all in a
+content-addressed object store, so models that did not change are shared
+between versions.
+
+Serving code loads a model lazily, on first use, from whichever version is
+active. Activating a version or rolling back is a single atomic rewrite of the
+manifest, and recently active models stay in memory so a rollback is instant.
+The manifest is only rewritten under a lock file, so that processes publishing
+or switching versions at the same time do not lose each other's changes.
+
+Every API worker holds its own copy of the manifest. A watcher thread polls
+the manifest file and, when another process has activated a version, loads
+the new version's models before swapping the manifest in, so requests never
+wait on a model load or see a half-loaded version. The manifest is swapped as
+one reference, and pinned() holds on to the reference for the length of a
+request, so that every model a request uses comes from the same version.
+"""
+import contextlib
+import contextvars
+import copy
+import hashlib
+import importlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+
+from ..utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models", "registry")
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_LOCK_NAME = ".manifest.lock"
+
+# Number of most recently active versions whose loaded models are kept in memory
+CACHED_VERSIONS = 2
+
+# Seconds between checks of the manifest for versions activated by other processes
+RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "5"))
+
+
+def _json_sha256(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Manifest and object store for one registry directory"""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        # _lock guards the manifest reference and model cache and is only held
+        # briefly; _swap_lock serializes manifest writes and reloads, which load
+        # models while holding it
+        self._lock = threading.RLock()
+        self._swap_lock = threading.Lock()
+        self._manifest = None
+        self._manifest_stat = None
+        self._rejected_stat = None
+        self._cache = {}
+        self._builders = {}
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        # Manifest pinned by the current request or task, see pinned()
+        self._pinned = contextvars.ContextVar(f"pinned_manifest:{root}", default=None)
+
+    def _manifest_lock(self):
+        # Serializes manifest rewrites across processes; _swap_lock only covers this one
+        return FileLock(os.path.join(self.root, MANIFEST_LOCK_NAME))
+
+    # Manifest
+
+    def _manifest_signature(self):
+        # The manifest is replaced, never modified in place, so a new version
+        # always shows up as a new inode
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _read_manifest(self):
+        """Manifest on disk and the file signature it was read with"""
+        signature = self._manifest_signature()
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f), signature
+        except FileNotFoundError:
+            return {'active': None, 'history': [], 'versions': {}}, None
+
+    def _write_manifest(self, manifest):
+        """Load the models of the manifest's active version, then write and swap it in"""
+        self._warm(manifest)
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".manifest-")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._swap(manifest, self._manifest_signature())
+
+    def _swap(self, manifest, signature):
+        with self._lock:
+            self._manifest = manifest
+            self._manifest_stat = signature
+            self._prune_cache()
+
+    def manifest(self, reload=False):
+        """Return the pinned or current manifest, checking the file for a newer one if asked to"""
+        if reload:
+            self.reload()
+        else:
+            pinned = self._pinned.get()
+            if pinned is not None:
+                return pinned
+        with self._lock:
+            if self._manifest is None:
+                self._manifest, self._manifest_stat = self._read_manifest()
+            return self._manifest
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """
+        Resolve every lookup in the block against the manifest current on entry
+
+        The manifest is kept in a context variable, so it also applies to work
+        the block hands to threads with the context copied (run_in_threadpool,
+        AsyncSingleFlight). Nested blocks keep the outer manifest.
+        """
+        token = self._pinned.set(self.manifest())
+        try:
+            yield
+        finally:
+            self._pinned.reset(token)
+
+    @property
+    def active_version(self):
+        return self.manifest()['active']
+
+    def versions(self):
+        """Summaries of every published version, oldest first"""
+        manifest = self.manifest()
+        return [
+            {
+                'version': version,
+                'created_at': info['created_at'],
+                'content_hash': info['content_hash'],
+                'note': info.get('note'),
+                'models': sorted(info['models']),
+                'active': version == manifest['active']
+            }
+            for version, info in manifest['versions'].items()
+        ]
+
+    def entry(self, name, version=None):
+        """Manifest entry for a model in the given (default: active) version"""
+        manifest = self.manifest()
+        version = version or manifest['active']
+        if version is None:
+            return None
+        return manifest['versions'][version]['models'].get(name)
+
+    # Publishing and version switching
+
+    def _store_object(self, path, extension):
+        """Copy a payload into the object store under its content hash"""
+        sha256 = _file_sha256(path)
+        object_name = f"{sha256}.{extension}"
+        object_path = os.path.join(self.objects_dir, object_name)
+        if not os.path.exists(object_path):
+            os.makedirs(self.objects_dir, exist_ok=True)
+            tmp_path = f"{object_path}.tmp"
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, object_path)
+        return sha256, object_name
+
+    def publish(self, models, activate=True, note=None):
+        """
+        Publish a new version containing the given models
+
+        Models that are not given are carried over from the active version.
+        Publishing content identical to the active version returns that
+        version instead of creating a new one.
+
+        Args:
+            models: Mapping of model name to an artifact dict with a JSON-able
+                'metadata' entry and optionally a 'booster' (XGBoost model or
+                anything else with save_model(path), saved in the artifact's
+                'format', UBJSON by default) or a 'file' (path copied as is)
+            activate: Make the new version active
+            note: Free-form description stored with the version
+
+        Returns:
+            The version id
+        """
+        entries = {}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, artifact in models.items():
+                metadata = artifact.get('metadata', {})
+                if 'booster' in artifact:
+                    model_format = artifact.get('format', 'ubj')
+                    path = os.path.join(tmpdir, f"{name}.{model_format}")
+                    artifact['booster'].save_model(path)
+                elif 'file' in artifact:
+                    path = artifact['file']
+                    model_format = os.path.splitext(path)[1].lstrip('.') or 'bin'
+                else:
+                    path = None
+                    model_format = 'json'
+
+                if path is not None:
+                    sha256, object_name = self._store_object(path, model_format)
+                else:
+                    sha256, object_name = _json_sha256(metadata), None
+
+                entries[name] = {
+                    'format': model_format,
+                    'object': object_name,
+                    'sha256': sha256,
+                    'metadata': metadata
+                }
+
+        with self._swap_lock, self._manifest_lock():
+            manifest, _ = self._read_manifest()
+            parent = manifest['active']
+            merged = dict(manifest['versions'][parent]['models']) if parent else {}
+            merged.update(entries)
+
+            content_hash = _json_sha256({
+                name: [entry['sha256'], entry['metadata']] for name, entry in merged.items()
+            })
+            if parent and manifest['versions'][parent]['content_hash'] == content_hash:
+                logger.info(f"Published models are identical to active version {parent}")
+                return parent
+
+            version = f"v{len(manifest['versions']) + 1:04d}-{content_hash[:8]}"
+            manifest['versions'][version] = {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'parent': parent,
+                'content_hash': content_hash,
+                'note': note,
+                'models': merged
+            }
+            if activate:
+                self._set_active(manifest, version)
+            self._write_manifest(manifest)
+
+        logger.info(f"Published model version {version} ({', '.join(sorted(entries))})")
+        return version
+
+    def _set_active(self, manifest, version):
+        if manifest['active'] != version:
+            manifest['history'].append(version)
+        manifest['active'] = version
+
+    def activate(self, version):
+        """Make a published version active"""
+        with self._swap_lock, self._manifest_lock():
+            manifest, _ = self._read_manifest()
+            if version not in manifest['versions']:
+                raise KeyError(f"Unknown model version {version}")
+            self._set_active(manifest, version)
+            self._write_manifest(manifest)
+        logger.info(f"Activated model version {version}")
+        return version
+
+    def rollback(self):
+        """Re-activate the version that was active before the current one"""
+        with self._swap_lock, self._manifest_lock():
+            manifest, _ = self._read_manifest()
+            if len(manifest['history']) < 2:
+                raise ValueError("No previous model version to roll back to")
+            manifest['history'].pop()
+            manifest['active'] = manifest['history'][-1]
+            self._write_manifest(manifest)
+        logger.info(f"Rolled back to model version {manifest['active']}")
+        return manifest['active']
+
+    # Loading
+
+    def object_path(self, entry):
+        return os.path.join(self.objects_dir, entry['object']) if entry['object'] else None
+
+    def load(self, name, builder, version=None):
+        """
+        Load a model from the given (default: active) version
+
+        Args:
+            name: Model name in the manifest
+            builder: Callable taking (entry, object_path) and returning the model
+            version: Version to load from
+
+        Returns:
+            The model, or None if the version has no such model
+        """
+        entry = self.entry(name, version)
+        if entry is None:
+            return None
+
+        key = (name, entry['sha256'])
+        with self._lock:
+            # Remembered so later versions of this model can be loaded ahead of a swap
+            self._builders[name] = builder
+            if key in self._cache:
+                return self._cache[key]
+
+        model = builder(entry, self.object_path(entry))
+        with self._lock:
+            self._cache[key] = model
+        logger.info(f"Loaded model {name} ({entry['sha256'][:8]})")
+        return model
+
+    def _warm(self, manifest):
+        """Load the models of the manifest's active version that this process serves"""
+        if manifest['active'] is None:
+            return
+        models = manifest['versions'][manifest['active']]['models']
+        with self._lock:
+            pending = [
+                (name, builder, models[name]) for name, builder in self._builders.items()
+                if name in models and (name, models[name]['sha256']) not in self._cache
+            ]
+        for name, builder, entry in pending:
+            model = builder(entry, self.object_path(entry))
+            with self._lock:
+                self._cache[(name, entry['sha256'])] = model
+            logger.info(f"Preloaded model {name} ({entry['sha256'][:8]}) for version {manifest['active']}")
+
+    # Reloading
+
+    def reload(self):
+        """
+        Pick up a manifest written by another process
+
+        The new active version's models are loaded before the manifest is
+        swapped in. If they fail to load, this process keeps serving the
+        version it has.
+
+        Returns:
+            True if a new manifest was swapped in
+        """
+        with self._swap_lock:
+            signature = self._manifest_signature()
+            if signature == self._manifest_stat or signature == self._rejected_stat:
+                return False
+            manifest, signature = self._read_manifest()
+            previous = self._manifest['active'] if self._manifest else None
+            try:
+                self._warm(manifest)
+            except Exception as e:
+                logger.error(f"Could not load models of version {manifest['active']}, "
+                             f"keeping version {previous}: {e}")
+                self._rejected_stat = signature
+                return False
+            self._swap(manifest, signature)
+        if manifest['active'] != previous:
+            logger.info(f"Switched from model version {previous} to {manifest['active']}")
+        return True
+
+    def watch(self, interval=None):
+        """Start a daemon thread that reloads the manifest when it changes"""
+        interval = RELOAD_INTERVAL if interval is None else interval
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._stop_watching.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, args=(interval,), name="model-registry-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def _watch(self, interval):
+        while not self._stop_watching.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Error checking the model manifest: {e}")
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+
+    def _prune_cache(self):
+        """Keep loaded models of the most recently active versions only"""
+        manifest = self._manifest
+        keep = set()
+        for version in manifest['history'][-CACHED_VERSIONS:]:
+            for name, entry in manifest['versions'][version]['models'].items():
+                keep.add((name, entry['sha256']))
+        for key in list(self._cache):
+            if key not in keep:
+                del self._cache[key]
+
+
+class LazyModels(MutableMapping):
+    """
+    Name to model mapping backed by the registry
+
+    Each lookup resolves against the active version of the registry's
+    pinned or current manifest and loads the model on first use, so
+    activating another version takes effect on the next request. Assigned
+    values, such as freshly trained models, take precedence over the
+    registry. Missing models read as None.
+    """
+
+    def __init__(self, registry, names, builder, key=None):
+        self.registry = registry
+        self.names = list(names)
+        self.builder = builder
+        self.key = key or (lambda name: name)
+        self._overrides = {}
+
+    def __getitem__(self, name):
+        if name in self._overrides:
+            return self._overrides[name]
+        if name not in self.names:
+            raise KeyError(name)
+        return self.registry.load(self.key(name), self.builder)
+
+    def __setitem__(self, name, model):
+        if name not in self.names:
+            self.names.append(name)
+        self._overrides[name] = model
+
+    def __delitem__(self, name):
+        self._overrides.pop(name, None)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def build_from_class(entry, path):
+    """Builder for stateless models registered by their 'module.Class' path"""
+    module_name, class_name = entry['metadata']['class'].rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(root=None):
+    """Shared registry instance for a directory (default: REGISTRY_DIR)"""
+    root = root or REGISTRY_DIR
+    with _registries_lock:
+        if root not in _registries:
+            _registries[root] = ModelRegistry(root)
+        return _registries[root]
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Date
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Float, Date
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -37,6 +37,18 @@ class ClimateData(Base):
     location = relationship("Location", back_populates="climate_data")
 
 
+# One observed (not projected) row per location and day, which real-time
+# weather updates upsert on
+OBSERVED_CLIMATE_DAY_INDEX = Index(
+    "uq_climate_data_observed_day",
+    ClimateData.location_id,
+    ClimateData.date,
+    unique=True,
+    postgresql_where=ClimateData.is_projected == False,
+    sqlite_where=ClimateData.is_projected == False
+)
+
+
 class HealthData(Base):
     __tablename__ = "health_data"
 
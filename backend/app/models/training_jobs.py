@@ -0,0 +1,357 @@
+"""
+Background training jobs
+
+Training runs in a separate process so it neither blocks an API worker nor
+competes with request handling for the GIL. Every job is a JSON record in
+the jobs directory, which the training process rewrites atomically as it
+moves through its stages. Any API worker can therefore report a job's
+progress, and per-stage timings, by reading the record.
+
+Nothing is published until the final stage, so a job cancelled or failed
+midway leaves the model registry untouched. Cancellation terminates the
+training process when the worker that started it receives the request, and
+is otherwise picked up by the training process at its next stage boundary.
+
+Jobs need a long-running host that shares the jobs and registry directories
+with the API workers. Only one job runs at a time, which a lock file in the
+jobs directory enforces across workers. A worker only checks on, or
+terminates, processes started on its own host. On Lambda the process would be
+frozen along with the invocation that spawned it, so jobs are refused there;
+train with save_enhanced_models.py or ml_models.py on a separate host and let
+the workers pick up the published version.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from . import feature_store, model_registry
+from ..utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models", "jobs")
+
+ENHANCED_STAGES = ['enhanced_models', 'publish']
+ML_STAGES = ['features', 'risk_models', 'forecast_models', 'resource_model']
+
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+SUBMIT_LOCK_NAME = ".submit.lock"
+
+
+class JobCancelled(Exception):
+    """Raised inside the training process when cancellation was requested"""
+
+
+class JobsUnavailable(RuntimeError):
+    """Raised when this host cannot run training processes"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class TrainingJobManager:
+    """Submits training processes and tracks their job records"""
+
+    def __init__(self, root):
+        self.root = root
+        # Reentrant: submit checks for an active job, which reconciles the
+        # records of this worker's processes, while holding it
+        self._lock = threading.RLock()
+        self._processes = {}
+
+    # Job records
+
+    def _path(self, job_id):
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def _cancel_path(self, job_id):
+        return os.path.join(self.root, f"{job_id}.cancel")
+
+    def cancel_requested(self, job_id):
+        # A marker file rather than a field of the record, so that the training
+        # process rewriting the record cannot lose the request
+        return os.path.exists(self._cancel_path(job_id))
+
+    def read(self, job_id):
+        """Job record, or None for an unknown job id"""
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write(self, job):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".job-")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(job, f, indent=2)
+        os.replace(tmp_path, self._path(job['id']))
+
+    def update(self, job_id, **changes):
+        job = self.read(job_id)
+        job.update(changes)
+        self.write(job)
+        return job
+
+    def jobs(self):
+        """All job records, newest first"""
+        if not os.path.isdir(self.root):
+            return []
+        jobs = [self.get(name[:-5]) for name in os.listdir(self.root) if name.endswith('.json')]
+        return sorted((job for job in jobs if job), key=lambda job: job['created_at'], reverse=True)
+
+    def get(self, job_id):
+        """
+        Job record with progress, reconciled against its training process
+
+        A job of this host that can no longer finish is marked failed here:
+        its process exited without finishing its record (killed, out of
+        memory), or it is still queued but its process was never started.
+        """
+        job = self.read(job_id)
+        if job is None:
+            return None
+        if job['status'] not in FINISHED_STATES and job.get('host') == socket.gethostname():
+            error = self._lost(job)
+            if error is not None:
+                job = self.update(job_id, status='failed', finished_at=_now(), error=error)
+        job['cancel_requested'] = self.cancel_requested(job_id)
+        done = sum(1 for stage in job['stages'] if stage['status'] == 'succeeded')
+        job['progress'] = round(done / len(job['stages']), 2)
+        return job
+
+    def _lost(self, job):
+        """Why an unfinished job of this host will never finish, or None if it still may"""
+        if job.get('pid'):
+            return None if _pid_alive(job['pid']) else "Training process exited unexpectedly"
+        # Queued, and the training process has not recorded its pid yet
+        submitter = job.get('submitter')
+        if submitter == os.getpid():
+            with self._lock:
+                process = self._processes.get(job['id'])
+            if process is None:
+                return "Training process exited before it started"
+            return None
+        if submitter and not _pid_alive(submitter):
+            return "API worker exited before the training process started"
+        return None
+
+    def active_job(self):
+        """The queued or running job, if any"""
+        for job in self.jobs():
+            if job['status'] not in FINISHED_STATES:
+                return job
+        return None
+
+    # Running
+
+    def submit(self, include_ml=False, note=None):
+        """
+        Start a training job in a new process
+
+        Args:
+            include_ml: Also retrain the XGBoost/LSTM models from the
+                feature store, not just the enhanced models
+            note: Description stored with the published version
+
+        Returns:
+            The job record
+
+        Raises:
+            JobsUnavailable: On Lambda, which freezes the training process
+            RuntimeError: If another job is still queued or running
+        """
+        if os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+            raise JobsUnavailable("Training jobs need a long-running host and cannot run on Lambda")
+
+        with self._lock, FileLock(os.path.join(self.root, SUBMIT_LOCK_NAME)):
+            active = self.active_job()
+            if active is not None:
+                raise RuntimeError(f"Training job {active['id']} is already {active['status']}")
+
+            stages = (ML_STAGES if include_ml else []) + ENHANCED_STAGES
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'queued',
+                'created_at': _now(),
+                'started_at': None,
+                'finished_at': None,
+                'note': note,
+                'version': None,
+                'error': None,
+                'pid': None,
+                'host': socket.gethostname(),
+                'submitter': os.getpid(),
+                'stages': [
+                    {'name': name, 'status': 'pending', 'started_at': None, 'duration_s': None}
+                    for name in stages
+                ]
+            }
+            self.write(job)
+
+            # Spawn rather than fork: the API process runs threads (and XGBoost
+            # an OpenMP pool) that a forked child would inherit in a broken state
+            process = multiprocessing.get_context('spawn').Process(
+                target=run_job,
+                args=(self.root, job['id'], model_registry.REGISTRY_DIR, feature_store.FEATURE_STORE_DIR),
+                name=f"training-{job['id'][:8]}",
+                daemon=False
+            )
+            try:
+                process.start()
+            except Exception as e:
+                self.update(job['id'], status='failed', finished_at=_now(),
+                            error=f"Could not start training process: {e}")
+                raise
+            self._processes[job['id']] = process
+            threading.Thread(target=self._reap, args=(job['id'], process), daemon=True).start()
+
+        logger.info(f"Started training job {job['id']} (pid {process.pid})")
+        return self.get(job['id'])
+
+    def _reap(self, job_id, process):
+        process.join()
+        with self._lock:
+            self._processes.pop(job_id, None)
+        job = self.read(job_id)
+        if job and job['status'] not in FINISHED_STATES:
+            if self.cancel_requested(job_id):
+                self.update(job_id, status='cancelled', finished_at=_now())
+            else:
+                self.update(job_id, status='failed', finished_at=_now(),
+                            error=f"Training process exited with code {process.exitcode}")
+
+    def cancel(self, job_id):
+        """
+        Request cancellation of a job
+
+        A process started by this worker is terminated, and its record is
+        marked cancelled once it has exited. Does not wait for the process.
+
+        Returns:
+            The job record, or None for an unknown job id
+        """
+        job = self.read(job_id)
+        if job is None or job['status'] in FINISHED_STATES:
+            return self.get(job_id)
+        open(self._cancel_path(job_id), 'a').close()
+
+        with self._lock:
+            process = self._processes.get(job_id)
+        if process is not None:
+            # _reap marks the record cancelled when the process exits
+            process.terminate()
+        logger.info(f"Cancellation requested for training job {job_id}")
+        return self.get(job_id)
+
+
+def _run_stages(manager, job_id, stages):
+    """Run the stage functions in order, recording their timings"""
+    context = {'artifacts': {}}
+    for index, (name, stage) in enumerate(stages):
+        if manager.cancel_requested(job_id):
+            raise JobCancelled()
+        job = manager.read(job_id)
+
+        job['stages'][index].update(status='running', started_at=_now())
+        manager.write(job)
+        start = time.perf_counter()
+        try:
+            stage(context)
+        except Exception:
+            job['stages'][index].update(status='failed', duration_s=round(time.perf_counter() - start, 3))
+            manager.write(job)
+            raise
+        job = manager.read(job_id)
+        job['stages'][index].update(status='succeeded', duration_s=round(time.perf_counter() - start, 3))
+        manager.write(job)
+    return context
+
+
+def run_job(root, job_id, registry_dir, feature_store_dir):
+    """Entry point of the training process"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Use the same directories as the API worker that submitted the job
+    model_registry.REGISTRY_DIR = registry_dir
+    feature_store.FEATURE_STORE_DIR = feature_store_dir
+
+    from .ml_models import RiskClassifier, DiseaseForecaster, ResourcePredictor
+    from .enhanced_models import enhanced_model_artifacts
+
+    def features(context):
+        context['features'] = feature_store.get_feature_frame()
+
+    def risk_models(context):
+        context['artifacts'].update(RiskClassifier().train_risk_models(
+            features=context['features'].copy(), publish=False))
+
+    def forecast_models(context):
+        context['artifacts'].update(DiseaseForecaster().train_forecasting_models(
+            features=context['features'].copy(), publish=False))
+
+    def resource_model(context):
+        context['artifacts'].update(ResourcePredictor().train_resource_model(
+            features=context['features'].copy(), publish=False))
+
+    def enhanced_models(context):
+        context['artifacts'].update(enhanced_model_artifacts())
+
+    def publish(context):
+        job = manager.read(job_id)
+        context['version'] = model_registry.get_registry().publish(
+            context['artifacts'], note=job['note'] or f"training job {job_id[:8]}")
+
+    stage_functions = {
+        'features': features,
+        'risk_models': risk_models,
+        'forecast_models': forecast_models,
+        'resource_model': resource_model,
+        'enhanced_models': enhanced_models,
+        'publish': publish
+    }
+
+    manager = TrainingJobManager(root)
+    job = manager.update(job_id, status='running', started_at=_now(), pid=os.getpid())
+    try:
+        context = _run_stages(manager, job_id, [(stage['name'], stage_functions[stage['name']])
+                                                for stage in job['stages']])
+        manager.update(job_id, status='succeeded', finished_at=_now(), version=context['version'])
+        logger.info(f"Training job {job_id} published model version {context['version']}")
+    except JobCancelled:
+        manager.update(job_id, status='cancelled', finished_at=_now())
+        logger.info(f"Training job {job_id} cancelled")
+    except Exception as e:
+        logger.error(f"Training job {job_id} failed: {e}")
+        manager.update(job_id, status='failed', finished_at=_now(), error=str(e))
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_job_manager(root=None):
+    """Shared job manager for a directory (default: JOBS_DIR)"""
+    root = root or JOBS_DIR
+    with _managers_lock:
+        if root not in _managers:
+            _managers[root] = TrainingJobManager(root)
+        return _managers[root]
@@ -0,0 +1,239 @@
+"""
+Pure NumPy evaluation of exported XGBoost tree ensembles
+
+The risk and resource models are small gradient-boosted ensembles. Serving
+them through XGBoost means importing it in the API process, which dominates
+cold start on Lambda. export_booster flattens a trained booster into packed
+node arrays, and TreeEnsemble scores batches from those arrays alone: all
+rows advance through all trees one level at a time, so the number of NumPy
+operations depends on the tree depth, not on the number of rows or trees.
+
+Categorical splits (location_id, month) are kept as one category bitmask per
+categorical node. Missing values, including categories unseen in training,
+follow each node's default direction as in XGBoost.
+"""
+import json
+
+import numpy as np
+
+# Objectives whose predictions TreeEnsemble can reproduce
+SUPPORTED_OBJECTIVES = ('binary:logistic', 'multi:softprob', 'multi:softmax', 'reg:squarederror')
+
+# Array fields of an exported ensemble, as written by save_model
+ARRAY_FIELDS = (
+    'feature', 'threshold', 'left', 'right', 'default_left', 'value',
+    'category_row', 'category_mask', 'roots', 'tree_group', 'base_margin'
+)
+
+
+def _parse_base_score(value):
+    """base_score is stored as a string, either a scalar or a bracketed vector"""
+    return np.array([float(v) for v in value.strip('[]').split(',')], dtype=np.float32)
+
+
+class TreeEnsemble:
+    """
+    Packed node arrays of a tree ensemble and a vectorized evaluator
+
+    Nodes of all trees are stored back to back. For node i, feature[i] is the
+    split feature (-1 for leaves), threshold[i] the split value, left[i] and
+    right[i] the child positions (a leaf points at itself), default_left[i]
+    the direction of missing values and value[i] the leaf value.
+    category_row[i] indexes the row of category_mask holding the categories
+    sent right by a categorical split (-1 for numeric splits). Tree t starts
+    at roots[t] and contributes to output group tree_group[t] (class or
+    target).
+
+    inplace_predict mirrors Booster.inplace_predict, so the ensemble can
+    stand in for a booster in RiskModel and ResourceModel.
+    """
+
+    def __init__(self, objective, feature, threshold, left, right, default_left, value,
+                 category_row, category_mask, roots, tree_group, base_margin):
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"Unsupported objective {objective}")
+        self.objective = objective
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.category_row = np.asarray(category_row, dtype=np.int32)
+        self.category_mask = np.asarray(category_mask, dtype=bool)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.tree_group = np.asarray(tree_group, dtype=np.int32)
+        self.base_margin = np.asarray(base_margin, dtype=np.float32)
+
+        self.n_groups = len(self.base_margin)
+        self.max_depth = self._max_depth()
+        # (trees, groups) indicator summing leaf values into their output group,
+        # in float64 so that long sums of float32 leaves stay within float32 of XGBoost
+        self.group_matrix = np.zeros((len(self.roots), self.n_groups))
+        self.group_matrix[np.arange(len(self.roots)), self.tree_group] = 1.0
+        self._compile()
+
+    def _compile(self):
+        """
+        Derive the arrays the evaluator gathers from
+
+        Leaves get a feature of 0, an infinite threshold and a default-left
+        direction, so every row always moves left and a leaf, whose left
+        child is itself, keeps it. Categorical lookups go through one flat
+        mask with an all-False row for numeric nodes and an all-False column
+        for codes outside the known categories.
+        """
+        leaf = self.feature < 0
+        self._feature = np.where(leaf, 0, self.feature).astype(np.intp)
+        self._threshold = np.where(leaf, np.inf, self.threshold).astype(np.float32)
+        self._default_left = self.default_left | leaf
+        self._left = self.left.astype(np.intp)
+        self._right = self.right.astype(np.intp)
+        # XGBoost allocates the children of a node next to each other
+        self._consecutive = bool(np.array_equal(self.right[~leaf], self.left[~leaf] + 1))
+
+        n_rows, width = self.category_mask.shape
+        self._categorical = self.category_row >= 0
+        self._has_categories = bool(self._categorical.any())
+        self._category_width = width
+        padded = np.zeros((n_rows + 1, width + 1), dtype=bool)
+        padded[:n_rows, :width] = self.category_mask
+        self._category_mask = padded.ravel()
+        self._category_offset = (np.where(self._categorical, self.category_row, n_rows) * (width + 1)).astype(np.intp)
+
+    def _max_depth(self):
+        node = self.roots.copy()
+        depth = 0
+        frontier = node[self.feature[node] >= 0]
+        while len(frontier):
+            depth += 1
+            frontier = np.concatenate([self.left[frontier], self.right[frontier]])
+            frontier = frontier[self.feature[frontier] >= 0]
+        return depth
+
+    # Exporting
+
+    @classmethod
+    def from_model_json(cls, model):
+        """Build from the parsed JSON model of Booster.save_raw('json')"""
+        learner = model['learner']
+        objective = learner['objective']['name']
+        params = learner['learner_model_param']
+        n_groups = max(int(params.get('num_class', 0)), int(params.get('num_target', 1)), 1)
+        trees = learner['gradient_booster']['model']['trees']
+        tree_info = learner['gradient_booster']['model']['tree_info']
+
+        base_score = _parse_base_score(params['base_score'])
+        if objective == 'binary:logistic':
+            # The base score is a probability; margins are log-odds
+            base_score = np.log(base_score / (1 - base_score))
+        base_margin = np.broadcast_to(base_score, (n_groups,)).astype(np.float32)
+
+        arrays = {name: [] for name in ('feature', 'threshold', 'left', 'right', 'default_left', 'value')}
+        category_row, category_sets, roots = [], [], []
+        offset = 0
+        for tree in trees:
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            right = np.asarray(tree['right_children'], dtype=np.int64)
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            n_nodes = len(left)
+            nodes = np.arange(n_nodes)
+            is_leaf = left == -1
+
+            arrays['feature'].append(np.where(is_leaf, -1, tree['split_indices']))
+            arrays['threshold'].append(np.where(is_leaf | np.isnan(conditions), 0, conditions))
+            arrays['left'].append(np.where(is_leaf, nodes, left) + offset)
+            arrays['right'].append(np.where(is_leaf, nodes, right) + offset)
+            arrays['default_left'].append(np.asarray(tree['default_left'], dtype=bool))
+            arrays['value'].append(np.where(is_leaf, conditions, 0))
+
+            rows = np.full(n_nodes, -1)
+            segments = tree.get('categories_segments', [])
+            sizes = tree.get('categories_sizes', [])
+            for node, start, size in zip(tree.get('categories_nodes', []), segments, sizes):
+                rows[node] = len(category_sets)
+                category_sets.append(tree['categories'][start:start + size])
+            category_row.append(rows)
+
+            roots.append(offset)
+            offset += n_nodes
+
+        width = max((max(categories) + 1 for categories in category_sets if categories), default=0)
+        category_mask = np.zeros((len(category_sets), width), dtype=bool)
+        for row, categories in enumerate(category_sets):
+            category_mask[row, categories] = True
+
+        return cls(
+            objective,
+            category_row=np.concatenate(category_row),
+            category_mask=category_mask,
+            roots=roots,
+            tree_group=tree_info,
+            base_margin=base_margin,
+            **{name: np.concatenate(parts) for name, parts in arrays.items()}
+        )
+
+    def save_model(self, path):
+        """Write the arrays to an uncompressed .npz file at exactly this path"""
+        with open(path, 'wb') as f:
+            np.savez(f, objective=np.array(self.objective),
+                     **{name: getattr(self, name) for name in ARRAY_FIELDS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(str(data['objective']), **{name: data[name] for name in ARRAY_FIELDS})
+
+    # Scoring
+
+    def leaf_nodes(self, X):
+        """Leaf reached in every tree by every row, shape (rows, trees)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        node = np.broadcast_to(self.roots.astype(np.intp), (n_rows, len(self.roots))).copy()
+        width = self._category_width
+
+        for _ in range(self.max_depth):
+            x = values.take(row_offset + self._feature.take(node))
+            missing = np.isnan(x)
+            go_left = x < self._threshold.take(node)
+
+            if self._has_categories:
+                # Categories in the node's set go right
+                known = ~missing & (x >= 0) & (x < width)
+                codes = np.where(known, x, width).astype(np.intp)
+                in_set = self._category_mask.take(self._category_offset.take(node) + codes)
+                go_left = np.where(self._categorical.take(node), ~in_set, go_left)
+
+            go_left = np.where(missing, self._default_left.take(node), go_left)
+            if self._consecutive:
+                node = self._left.take(node) + ~go_left
+            else:
+                node = np.where(go_left, self._left.take(node), self._right.take(node))
+
+        return node
+
+    def predict_margin(self, X):
+        """Raw scores, shape (rows, groups)"""
+        return self.base_margin + self.value[self.leaf_nodes(X)] @ self.group_matrix
+
+    def inplace_predict(self, X):
+        """Predictions shaped like Booster.inplace_predict for the same objective"""
+        margin = self.predict_margin(X)
+        if self.objective == 'binary:logistic':
+            return 1.0 / (1.0 + np.exp(-margin[:, 0]))
+        if self.objective == 'multi:softprob':
+            exp = np.exp(margin - margin.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        if self.objective == 'multi:softmax':
+            return np.argmax(margin, axis=1).astype(np.float32)
+        return margin[:, 0] if self.n_groups == 1 else margin
+
+
+def export_booster(booster):
+    """Flatten a trained XGBoost booster (or sklearn wrapper) into a TreeEnsemble"""
+    if hasattr(booster, 'get_booster'):
+        booster = booster.get_booster()
+    return TreeEnsemble.from_model_json(json.loads(booster.save_raw('json')))
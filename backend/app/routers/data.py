@@ -3,11 +3,16 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
+import pandas as pd
 
 from ..models.database import get_db
 from ..models.models import Location, ClimateData, HealthData, HospitalData
-from ..auth.auth import get_current_active_user, User
-from ..utils.openweather_api import get_real_time_weather, update_climate_data_with_real_weather
+from ..auth.auth import get_current_active_user, get_current_admin_user, User
+from ..utils.openweather_api import (
+    get_real_time_weather, update_climate_data_with_real_weather, run_climate_data_refresh,
+    get_client_stats, WEATHER_CACHE
+)
+from ..utils.single_flight import AsyncSingleFlight
 
 router = APIRouter(
     prefix="/data",
@@ -15,6 +20,10 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Refreshes of the climate data of all locations in flight; concurrent
+# requests for one share its result
+REFRESH_FLIGHTS = AsyncSingleFlight()
+
 @router.get("/locations")
 async def get_locations(
     location_type: Optional[str] = None,
@@ -204,6 +213,34 @@ async def get_hospital_data(
     return hospital_data
 
 
+def get_rows_by_location(db: Session, model, on_date):
+    """
+    Get the actual (non-projected) rows of a data table for one date, keyed by
+    location ID, keeping the first row per location.
+    """
+    rows = {}
+    for row in db.query(model).filter(model.date == on_date, model.is_projected == False):
+        rows.setdefault(row.location_id, row)
+    return rows
+
+
+def climate_frame(locations, climate_rows, on_date):
+    """Build the climate feature frame used for batch risk prediction."""
+    return pd.DataFrame([
+        {
+            "location_id": location.id,
+            "date": on_date,
+            "temperature": climate_rows[location.id].temperature,
+            "rainfall": climate_rows[location.id].rainfall,
+            "humidity": climate_rows[location.id].humidity,
+            "flood_probability": climate_rows[location.id].flood_probability,
+            "cyclone_probability": climate_rows[location.id].cyclone_probability,
+            "heatwave_probability": climate_rows[location.id].heatwave_probability
+        }
+        for location in locations
+    ])
+
+
 @router.get("/summary")
 async def get_data_summary(
     current_user: User = Depends(get_current_active_user),
@@ -229,132 +266,110 @@ async def get_data_summary(
     
     latest_date = latest_climate.date
     
+    # Get climate, health and hospital data for all locations on the latest date
+    climate_rows = get_rows_by_location(db, ClimateData, latest_date)
+    health_rows = get_rows_by_location(db, HealthData, latest_date)
+    hospital_rows = get_rows_by_location(db, HospitalData, latest_date)
+    
+    locations = [
+        location for location in db.query(Location).all()
+        if location.id in climate_rows and location.id in health_rows and location.id in hospital_rows
+    ]
+    
+    # Get risk predictions for every location in one batch
+    risk_predictions = [None] * len(locations)
+    if locations:
+        try:
+            risk_predictions = risk_classifier.predict_risk_batch(climate_frame(locations, climate_rows, latest_date))
+        except Exception as e:
+            print(f"Error predicting risks: {e}")
+    
     # Get summary data for all locations on the latest date
     summary_data = []
     
-    for location in db.query(Location).all():
-        # Get climate data
-        climate = db.query(ClimateData)\
-            .filter(
-                ClimateData.location_id == location.id,
-                ClimateData.date == latest_date,
-                ClimateData.is_projected == False
-            )\
-            .first()
+    for location, risk_data in zip(locations, risk_predictions):
+        climate = climate_rows[location.id]
+        health = health_rows[location.id]
+        hospital = hospital_rows[location.id]
         
-        # Get health data
-        health = db.query(HealthData)\
-            .filter(
-                HealthData.location_id == location.id,
-                HealthData.date == latest_date,
-                HealthData.is_projected == False
-            )\
-            .first()
+        # Calculate disease rates per 100k
+        population = location.population
+        dengue_rate = health.dengue_cases * 100000 / population
+        malaria_rate = health.malaria_cases * 100000 / population
+        heatstroke_rate = health.heatstroke_cases * 100000 / population
+        diarrhea_rate = health.diarrhea_cases * 100000 / population
         
-        # Get hospital data
-        hospital = db.query(HospitalData)\
-            .filter(
-                HospitalData.location_id == location.id,
-                HospitalData.date == latest_date,
-                HospitalData.is_projected == False
-            )\
-            .first()
+        # Calculate overall disease burden (weighted average)
+        overall_burden = (
+            dengue_rate * 0.25 +
+            malaria_rate * 0.25 +
+            heatstroke_rate * 0.25 +
+            diarrhea_rate * 0.25
+        )
         
-        if climate and health and hospital:
-            # Calculate disease rates per 100k
-            population = location.population
-            dengue_rate = health.dengue_cases * 100000 / population
-            malaria_rate = health.malaria_cases * 100000 / population
-            heatstroke_rate = health.heatstroke_cases * 100000 / population
-            diarrhea_rate = health.diarrhea_cases * 100000 / population
-            
-            # Calculate overall disease burden (weighted average)
-            overall_burden = (
-                dengue_rate * 0.25 +
-                malaria_rate * 0.25 +
-                heatstroke_rate * 0.25 +
-                diarrhea_rate * 0.25
-            )
-            
-            # Calculate hospital bed occupancy rate
-            bed_occupancy = 1 - (hospital.available_beds / hospital.total_beds) if hospital.total_beds > 0 else 0
-            
-            # Prepare climate data for risk prediction
-            climate_dict = {
-                "temperature": climate.temperature,
-                "rainfall": climate.rainfall,
-                "humidity": climate.humidity,
-                "flood_probability": climate.flood_probability,
-                "cyclone_probability": climate.cyclone_probability,
-                "heatwave_probability": climate.heatwave_probability
-            }
-            
-            # Get risk predictions
-            risk_data = {}
-            try:
-                risk_predictions = risk_classifier.predict_risk(climate_dict, location.id, latest_date)
-                risk_data = risk_predictions
-            except Exception as e:
-                print(f"Error predicting risks for {location.name}: {e}")
-                # If prediction fails, calculate risk levels directly from rates
-                risk_data = {
-                    "dengue": {
-                        "risk_level": calculate_risk_level(dengue_rate, "dengue"),
-                        "probability": 0.8,
-                        "rate_per_100k": float(dengue_rate)
-                    },
-                    "malaria": {
-                        "risk_level": calculate_risk_level(malaria_rate, "malaria"),
-                        "probability": 0.8,
-                        "rate_per_100k": float(malaria_rate)
-                    },
-                    "heatstroke": {
-                        "risk_level": calculate_risk_level(heatstroke_rate, "heatstroke"),
-                        "probability": 0.8,
-                        "rate_per_100k": float(heatstroke_rate)
-                    },
-                    "diarrhea": {
-                        "risk_level": calculate_risk_level(diarrhea_rate, "diarrhea"),
-                        "probability": 0.8,
-                        "rate_per_100k": float(diarrhea_rate)
-                    },
-                    "overall": {
-                        "risk_level": calculate_risk_level(overall_burden, "overall"),
-                        "probability": 0.8
-                    }
+        # Calculate hospital bed occupancy rate
+        bed_occupancy = 1 - (hospital.available_beds / hospital.total_beds) if hospital.total_beds > 0 else 0
+        
+        if risk_data is None:
+            # If prediction fails, calculate risk levels directly from rates
+            risk_data = {
+                "dengue": {
+                    "risk_level": calculate_risk_level(dengue_rate, "dengue"),
+                    "probability": 0.8,
+                    "rate_per_100k": float(dengue_rate)
+                },
+                "malaria": {
+                    "risk_level": calculate_risk_level(malaria_rate, "malaria"),
+                    "probability": 0.8,
+                    "rate_per_100k": float(malaria_rate)
+                },
+                "heatstroke": {
+                    "risk_level": calculate_risk_level(heatstroke_rate, "heatstroke"),
+                    "probability": 0.8,
+                    "rate_per_100k": float(heatstroke_rate)
+                },
+                "diarrhea": {
+                    "risk_level": calculate_risk_level(diarrhea_rate, "diarrhea"),
+                    "probability": 0.8,
+                    "rate_per_100k": float(diarrhea_rate)
+                },
+                "overall": {
+                    "risk_level": calculate_risk_level(overall_burden, "overall"),
+                    "probability": 0.8
                 }
-            
-            summary_data.append({
-                "location_id": location.id,
-                "name": location.name,
-                "type": location.type,
-                "temperature": climate.temperature,
-                "rainfall": climate.rainfall,
-                "humidity": climate.humidity,
-                "flood_probability": climate.flood_probability,
-                "cyclone_probability": climate.cyclone_probability,
-                "heatwave_probability": climate.heatwave_probability,
-                "dengue_cases": health.dengue_cases,
-                "dengue_rate": round(dengue_rate, 2),
-                "dengue_risk_level": risk_data.get("dengue", {}).get("risk_level", "unknown"),
-                "malaria_cases": health.malaria_cases,
-                "malaria_rate": round(malaria_rate, 2),
-                "malaria_risk_level": risk_data.get("malaria", {}).get("risk_level", "unknown"),
-                "heatstroke_cases": health.heatstroke_cases,
-                "heatstroke_rate": round(heatstroke_rate, 2),
-                "heatstroke_risk_level": risk_data.get("heatstroke", {}).get("risk_level", "unknown"),
-                "diarrhea_cases": health.diarrhea_cases,
-                "diarrhea_rate": round(diarrhea_rate, 2),
-                "diarrhea_risk_level": risk_data.get("diarrhea", {}).get("risk_level", "unknown"),
-                "overall_disease_burden": round(overall_burden, 2),
-                "overall_risk_level": risk_data.get("overall", {}).get("risk_level", "unknown"),
-                "risk_predictions": risk_data,
-                "total_beds": hospital.total_beds,
-                "available_beds": hospital.available_beds,
-                "bed_occupancy_rate": round(bed_occupancy, 2),
-                "doctors": hospital.doctors,
-                "nurses": hospital.nurses
-            })
+            }
+        
+        summary_data.append({
+            "location_id": location.id,
+            "name": location.name,
+            "type": location.type,
+            "temperature": climate.temperature,
+            "rainfall": climate.rainfall,
+            "humidity": climate.humidity,
+            "flood_probability": climate.flood_probability,
+            "cyclone_probability": climate.cyclone_probability,
+            "heatwave_probability": climate.heatwave_probability,
+            "dengue_cases": health.dengue_cases,
+            "dengue_rate": round(dengue_rate, 2),
+            "dengue_risk_level": risk_data.get("dengue", {}).get("risk_level", "unknown"),
+            "malaria_cases": health.malaria_cases,
+            "malaria_rate": round(malaria_rate, 2),
+            "malaria_risk_level": risk_data.get("malaria", {}).get("risk_level", "unknown"),
+            "heatstroke_cases": health.heatstroke_cases,
+            "heatstroke_rate": round(heatstroke_rate, 2),
+            "heatstroke_risk_level": risk_data.get("heatstroke", {}).get("risk_level", "unknown"),
+            "diarrhea_cases": health.diarrhea_cases,
+            "diarrhea_rate": round(diarrhea_rate, 2),
+            "diarrhea_risk_level": risk_data.get("diarrhea", {}).get("risk_level", "unknown"),
+            "overall_disease_burden": round(overall_burden, 2),
+            "overall_risk_level": risk_data.get("overall", {}).get("risk_level", "unknown"),
+            "risk_predictions": risk_data,
+            "total_beds": hospital.total_beds,
+            "available_beds": hospital.available_beds,
+            "bed_occupancy_rate": round(bed_occupancy, 2),
+            "doctors": hospital.doctors,
+            "nurses": hospital.nurses
+        })
     
     return {
         "date": latest_date.isoformat(),
@@ -362,6 +377,24 @@ async def get_data_summary(
     }
 
 
+@router.post("/real-time-weather/refresh")
+async def refresh_real_time_weather(
+    current_user: User = Depends(get_current_admin_user)  # Admin only
+) -> Dict[str, Any]:
+    """
+    Update today's climate data of every location with real-time weather,
+    in one transaction.
+    
+    Returns:
+        Dictionary with the date written, the number of locations updated,
+        skipped and fetched, and the names of those without weather data
+    """
+    try:
+        # On a session of its own, as concurrent requests share the refresh
+        return await REFRESH_FLIGHTS.do("real-time-weather", run_climate_data_refresh)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update climate data: {e}")
+
 @router.get("/real-time-weather/{location_id}")
 async def get_real_time_weather_data(
     location_id: int,
@@ -391,7 +424,7 @@ async def get_real_time_weather_data(
     if update_db:
         success = update_climate_data_with_real_weather(db, location_id, location.name)
         if not success:
-            raise HTTPException(status_code=500, detail="Failed to update climate data")
+            raise HTTPException(status_code=503, detail="No real-time weather available; climate data not updated")
     
     return {
         "location": {
@@ -403,6 +436,25 @@ async def get_real_time_weather_data(
         "updated_database": update_db
     }
 
+@router.get("/weather-cache")
+async def get_weather_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Get size and hit, miss and eviction counts of this worker's weather cache.
+    """
+    return WEATHER_CACHE.stats()
+
+@router.get("/weather-api")
+async def get_weather_api_stats(
+    current_user: User = Depends(get_current_active_user)
+) -> Dict[str, Any]:
+    """
+    Get the circuit breaker state, retry budget use and fetches in flight of
+    this worker's OpenWeather client.
+    """
+    return get_client_stats()
+
 @router.get("/alerts")
 async def get_alerts(
     risk_threshold: float = 0.7,
@@ -428,55 +480,37 @@ async def get_alerts(
     
     latest_date = latest_climate.date
     
+    # Get climate data for all locations on the latest date
+    climate_rows = get_rows_by_location(db, ClimateData, latest_date)
+    locations = [location for location in db.query(Location).all() if location.id in climate_rows]
+    
+    # Make risk predictions for every location in one batch
+    try:
+        risk_predictions = risk_classifier.predict_risk_batch(climate_frame(locations, climate_rows, latest_date)) if locations else []
+    except Exception as e:
+        # Log but don't fail if prediction errors occur
+        print(f"Error predicting risks: {e}")
+        risk_predictions = []
+    
     # Check all locations for alerts
     alerts = []
     
-    for location in db.query(Location).all():
-        # Get climate data
-        climate = db.query(ClimateData)\
-            .filter(
-                ClimateData.location_id == location.id,
-                ClimateData.date == latest_date,
-                ClimateData.is_projected == False
-            )\
-            .first()
-        
-        if not climate:
-            continue
-        
-        # Prepare climate data for prediction
-        climate_dict = {
-            "temperature": climate.temperature,
-            "rainfall": climate.rainfall,
-            "humidity": climate.humidity,
-            "flood_probability": climate.flood_probability,
-            "cyclone_probability": climate.cyclone_probability,
-            "heatwave_probability": climate.heatwave_probability
-        }
-        
-        # Make risk prediction
-        try:
-            risk_prediction = risk_classifier.predict_risk(climate_dict, location.id, latest_date)
+    for location, risk_prediction in zip(locations, risk_predictions):
+        # Check for high or critical risks
+        for disease, risk_data in risk_prediction.items():
+            risk_level = risk_data['risk_level']
+            probability = risk_data['probability']
             
-            # Check for high or critical risks
-            for disease, risk_data in risk_prediction.items():
-                risk_level = risk_data['risk_level']
-                probability = risk_data['probability']
-                
-                if risk_level in ['high', 'critical'] and probability > risk_threshold:
-                    alerts.append({
-                        "location_id": location.id,
-                        "location_name": location.name,
-                        "date": latest_date.isoformat(),
-                        "disease": disease,
-                        "risk_level": risk_level,
-                        "probability": probability,
-                        "message": f"{risk_level.capitalize()} risk of {disease} in {location.name}"
-                    })
-        except Exception as e:
-            # Log but don't fail if prediction errors occur for a location
-            print(f"Error predicting risk for {location.name}: {e}")
-            continue
+            if risk_level in ['high', 'critical'] and probability > risk_threshold:
+                alerts.append({
+                    "location_id": location.id,
+                    "location_name": location.name,
+                    "date": latest_date.isoformat(),
+                    "disease": disease,
+                    "risk_level": risk_level,
+                    "probability": probability,
+                    "message": f"{risk_level.capitalize()} risk of {disease} in {location.name}"
+                })
     
     return {
         "date": latest_date.isoformat(),
@@ -3,6 +3,7 @@ Enhanced prediction endpoints for comprehensive health risk assessment
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List, Optional
 from datetime import datetime, date
@@ -10,7 +11,7 @@ import pandas as pd
 import numpy as np
 import logging
 
-from ..models.database import get_db
+from ..models.database import get_db, SessionLocal
 from ..models.models import Location, ClimateData, HealthData, HospitalData, User
 from ..auth.auth import get_current_active_user, get_current_admin_user
 from ..utils.health_conditions import (
@@ -19,6 +20,7 @@ from ..utils.health_conditions import (
     predict_hospital_resource_needs
 )
 from ..utils.openweather_api import get_real_time_weather, update_climate_data_with_real_weather
+from ..utils.single_flight import AsyncSingleFlight
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -30,13 +32,19 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Prediction computations in flight. A dashboard requests the health risks,
+# resource needs and peak times of a location at once, and the latter two
+# build on the health risks, so concurrent requests share one computation.
+# A shared computation outlives the request that started it, so it opens its
+# own database session rather than using that request's.
+PREDICTION_FLIGHTS = AsyncSingleFlight()
+
 @router.get("/health-risks/{location_id}")
 async def predict_enhanced_health_risks(
     location_id: int,
     use_real_time: bool = True,  # Default to True for real-time data
     date_str: Optional[str] = None,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user)
 ) -> Dict[str, Any]:
     """
     Predict comprehensive health risks for a location based on climate data.
@@ -49,6 +57,21 @@ async def predict_enhanced_health_risks(
     Returns:
         Dictionary with comprehensive health risk predictions
     """
+    return await PREDICTION_FLIGHTS.do(
+        ("health-risks", location_id, use_real_time, None if use_real_time else date_str),
+        compute_health_risks, location_id, use_real_time, date_str
+    )
+
+def compute_health_risks(location_id: int, use_real_time: bool, date_str: Optional[str]) -> Dict[str, Any]:
+    """Health risk predictions of predict_enhanced_health_risks"""
+    db = SessionLocal()
+    try:
+        return predict_health_risks(location_id, use_real_time, date_str, db)
+    finally:
+        db.close()
+
+def predict_health_risks(location_id: int, use_real_time: bool, date_str: Optional[str], db: Session) -> Dict[str, Any]:
+    """Health risk predictions of compute_health_risks, read with the given session"""
     # Get location
     location = db.query(Location).filter(Location.id == location_id).first()
     if not location:
@@ -191,10 +214,13 @@ async def predict_enhanced_resource_needs(
         location_id=location_id,
         use_real_time=use_real_time,
         date_str=date_str,
-        current_user=current_user,
-        db=db
+        current_user=current_user
     )
     
+    return await run_in_threadpool(compute_resource_needs, location_id, health_response, db)
+
+def compute_resource_needs(location_id: int, health_response: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """Resource predictions of predict_enhanced_resource_needs, compared with the latest hospital data"""
     # Get location
     location = db.query(Location).filter(Location.id == location_id).first()
     if not location:
@@ -280,8 +306,7 @@ async def predict_natural_disasters(
     location_id: int,
     use_real_time: bool = True,  # Always use real-time data
     days_ahead: int = 7,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user)
 ) -> Dict[str, Any]:
     """
     Predict natural disaster risks for a location.
@@ -294,8 +319,19 @@ async def predict_natural_disasters(
     Returns:
         Dictionary with natural disaster predictions
     """
+    return await PREDICTION_FLIGHTS.do(
+        ("natural-disasters", location_id, days_ahead),
+        compute_natural_disasters, location_id, days_ahead
+    )
+
+def compute_natural_disasters(location_id: int, days_ahead: int) -> Dict[str, Any]:
+    """Natural disaster predictions of predict_natural_disasters"""
     # Get location
-    location = db.query(Location).filter(Location.id == location_id).first()
+    db = SessionLocal()
+    try:
+        location = db.query(Location).filter(Location.id == location_id).first()
+    finally:
+        db.close()
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
@@ -404,10 +440,13 @@ async def predict_peak_times(
     health_response = await predict_enhanced_health_risks(
         location_id=location_id,
         use_real_time=True,
-        current_user=current_user,
-        db=db
+        current_user=current_user
     )
     
+    return await run_in_threadpool(compute_peak_times, location_id, health_response, db)
+
+def compute_peak_times(location_id: int, health_response: Dict[str, Any], db: Session) -> Dict[str, Any]:
+    """Peak time predictions of predict_peak_times"""
     # Get location
     location = db.query(Location).filter(Location.id == location_id).first()
     if not location:
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime, date
@@ -10,8 +11,11 @@ from sqlalchemy import text
 from ..models.database import get_db
 from ..models.models import Location, ClimateData, HealthData, HospitalData
 from ..models.ml_models import RiskClassifier, DiseaseForecaster, ResourcePredictor
+from ..models.model_registry import get_registry, build_from_class
+from ..models.training_jobs import get_job_manager, JobsUnavailable
 from ..auth.auth import get_current_active_user, get_current_admin_user
 from ..models.models import User
+from .data import get_rows_by_location, climate_frame
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -23,51 +27,79 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Initialize models
+# Initialize models (each is loaded from the model registry on first use)
 risk_classifier = RiskClassifier()
 disease_forecaster = DiseaseForecaster()
 resource_predictor = ResourcePredictor()
 
 try:
-    # Try to load the old models first for backward compatibility
-    try:
-        risk_classifier.load_models()
-        disease_forecaster.load_models()
-        resource_predictor.load_model()
-        logger.info("Loaded old models successfully")
-    except Exception as e:
-        logger.warning(f"Could not load old models: {e}")
-    
-    # Try to load enhanced models
-    import os
-    import pickle
-    import joblib
-    
-    model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
-    
-    # Load enhanced risk model
-    enhanced_risk_model_path = os.path.join(model_dir, "enhanced_risk_model.pkl")
-    if os.path.exists(enhanced_risk_model_path):
-        with open(enhanced_risk_model_path, 'rb') as f:
-            enhanced_risk_model = pickle.load(f)
-            logger.info(f"Loaded enhanced risk model from {enhanced_risk_model_path}")
-    
-    # Load enhanced forecast model
-    enhanced_forecast_model_path = os.path.join(model_dir, "enhanced_forecast_model.pkl")
-    if os.path.exists(enhanced_forecast_model_path):
-        with open(enhanced_forecast_model_path, 'rb') as f:
-            enhanced_forecast_model = pickle.load(f)
-            logger.info(f"Loaded enhanced forecast model from {enhanced_forecast_model_path}")
-    
-    # Load enhanced scaler
-    enhanced_scaler_path = os.path.join(model_dir, "enhanced_scaler.joblib")
-    if os.path.exists(enhanced_scaler_path):
-        enhanced_scaler = joblib.load(enhanced_scaler_path)
-        logger.info(f"Loaded enhanced scaler from {enhanced_scaler_path}")
+    risk_classifier.load_models()
+    disease_forecaster.load_models()
+    resource_predictor.load_model()
 except Exception as e:
     logger.warning(f"Could not load models: {e}")
 
 
+def get_enhanced_model(name):
+    """Enhanced model from the active registry version, or None if not registered"""
+    return get_registry().load(name, build_from_class)
+
+
+@router.get("/risk")
+async def predict_risk_all_locations(
+    date_str: str = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Predict health risks for every location on one date in a single batch.
+    If date is not provided, uses the latest climate data.
+    """
+    # Determine date to use
+    if date_str:
+        try:
+            query_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    else:
+        # Use latest available data
+        latest_climate = db.query(ClimateData)\
+            .filter(ClimateData.is_projected == False)\
+            .order_by(ClimateData.date.desc())\
+            .first()
+        
+        if not latest_climate:
+            raise HTTPException(status_code=404, detail="No climate data available")
+        
+        query_date = latest_climate.date
+    
+    # Get climate data for all locations on the date
+    climate_rows = get_rows_by_location(db, ClimateData, query_date)
+    locations = [location for location in db.query(Location).all() if location.id in climate_rows]
+    
+    if not locations:
+        raise HTTPException(status_code=404, detail=f"No climate data available on {query_date}")
+    
+    # One model call per disease for the whole country
+    climate_df = climate_frame(locations, climate_rows, query_date)
+    risk_predictions = risk_classifier.predict_risk_batch(climate_df)
+    
+    return {
+        "date": query_date.isoformat(),
+        "locations": [
+            {
+                "location": {
+                    "id": location.id,
+                    "name": location.name,
+                    "type": location.type
+                },
+                "risk_prediction": risk_prediction
+            }
+            for location, risk_prediction in zip(locations, risk_predictions)
+        ]
+    }
+
+
 @router.get("/risk/{location_id}")
 async def predict_risk(
     location_id: int, 
@@ -129,7 +161,8 @@ async def predict_risk(
     # Make risk prediction using enhanced model if available
     try:
         # Try to use the enhanced model first
-        if 'enhanced_risk_model' in globals():
+        enhanced_risk_model = get_enhanced_model("enhanced_risk")
+        if enhanced_risk_model is not None:
             risk_prediction = enhanced_risk_model.predict_risk(climate_dict, location_id, location.type, query_date)
             logger.info("Used enhanced risk model for prediction")
         else:
@@ -173,6 +206,30 @@ async def predict_risk(
     return response
 
 
+def forecast_daily_cases(location, recent_climate_list, days):
+    """
+    Daily case forecasts for one location over the whole horizon, rolling the
+    climate window forward day by day rather than repeating one forecast
+    """
+    recent_df = pd.DataFrame(recent_climate_list).assign(location_id=location.id)
+    forecast = disease_forecaster.forecast_horizon_batch(recent_df, days).get(location.id)
+    if not forecast:
+        raise HTTPException(status_code=500, detail="Error generating forecast")
+    
+    # Calculate forecasted cases based on rates and population
+    population = location.population
+    return [
+        {
+            "date": day["date"].isoformat(),
+            "dengue_cases": int(day['dengue']['forecasted_rate'] * population / 100000),
+            "malaria_cases": int(day['malaria']['forecasted_rate'] * population / 100000),
+            "heatstroke_cases": int(day['heatstroke']['forecasted_rate'] * population / 100000),
+            "diarrhea_cases": int(day['diarrhea']['forecasted_rate'] * population / 100000)
+        }
+        for day in forecast
+    ]
+
+
 @router.get("/forecast/{location_id}")
 async def forecast_diseases(
     location_id: int,
@@ -215,121 +272,22 @@ async def forecast_diseases(
         for c in recent_climate
     ]
     
-    # Get latest climate data for current conditions
-    latest_climate = recent_climate[0]
-    climate_dict = {
-        "temperature": latest_climate.temperature,
-        "rainfall": latest_climate.rainfall,
-        "humidity": latest_climate.humidity,
-        "flood_probability": latest_climate.flood_probability,
-        "cyclone_probability": latest_climate.cyclone_probability,
-        "heatwave_probability": latest_climate.heatwave_probability
-    }
+    # Get latest health data for baseline
+    latest_health = db.query(HealthData)\
+        .filter(
+            HealthData.location_id == location_id,
+            HealthData.is_projected == False
+        )\
+        .order_by(HealthData.date.desc())\
+        .first()
     
-    # Make forecast using enhanced model if available
-    try:
-        # Try to use the enhanced model first
-        if 'enhanced_forecast_model' in globals():
-            latest_date = max([c.date for c in recent_climate])
-            forecast_result = enhanced_forecast_model.forecast(
-                climate_dict, 
-                location_id, 
-                location.type, 
-                latest_date, 
-                days=days
-            )
-            logger.info("Used enhanced forecast model for prediction")
-            daily_forecasts = forecast_result.get("forecasts", [])
-            baseline = forecast_result.get("baseline", {})
-        else:
-            # Fall back to old model
-            forecast = disease_forecaster.forecast_cases(location_id, recent_climate_list)
-            if not forecast:
-                raise HTTPException(status_code=500, detail="Error generating forecast")
-                
-            # Generate daily forecasts for specified number of days
-            daily_forecasts = []
-            latest_date = max([c.date for c in recent_climate])
-            population = location.population
-            
-            for day in range(1, days + 1):
-                forecast_date = latest_date + pd.Timedelta(days=day)
-                
-                # Calculate forecasted cases based on rates and population
-                forecasted_cases = {
-                    "date": forecast_date.isoformat(),
-                    "dengue_cases": int(forecast['dengue']['forecasted_rate'] * population / 100000),
-                    "malaria_cases": int(forecast['malaria']['forecasted_rate'] * population / 100000),
-                    "heatstroke_cases": int(forecast['heatstroke']['forecasted_rate'] * population / 100000),
-                    "diarrhea_cases": int(forecast['diarrhea']['forecasted_rate'] * population / 100000)
-                }
-                
-                daily_forecasts.append(forecasted_cases)
-                
-            # Get latest health data for baseline
-            latest_health = db.query(HealthData)\
-                .filter(
-                    HealthData.location_id == location_id,
-                    HealthData.is_projected == False
-                )\
-                .order_by(HealthData.date.desc())\
-                .first()
-            
-            if not latest_health:
-                raise HTTPException(status_code=404, detail="No health data available for this location")
-                
-            baseline = {
-                "dengue_cases": latest_health.dengue_cases,
-                "malaria_cases": latest_health.malaria_cases,
-                "heatstroke_cases": latest_health.heatstroke_cases,
-                "diarrhea_cases": latest_health.diarrhea_cases
-            }
-            logger.info("Used old forecast model for prediction")
-    except Exception as e:
-        logger.error(f"Error using enhanced model, falling back to old model: {e}")
-        # Fall back to old model
-        forecast = disease_forecaster.forecast_cases(location_id, recent_climate_list)
-        if not forecast:
-            raise HTTPException(status_code=500, detail="Error generating forecast")
-            
-        # Get latest health data for baseline
-        latest_health = db.query(HealthData)\
-            .filter(
-                HealthData.location_id == location_id,
-                HealthData.is_projected == False
-            )\
-            .order_by(HealthData.date.desc())\
-            .first()
-        
-        if not latest_health:
-            raise HTTPException(status_code=404, detail="No health data available for this location")
-        
-        # Generate daily forecasts for specified number of days
-        daily_forecasts = []
-        latest_date = max([c.date for c in recent_climate])
-        
-        population = location.population
-        
-        for day in range(1, days + 1):
-            forecast_date = latest_date + pd.Timedelta(days=day)
-            
-            # Calculate forecasted cases based on rates and population
-            forecasted_cases = {
-                "date": forecast_date.isoformat(),
-                "dengue_cases": int(forecast['dengue']['forecasted_rate'] * population / 100000),
-                "malaria_cases": int(forecast['malaria']['forecasted_rate'] * population / 100000),
-                "heatstroke_cases": int(forecast['heatstroke']['forecasted_rate'] * population / 100000),
-                "diarrhea_cases": int(forecast['diarrhea']['forecasted_rate'] * population / 100000)
-            }
-            
-            daily_forecasts.append(forecasted_cases)
-            
-        baseline = {
-            "dengue_cases": latest_health.dengue_cases,
-            "malaria_cases": latest_health.malaria_cases,
-            "heatstroke_cases": latest_health.heatstroke_cases,
-            "diarrhea_cases": latest_health.diarrhea_cases
-        }
+    if not latest_health:
+        raise HTTPException(status_code=404, detail="No health data available for this location")
+    
+    # The registered enhanced_forecast model repeats today's climate for every
+    # day and scores each day separately; the horizon forecast rolls the
+    # climate window forward and scores all days in one batch
+    daily_forecasts = forecast_daily_cases(location, recent_climate_list, days)
     
     # Format response
     response = {
@@ -399,7 +357,8 @@ async def predict_resources(
     # Make resource prediction using enhanced model if available
     try:
         # Try to use the enhanced model first
-        if 'enhanced_risk_model' in globals():
+        enhanced_risk_model = get_enhanced_model("enhanced_risk")
+        if enhanced_risk_model is not None:
             # First get health predictions from the enhanced model
             # We need to get climate data for the current date
             climate_data = db.query(ClimateData)\
@@ -658,59 +617,118 @@ async def get_climate_health_correlation(
     return response
 
 
-@router.post("/train-models")
+@router.post("/train-models", status_code=status.HTTP_202_ACCEPTED)
 async def train_models(
-    current_user: User = Depends(get_current_admin_user),  # Admin only
-    db: Session = Depends(get_db)
+    include_ml: bool = False,
+    note: Optional[str] = None,
+    current_user: User = Depends(get_current_admin_user)  # Admin only
 ):
     """
-    Train or retrain all ML models.
+    Start retraining the models as a background job.
+    The job runs in a separate process and publishes the models as a new
+    model registry version when it finishes. Poll the returned status URL
+    for progress.
     Admin only endpoint.
     """
     try:
-        # Use the enhanced models creator instead of the old models
-        import sys
-        import os
-        sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        from save_enhanced_models import save_enhanced_models
-        
-        success = save_enhanced_models()
-        
-        if success:
-            # Reload the models after training
-            risk_classifier.load_models()
-            disease_forecaster.load_models()
-            resource_predictor.load_model()
-            
-            # Delete old model files that are no longer needed
-            model_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "models")
-            old_models = [
-                "dengue_risk_model.pkl", "malaria_risk_model.pkl", 
-                "heatstroke_risk_model.pkl", "diarrhea_risk_model.pkl",
-                "overall_risk_model.pkl", "dengue_forecast_model.pkl",
-                "malaria_forecast_model.pkl", "heatstroke_forecast_model.pkl",
-                "diarrhea_forecast_model.pkl", "resource_predictor.pkl"
-            ]
-            
-            for model in old_models:
-                try:
-                    model_path = os.path.join(model_dir, model)
-                    if os.path.exists(model_path):
-                        os.remove(model_path)
-                        logger.info(f"Deleted old model: {model}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete old model {model}: {e}")
-            
-            return {"message": "Enhanced models created successfully and old models deleted"}
-        else:
-            logger.error("Enhanced model creation failed")
-            return {"message": "Enhanced model creation failed", "success": False}
-    except Exception as e:
-        logger.error(f"Error creating enhanced models: {e}")
-        # Return a 200 response with error details instead of 500
-        # This makes debugging easier and prevents frontend issues
-        return {
-            "message": f"Error creating enhanced models: {str(e)}",
-            "success": False,
-            "error": str(e)
-        }
+        job = get_job_manager().submit(include_ml=include_ml, note=note)
+    except JobsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {
+        "message": "Training job started",
+        "job_id": job["id"],
+        "status_url": f"{router.prefix}/train-models/{job['id']}",
+        "job": job
+    }
+
+
+@router.get("/train-models")
+async def list_training_jobs(
+    current_user: User = Depends(get_current_admin_user)  # Admin only
+):
+    """
+    List training jobs, newest first.
+    Admin only endpoint.
+    """
+    return {"jobs": get_job_manager().jobs()}
+
+
+@router.get("/train-models/{job_id}")
+async def get_training_job(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user)  # Admin only
+):
+    """
+    Status, progress and per-stage timings of a training job.
+    Admin only endpoint.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job
+
+
+@router.post("/train-models/{job_id}/cancel")
+async def cancel_training_job(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user)  # Admin only
+):
+    """
+    Cancel a queued or running training job.
+    Nothing is published for a cancelled job.
+    Admin only endpoint.
+    """
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return job
+
+
+@router.get("/model-versions")
+async def list_model_versions(
+    current_user: User = Depends(get_current_admin_user)  # Admin only
+):
+    """
+    List published model registry versions.
+    Admin only endpoint.
+    """
+    registry = get_registry()
+    return {
+        "active": registry.active_version,
+        "versions": registry.versions()
+    }
+
+
+@router.post("/model-versions/rollback")
+async def rollback_model_version(
+    current_user: User = Depends(get_current_admin_user)  # Admin only
+):
+    """
+    Re-activate the previously active model version.
+    Admin only endpoint.
+    """
+    try:
+        # Loads the version's models, so off the event loop
+        version = await run_in_threadpool(get_registry().rollback)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Rolled back to model version {version}", "version": version}
+
+
+@router.post("/model-versions/{version}/activate")
+async def activate_model_version(
+    version: str,
+    current_user: User = Depends(get_current_admin_user)  # Admin only
+):
+    """
+    Activate a published model version.
+    Admin only endpoint.
+    """
+    try:
+        # Loads the version's models, so off the event loop
+        await run_in_threadpool(get_registry().activate, version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    return {"message": f"Activated model version {version}", "version": version}
@@ -0,0 +1,409 @@
+"""
+Caching with a time to live and a size cap
+
+TTLCache keeps entries in this process. SQLiteCache and RedisCache share
+them between processes (API workers, Lambda containers, scripts) and keep
+them across restarts. All three have the same interface, and create_cache
+picks one from configuration.
+
+Values of the shared caches are stored as JSON, with datetimes preserved.
+A shared cache that cannot be reached behaves as empty rather than failing
+the caller, and counts the error in its statistics.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, Optional
+
+# Redis is optional; only RedisCache needs it
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except Exception:  # pragma: no cover - optional dependency
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ('memory', 'sqlite', 'redis')
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if hasattr(value, 'item'):  # NumPy scalars
+        return value.item()
+    raise TypeError(f"Cannot cache a value of type {type(value).__name__}")
+
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    return obj
+
+
+def dumps(value: Any) -> str:
+    return json.dumps(value, default=_encode)
+
+
+def loads(data) -> Any:
+    return json.loads(data, object_hook=_decode)
+
+
+class CacheBackend:
+    """Hit, miss, eviction, expiration and error counts shared by the caches"""
+
+    backend = None
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._stats_lock = threading.Lock()
+        self._counts = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'errors': 0}
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._counts[name] += n
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __contains__(self, key: Hashable) -> bool:
+        marker = object()
+        return self.get(key, marker) is not marker
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _size(self) -> Optional[int]:
+        """Number of entries reported by stats, or None where counting them is too costly"""
+        return len(self)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit, miss, eviction, expiration and error counts of this process"""
+        with self._stats_lock:
+            counts = dict(self._counts)
+        lookups = counts['hits'] + counts['misses']
+        return {
+            'backend': self.backend,
+            'size': self._size(),
+            'maxsize': getattr(self, 'maxsize', None),
+            'ttl': self.ttl,
+            'hits': counts['hits'],
+            'misses': counts['misses'],
+            'hit_rate': round(counts['hits'] / lookups, 4) if lookups else None,
+            'evictions': counts['evictions'],
+            'expirations': counts['expirations'],
+            'errors': counts['errors']
+        }
+
+
+class TTLCache(CacheBackend):
+    """
+    Thread-safe in-process cache whose entries expire ttl seconds after they were set
+
+    Holds at most maxsize entries. When full, expired entries are dropped
+    first, then the least recently used one. Ages are measured on a
+    monotonic clock, so changes to the system time cannot expire entries
+    early or keep them alive.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, maxsize: int = 128, ttl: float = 600, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expiry time, value), least recently used first
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value, or default if the key is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self._count('expirations')
+                entry = None
+            if entry is None:
+                self._count('misses')
+                return default
+            self._entries.move_to_end(key)
+            self._count('hits')
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            now = self._clock()
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.maxsize:
+                self._drop_expired(now)
+            while len(self._entries) >= self.maxsize:
+                self._entries.popitem(last=False)
+                self._count('evictions')
+            self._entries[key] = (now + self.ttl, value)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _drop_expired(self, now):
+        expired = [key for key, (expiry, _) in self._entries.items() if expiry <= now]
+        for key in expired:
+            del self._entries[key]
+        self._count('expirations', len(expired))
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > self._clock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache in a SQLite file shared by every process on the host
+
+    Expiry times are wall-clock timestamps, the only clock processes share.
+    Holds at most maxsize entries; when full, expired entries are dropped
+    first, then those set longest ago. Reads do not write, so unlike
+    TTLCache this is not least-recently-used. Each thread has its own
+    connection, and the database runs in WAL mode so readers do not wait
+    for writers.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str, maxsize: int = 128, ttl: float = 600, clock=time.time):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        super().__init__(ttl)
+        self.path = path
+        self.maxsize = maxsize
+        self._clock = clock
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            connection = self._connection()
+            row = connection.execute("SELECT value, expires_at FROM cache WHERE key = ?", (str(key),)).fetchone()
+            if row is not None and row[1] <= self._clock():
+                connection.execute("DELETE FROM cache WHERE key = ? AND expires_at = ?", (str(key), row[1]))
+                self._count('expirations')
+                row = None
+        except sqlite3.Error as e:
+            logger.warning(f"Cache read from {self.path} failed: {e}")
+            self._count('errors')
+            row = None
+        if row is None:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return loads(row[0])
+
+    def set(self, key: Hashable, value: Any) -> None:
+        data = dumps(value)
+        try:
+            connection = self._connection()
+            now = self._clock()
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (str(key), data, now + self.ttl)
+                )
+                excess = connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.maxsize
+                if excess > 0:
+                    expired = connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+                    self._count('expirations', expired)
+                    excess -= expired
+                if excess > 0:
+                    connection.execute(
+                        "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)",
+                        (excess,)
+                    )
+                    self._count('evictions', excess)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write to {self.path} failed: {e}")
+            self._count('errors')
+
+    def delete(self, key: Hashable) -> None:
+        try:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (str(key),))
+        except sqlite3.Error as e:
+            logger.warning(f"Cache delete from {self.path} failed: {e}")
+            self._count('errors')
+
+    def clear(self) -> None:
+        try:
+            self._connection().execute("DELETE FROM cache")
+        except sqlite3.Error as e:
+            logger.warning(f"Cache clear of {self.path} failed: {e}")
+            self._count('errors')
+
+    def __len__(self) -> int:
+        try:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM cache WHERE expires_at > ?", (self._clock(),)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache in Redis, shared by every process that can reach the server
+
+    Redis expires the keys itself; size is bounded by the server's
+    maxmemory policy rather than by this class. Keys are namespaced with a
+    prefix so one server can hold several caches. The socket timeouts are
+    short, and after a failed call the server is left alone for
+    retry_after seconds, so an unreachable server costs one timeout rather
+    than one per lookup.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, url: str = "redis://localhost:6379/0", ttl: float = 600, prefix: str = "cache:",
+                 client=None, socket_timeout: float = 0.5, retry_after: float = 30, clock=time.monotonic):
+        super().__init__(ttl)
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis package not installed; RedisCache unavailable")
+            client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self.client = client
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self._clock = clock
+        self._unavailable_until = 0.0
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def _available(self):
+        return self._clock() >= self._unavailable_until
+
+    def _failed(self, action, error):
+        logger.warning(f"Cache {action} Redis failed: {error}; bypassing the cache for {self.retry_after}s")
+        self._unavailable_until = self._clock() + self.retry_after
+        self._count('errors')
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        data = None
+        if self._available():
+            try:
+                data = self.client.get(self._key(key))
+            except Exception as e:
+                self._failed("read from", e)
+        if data is None:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return loads(data)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        data = dumps(value)
+        if not self._available():
+            return
+        try:
+            self.client.set(self._key(key), data, px=max(1, int(self.ttl * 1000)))
+        except Exception as e:
+            self._failed("write to", e)
+
+    def delete(self, key: Hashable) -> None:
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            self._failed("delete from", e)
+
+    def _keys(self):
+        return list(self.client.scan_iter(match=f"{self.prefix}*", count=500))
+
+    def clear(self) -> None:
+        try:
+            keys = self._keys()
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            self._failed("clear in", e)
+
+    def __len__(self) -> int:
+        if not self._available():
+            return 0
+        try:
+            return len(self._keys())
+        except Exception:
+            return 0
+
+    def _size(self):
+        # Counting the keys under the prefix takes a SCAN of the whole
+        # keyspace, and DBSIZE would count other caches sharing the server
+        return None
+
+
+def create_cache(backend: str = 'memory', url: Optional[str] = None, maxsize: int = 128,
+                 ttl: float = 600, prefix: str = "cache:") -> CacheBackend:
+    """
+    Cache for a configured backend
+
+    Falls back to an in-process TTLCache, with a warning, when the redis
+    package is not installed.
+
+    Args:
+        backend: 'memory', 'sqlite' or 'redis'
+        url: Database file for 'sqlite', server URL for 'redis'
+        maxsize: Largest number of entries (not used by 'redis')
+        ttl: Seconds an entry stays valid
+        prefix: Key prefix for 'redis'
+    """
+    if backend == 'memory':
+        return TTLCache(maxsize=maxsize, ttl=ttl)
+    if backend == 'sqlite':
+        return SQLiteCache(url, maxsize=maxsize, ttl=ttl)
+    if backend == 'redis':
+        if not REDIS_AVAILABLE:
+            logger.warning("redis package not installed; caching in this process only")
+            return TTLCache(maxsize=maxsize, ttl=ttl)
+        return RedisCache(url or "redis://localhost:6379/0", ttl=ttl, prefix=prefix)
+    raise ValueError(f"Unknown cache backend {backend}; expected one of {', '.join(CACHE_BACKENDS)}")
@@ -0,0 +1,184 @@
+"""
+Failing fast on an unhealthy dependency: a circuit breaker and a retry budget
+
+CircuitBreaker watches the outcomes of calls over a sliding window. Once
+enough of them fail it opens and rejects calls outright for a while, so
+callers fall back at once instead of waiting on timeouts, then lets a few
+trial calls through (half-open) and closes again if they succeed.
+
+RetryBudget caps retries at a share of recent calls, so that retries cannot
+multiply the load on a dependency that is already struggling.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker
+
+    Opens when, within the last window seconds, at least min_calls calls
+    were made and at least failure_threshold of them failed. Stays open for
+    reset_timeout seconds, then allows half_open_calls trial calls at a
+    time: a success closes the circuit and a failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: float = 0.5, min_calls: int = 10, window: float = 30,
+                 reset_timeout: float = 30, half_open_calls: int = 1, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = None
+        self._trials = 0
+        # (time, failed) of the calls in the window, oldest first
+        self._outcomes = deque()
+        self._counts = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trials = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; a caller that gets True must record its outcome"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self._counts['rejected'] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._counts['successes'] += 1
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._close()
+            elif state == CLOSED:
+                self._add_outcome(False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._counts['failures'] += 1
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._open()
+            elif state == CLOSED:
+                self._add_outcome(True)
+                calls = len(self._outcomes)
+                failures = sum(failed for _, failed in self._outcomes)
+                if calls >= self.min_calls and failures / calls >= self.failure_threshold:
+                    self._open()
+
+    def _add_outcome(self, failed: bool) -> None:
+        now = self._clock()
+        self._outcomes.append((now, failed))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _open(self) -> None:
+        logger.warning(f"Circuit {self.name} opened; rejecting calls for {self.reset_timeout:g}s")
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._counts['opened'] += 1
+        self._outcomes.clear()
+
+    def _close(self) -> None:
+        logger.info(f"Circuit {self.name} closed")
+        self._state = CLOSED
+        self._outcomes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """State, seconds until a trial call is allowed, failure rate in the window and call counts"""
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._outcomes)
+            failures = sum(failed for _, failed in self._outcomes)
+            retry_in = None
+            if state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (self._clock() - self._opened_at)), 1)
+            return {
+                'name': self.name,
+                'state': state,
+                'retry_in': retry_in,
+                'window_calls': calls,
+                'window_failure_rate': round(failures / calls, 4) if calls else None,
+                **self._counts
+            }
+
+
+class RetryBudget:
+    """
+    Allows retries up to ratio times the calls of the last window seconds
+
+    min_retries retries are always allowed per window, so that a quiet
+    client can still retry an occasional failure.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window: float = 10, clock=time.monotonic):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self._retries = deque()
+        self._counts = {'retries': 0, 'exhausted': 0}
+
+    def _trim(self, now: float) -> None:
+        for times in (self._calls, self._retries):
+            while times and now - times[0] > self.window:
+                times.popleft()
+
+    def record_call(self) -> None:
+        """Count a first attempt, which earns the budget ratio retries"""
+        with self._lock:
+            now = self._clock()
+            self._calls.append(now)
+            self._trim(now)
+
+    def try_retry(self) -> bool:
+        """Whether a retry may be made now, taking it from the budget if so"""
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            if len(self._retries) >= max(self.min_retries, self.ratio * len(self._calls)):
+                self._counts['exhausted'] += 1
+                return False
+            self._retries.append(now)
+            self._counts['retries'] += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls and retries in the window, and retries made and refused"""
+        with self._lock:
+            self._trim(self._clock())
+            return {'window_calls': len(self._calls), 'window_retries': len(self._retries), **self._counts}
@@ -59,6 +59,13 @@ RESOURCE_RATIOS_PER_100_CASES = {
     'antipyretics': 300 # units
 }
 
+# Offsets and scales that normalize raw climate values in calculate_disease_risk
+CLIMATE_NORMALIZATION = {
+    'temperature': (25, 5),  # Deviation from 25C, scaled
+    'rainfall': (50, 20),    # Deviation from 50mm, scaled
+    'humidity': (70, 10),    # Deviation from 70%, scaled
+}
+
 def calculate_disease_risk(climate_data, location_type, month, disease):
     """
     Calculates a realistic disease risk rate (per 100k population) based on climate data,
@@ -83,14 +90,9 @@ def calculate_disease_risk(climate_data, location_type, month, disease):
     for factor, coeff in sensitivity.items():
         if factor in climate_data:
             # Normalize climate data to a reasonable range (e.g., temperature around 25, rainfall around 50)
-            normalized_value = climate_data[factor]
-            if factor == 'temperature':
-                normalized_value = (climate_data[factor] - 25) / 5 # Deviation from 25C, scaled
-            elif factor == 'rainfall':
-                normalized_value = (climate_data[factor] - 50) / 20 # Deviation from 50mm, scaled
-            elif factor == 'humidity':
-                normalized_value = (climate_data[factor] - 70) / 10 # Deviation from 70%, scaled
             # Probabilities are already 0-1, use directly
+            offset, scale = CLIMATE_NORMALIZATION.get(factor, (0, 1))
+            normalized_value = (climate_data[factor] - offset) / scale
 
             risk_rate += risk_rate * coeff * normalized_value
 
@@ -103,6 +105,54 @@ def calculate_disease_risk(climate_data, location_type, month, disease):
     # Ensure non-negative
     return max(0.1, risk_rate)
 
+RISK_LEVELS = np.array(['low', 'medium', 'high', 'critical'])
+
+def calculate_disease_risk_batch(climate_df, months, disease):
+    """
+    Vectorized calculate_disease_risk for many rows at once.
+    
+    Args:
+        climate_df: DataFrame with one column per climate factor
+        months: Array of months (1-12), one per row
+        disease: Disease name
+        
+    Returns:
+        Array of risk rates (per 100k population)
+    """
+    if disease in HEALTH_CONDITIONS:
+        base_rate = HEALTH_CONDITIONS[disease].get('base_rate_per_100k', 5.0)
+    else:
+        base_rate = BASE_RATES.get(disease, 5.0)
+    
+    risk_rate = np.full(len(climate_df), float(base_rate))
+    
+    # Each factor scales the running rate by (1 + coeff * normalized value)
+    for factor, coeff in CLIMATE_SENSITIVITIES.get(disease, {}).items():
+        if factor in climate_df:
+            offset, scale = CLIMATE_NORMALIZATION.get(factor, (0, 1))
+            normalized_value = (climate_df[factor].to_numpy(dtype=float) - offset) / scale
+            risk_rate *= 1 + coeff * normalized_value
+    
+    # Seasonal adjustment looked up by month
+    seasonal = SEASONAL_ADJUSTMENTS.get(disease, {})
+    seasonal_by_month = np.array([1.0] + [seasonal.get(month, 1.0) for month in range(1, 13)])
+    risk_rate *= seasonal_by_month[np.asarray(months, dtype=int)]
+    
+    # Add some random noise for realism
+    risk_rate *= 1 + np.random.uniform(-0.1, 0.1, size=len(risk_rate))
+    
+    return np.maximum(0.1, risk_rate)
+
+def calculate_risk_level_batch(rates, disease_type):
+    """Vectorized calculate_risk_level, returning an array of level names."""
+    if disease_type in HEALTH_CONDITIONS:
+        thresholds = HEALTH_CONDITIONS[disease_type].get('risk_thresholds', RISK_THRESHOLDS.get(disease_type, RISK_THRESHOLDS['overall']))
+    else:
+        thresholds = RISK_THRESHOLDS.get(disease_type, RISK_THRESHOLDS['overall'])
+    
+    bins = [thresholds['medium'], thresholds['high'], thresholds['critical']]
+    return RISK_LEVELS[np.searchsorted(bins, rates, side='right')]
+
 def calculate_risk_level(rate, disease_type):
     """Determines risk level based on calculated rate and predefined thresholds."""
     # Get thresholds from HEALTH_CONDITIONS if available, otherwise use RISK_THRESHOLDS
@@ -151,6 +201,39 @@ def get_realistic_risk_prediction(climate_data, location_id, location_type, date
     }
     return predictions
 
+def get_realistic_risk_prediction_batch(climate_df, months):
+    """
+    Vectorized get_realistic_risk_prediction for many rows at once.
+    
+    Args:
+        climate_df: DataFrame with one column per climate factor
+        months: Array of months (1-12), one per row
+        
+    Returns:
+        Dictionary mapping each disease and 'overall' to a dictionary of
+        'risk_level', 'probability' and 'rate' arrays
+    """
+    predictions = {}
+    overall_rates = []
+    
+    for disease in ['dengue', 'malaria', 'heatstroke', 'diarrhea']:
+        rate = calculate_disease_risk_batch(climate_df, months, disease)
+        predictions[disease] = {
+            'risk_level': calculate_risk_level_batch(rate, disease),
+            'probability': np.clip(rate / RISK_THRESHOLDS[disease]['critical'], 0.1, 1.0),
+            'rate': rate
+        }
+        overall_rates.append(rate)
+    
+    # Calculate overall risk
+    overall_burden = np.mean(overall_rates, axis=0)
+    predictions['overall'] = {
+        'risk_level': calculate_risk_level_batch(overall_burden, 'overall'),
+        'probability': np.clip(overall_burden / RISK_THRESHOLDS['overall']['critical'], 0.1, 1.0),
+        'rate': overall_burden
+    }
+    return predictions
+
 def calculate_resource_needs(disease_cases, population):
     """
     Calculates hospital resource needs based on disease cases and population.
@@ -172,6 +255,23 @@ def calculate_resource_needs(disease_cases, population):
 
     return resources
 
+def calculate_resource_needs_batch(total_cases):
+    """
+    Vectorized calculate_resource_needs given the total cases of each row.
+    
+    Returns:
+        Dictionary mapping each resource to an integer array of needs
+    """
+    scaled_cases_for_ratios = np.asarray(total_cases, dtype=float) / 100.0
+    
+    resources = {}
+    for resource, ratio in RESOURCE_RATIOS_PER_100_CASES.items():
+        need = scaled_cases_for_ratios * ratio
+        need *= 1 + np.random.uniform(-0.1, 0.1, size=len(need))  # +/- 10%
+        resources[resource] = np.maximum(0, need).astype(int)
+    
+    return resources
+
 def get_all_health_condition_risks(climate_data, location_id, location_type, date):
     """
     Get risk predictions for all health conditions defined in HEALTH_CONDITIONS
@@ -5,6 +5,9 @@ from datetime import datetime, timedelta
 import json
 import os
 import random
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple
 
 # Initialize faker
@@ -120,6 +123,26 @@ LOCATION_REGIONS = {
 # Default region for any missed locations
 DEFAULT_REGION = "Central"
 
+# Number of locations written to each shard in sharded mode
+LOCATIONS_PER_SHARD = 8
+
+# Named dataset sizes for load testing. "small" matches the original dataset:
+# 36 states/UTs, 30 days of history and five yearly projections.
+DATASET_PROFILES = {
+    "small": {"sub_locations_per_state": 0, "history_days": 30, "projection_horizon": 5},
+    "medium": {"sub_locations_per_state": 20, "history_days": 365, "projection_horizon": 5},      # ~720 districts
+    "large": {"sub_locations_per_state": 20, "history_days": 3 * 365, "projection_horizon": 10},  # districts, 3 years
+    "xl": {"sub_locations_per_state": 1000, "history_days": 365, "projection_horizon": 10}       # ~36k hospitals
+}
+DEFAULT_PROFILE = "small"
+
+# Seed for splitting states into synthetic sub-locations (kept separate from the
+# data seed so location IDs and populations never change between runs)
+SUB_LOCATION_SEED = 2025
+
+# Sub-locations are named "<state/UT> District <n>"
+SUB_LOCATION_NAME = re.compile(r"^(?P<state>.+) District \d+$")
+
 # Disease thresholds for correlation with climate
 DISEASE_THRESHOLDS = {
     "dengue": {
@@ -353,76 +376,558 @@ def generate_hospital_data(health_data, location, date):
         "projection_year": projection_year if is_projected else None
     }
 
-def generate_all_data(save_path=None):
-    """Generate data for all locations and save to CSV/JSON files"""
+# Lookup tables used by the vectorized generators below. Seasons and regions are
+# mapped to integer codes so per-row lookups become plain array indexing.
+SEASONS = ["summer", "monsoon", "winter", "post_monsoon"]
+REGIONS = list(SEASONAL_PATTERNS.keys())
+
+# Season code for each calendar month (index 0 is unused)
+MONTH_TO_SEASON = np.array([
+    -1,
+    SEASONS.index("winter"), SEASONS.index("winter"),
+    SEASONS.index("summer"), SEASONS.index("summer"), SEASONS.index("summer"),
+    SEASONS.index("monsoon"), SEASONS.index("monsoon"), SEASONS.index("monsoon"), SEASONS.index("monsoon"),
+    SEASONS.index("post_monsoon"), SEASONS.index("post_monsoon"),
+    SEASONS.index("winter")
+])
+
+def _pattern_ranges(key):
+    """Build a (region, season, 2) array of (min, max) values for a pattern key"""
+    return np.array([
+        [SEASONAL_PATTERNS[region][season][key] for season in SEASONS]
+        for region in REGIONS
+    ], dtype=float)
+
+TEMP_RANGES = _pattern_ranges("temp_range")
+RAINFALL_RANGES = _pattern_ranges("rainfall_range")
+HUMIDITY_RANGES = _pattern_ranges("humidity_range")
+
+# Coastal regions have higher cyclone probabilities
+COASTAL_STATES = ["Andhra Pradesh", "Odisha", "West Bengal", "Tamil Nadu", "Kerala",
+                  "Gujarat", "Maharashtra", "Goa", "Andaman and Nicobar Islands", "Puducherry"]
+
+def _location_arrays(locations):
+    """Extract per-location ids, region codes, coastal flags and populations as arrays"""
+    ids = np.array([location["id"] for location in locations], dtype=np.int64)
+    # Synthetic sub-locations take the region and coastline of their parent state
+    states = [location.get("state", location["name"]) for location in locations]
+    regions = np.array([REGIONS.index(get_region_for_location(state)) for state in states])
+    coastal = np.array([state in COASTAL_STATES for state in states])
+    populations = np.array([location["population"] for location in locations], dtype=float)
+    return ids, regions, coastal, populations
+
+def _truncate(values):
+    """Vectorized equivalent of int() for non-negative float arrays"""
+    return np.trunc(values).astype(np.int64)
+
+def generate_climate_frame(locations, dates, projection_years=None, rng=None):
+    """
+    Vectorized equivalent of generate_climate_data for every (location, date) pair
+    
+    Args:
+        locations: List of location dicts (with "id" assigned)
+        dates: Sequence of datetime objects
+        projection_years: Optional sequence aligned with dates; when given, rows are
+            marked as projected and climate change effects are applied per year
+        rng: numpy Generator used for sampling (a fresh one is created if omitted)
+        
+    Returns:
+        DataFrame with one row per (location, date), location-major
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    ids, regions, coastal, _ = _location_arrays(locations)
+    n_locations, n_dates = len(locations), len(dates)
+    shape = (n_locations, n_dates)
+    
+    months = np.array([date.month for date in dates])
+    seasons = MONTH_TO_SEASON[months]
+    
+    # (location, date) grids of region/season codes
+    region_grid = np.broadcast_to(regions[:, None], shape)
+    season_grid = np.broadcast_to(seasons[None, :], shape)
+    
+    temp_range = TEMP_RANGES[region_grid, season_grid]
+    rainfall_range = RAINFALL_RANGES[region_grid, season_grid]
+    humidity_range = HUMIDITY_RANGES[region_grid, season_grid]
+    
+    is_projected = projection_years is not None
+    if is_projected:
+        years_in_future = np.broadcast_to(np.asarray(projection_years, dtype=float)[None, :] - 2025, shape)
+        temp_range = temp_range + (years_in_future * 0.5)[..., None]  # 0.5°C increase per year
+        rainfall_range = rainfall_range * (1 + years_in_future * 0.03)[..., None]  # 3% increase per year
+    
+    # Generate values, one draw per column
+    temperature = np.round(rng.uniform(temp_range[..., 0], temp_range[..., 1]), 1)
+    rainfall = np.round(rng.uniform(rainfall_range[..., 0], rainfall_range[..., 1]), 1)
+    humidity = np.round(rng.uniform(humidity_range[..., 0], humidity_range[..., 1]), 1)
+    
+    # Generate disaster probabilities
+    flood_probability = np.clip((rainfall / 500) * 0.8 + rng.uniform(-0.1, 0.1, shape), 0.0, 1.0)
+    
+    base_cyclone_prob = np.where(coastal, 0.4, 0.05)[:, None]
+    monsoon_like = np.isin(season_grid, [SEASONS.index("monsoon"), SEASONS.index("post_monsoon")])
+    season_factor = np.where(monsoon_like, 1.5, 0.5)
+    cyclone_probability = np.clip(base_cyclone_prob * season_factor + rng.uniform(-0.1, 0.1, shape), 0.0, 1.0)
+    
+    season_factor = np.where(season_grid == SEASONS.index("summer"), 2.0, 0.2)
+    temp_factor = np.maximum(0, (temperature - 35) / 10)
+    heatwave_probability = np.clip(season_factor * temp_factor + rng.uniform(-0.1, 0.1, shape), 0.0, 1.0)
+    
+    if is_projected:
+        flood_probability = np.minimum(1.0, flood_probability + years_in_future * 0.05)
+        cyclone_probability = np.minimum(1.0, cyclone_probability + years_in_future * 0.03)
+        heatwave_probability = np.minimum(1.0, heatwave_probability + years_in_future * 0.08)
+    
+    date_strings = np.array([date.strftime("%Y-%m-%d") for date in dates], dtype=object)
+    if is_projected:
+        projection_year = np.broadcast_to(np.asarray(projection_years, dtype=float)[None, :], shape)
+    else:
+        projection_year = np.full(shape, np.nan)
+    
+    return pd.DataFrame({
+        "location_id": np.repeat(ids, n_dates),
+        "date": np.tile(date_strings, n_locations),
+        "temperature": temperature.ravel(),
+        "rainfall": rainfall.ravel(),
+        "humidity": humidity.ravel(),
+        "flood_probability": np.round(flood_probability, 3).ravel(),
+        "cyclone_probability": np.round(cyclone_probability, 3).ravel(),
+        "heatwave_probability": np.round(heatwave_probability, 3).ravel(),
+        "is_projected": is_projected,
+        "projection_year": projection_year.ravel()
+    })
+
+def _population_lookup(locations, location_ids):
+    """Map a location_id column onto population values"""
+    ids, _, _, populations = _location_arrays(locations)
+    order = np.argsort(ids)
+    return populations[order][np.searchsorted(ids[order], location_ids)]
+
+def generate_health_frame(climate_df, locations, rng=None):
+    """
+    Vectorized equivalent of generate_health_data for a climate frame
+    
+    Args:
+        climate_df: DataFrame produced by generate_climate_frame
+        locations: List of location dicts used to generate climate_df
+        rng: numpy Generator used for sampling
+        
+    Returns:
+        DataFrame with one health row per climate row
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    temperature = climate_df["temperature"].to_numpy()
+    rainfall = climate_df["rainfall"].to_numpy()
+    humidity = climate_df["humidity"].to_numpy()
+    flood_prob = climate_df["flood_probability"].to_numpy()
+    projection_year = climate_df["projection_year"].to_numpy(dtype=float)
+    is_projected = climate_df["is_projected"].to_numpy(dtype=bool) & ~np.isnan(projection_year)
+    years_in_future = np.where(is_projected, projection_year - 2025, 0.0)
+    
+    # Population-based scaling factor (per 100,000 people), with growth for projections
+    population_factor = 1 + years_in_future * 0.01
+    pop_scale = _population_lookup(locations, climate_df["location_id"].to_numpy()) / 100000 * population_factor
+    
+    dengue_thresh = DISEASE_THRESHOLDS["dengue"]
+    dengue_risk = (
+        np.maximum(0, (temperature - dengue_thresh["temp"]) / 15)
+        * np.minimum(1.0, rainfall / dengue_thresh["rainfall"])
+        * np.minimum(1.0, humidity / dengue_thresh["humidity"])
+    )
+    
+    malaria_thresh = DISEASE_THRESHOLDS["malaria"]
+    malaria_risk = (
+        np.maximum(0, (temperature - malaria_thresh["temp"]) / 20)
+        * np.minimum(1.0, rainfall / malaria_thresh["rainfall"])
+        * np.minimum(1.0, humidity / malaria_thresh["humidity"])
+    )
+    
+    heatstroke_thresh = DISEASE_THRESHOLDS["heatstroke"]
+    heatstroke_risk = (
+        np.maximum(0, (temperature - heatstroke_thresh["temp"]) / 10)
+        * (0.5 + 0.5 * np.minimum(1.0, humidity / heatstroke_thresh["humidity"]))
+    )
+    
+    diarrhea_thresh = DISEASE_THRESHOLDS["diarrhea"]
+    diarrhea_risk = np.maximum.reduce([
+        np.maximum(0, (temperature - diarrhea_thresh["temp"]) / 15),
+        np.minimum(1.0, rainfall / diarrhea_thresh["rainfall"]),
+        np.minimum(1.0, flood_prob / diarrhea_thresh["flood_probability"])
+    ])
+    
+    # One Poisson draw for all four diseases
+    lam = np.stack([
+        dengue_risk * 50,
+        malaria_risk * 30,
+        heatstroke_risk * 40,
+        diarrhea_risk * 60
+    ]) * pop_scale
+    cases = rng.poisson(lam).astype(np.int64)
+    
+    # Increase cases for projected future data to account for climate change impact
+    increase_factor = 1 + years_in_future * 0.12
+    multipliers = np.stack([increase_factor, increase_factor, increase_factor * 1.2, increase_factor])
+    cases = np.where(is_projected, _truncate(cases * multipliers), cases)
+    
+    return pd.DataFrame({
+        "location_id": climate_df["location_id"].to_numpy(),
+        "date": climate_df["date"].to_numpy(),
+        "dengue_cases": cases[0],
+        "malaria_cases": cases[1],
+        "heatstroke_cases": cases[2],
+        "diarrhea_cases": cases[3],
+        "is_projected": climate_df["is_projected"].to_numpy(),
+        "projection_year": projection_year
+    })
+
+def generate_hospital_frame(health_df, locations, rng=None):
+    """
+    Vectorized equivalent of generate_hospital_data for a health frame
+    
+    Args:
+        health_df: DataFrame produced by generate_health_frame
+        locations: List of location dicts used to generate health_df
+        rng: numpy Generator used for sampling
+        
+    Returns:
+        DataFrame with one hospital row per health row
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    n_rows = len(health_df)
+    dengue = health_df["dengue_cases"].to_numpy()
+    malaria = health_df["malaria_cases"].to_numpy()
+    heatstroke = health_df["heatstroke_cases"].to_numpy()
+    diarrhea = health_df["diarrhea_cases"].to_numpy()
+    total_cases = dengue + malaria + heatstroke + diarrhea
+    projection_year = health_df["projection_year"].to_numpy(dtype=float)
+    is_projected = health_df["is_projected"].to_numpy(dtype=bool) & ~np.isnan(projection_year)
+    years_in_future = np.where(is_projected, projection_year - 2025, 0.0)
+    
+    # Population-based baseline resources (per 100,000 people), one draw for all three
+    population = _population_lookup(locations, health_df["location_id"].to_numpy())
+    per_100k = rng.uniform([150, 50, 150], [300, 100, 250], size=(n_rows, 3)).T
+    total_beds, total_doctors, total_nurses = _truncate(population * per_100k / 100000)
+    
+    base_supply = _truncate(population / 10000)
+    
+    # Projected resources grow, but available resources may still be strained
+    resource_increase = 1 + years_in_future * 0.03
+    case_increase = 1 + years_in_future * 0.12
+    total_beds = np.where(is_projected, _truncate(total_beds * resource_increase), total_beds)
+    total_doctors = np.where(is_projected, _truncate(total_doctors * resource_increase), total_doctors)
+    total_nurses = np.where(is_projected, _truncate(total_nurses * resource_increase), total_nurses)
+    available_beds = np.maximum(0, total_beds - _truncate(total_cases * 0.4 * case_increase))
+    
+    iv_fluids_stock = np.where(
+        is_projected,
+        np.maximum(0, base_supply * resource_increase - _truncate((diarrhea + heatstroke) * 0.6)),
+        np.maximum(0, base_supply - _truncate(diarrhea * 0.5 + heatstroke * 0.7))
+    )
+    antibiotics_stock = np.where(
+        is_projected,
+        np.maximum(0, base_supply * resource_increase - _truncate((malaria + diarrhea) * 0.5)),
+        np.maximum(0, base_supply - _truncate(malaria * 0.6 + diarrhea * 0.4))
+    )
+    antipyretics_stock = np.where(
+        is_projected,
+        np.maximum(0, base_supply * resource_increase - _truncate((dengue + malaria) * 0.4)),
+        np.maximum(0, base_supply - _truncate(dengue * 0.5 + malaria * 0.3))
+    )
+    
+    # Actual rows keep integer stock counts like the row-wise generator
+    if not is_projected.any():
+        iv_fluids_stock = iv_fluids_stock.astype(np.int64)
+        antibiotics_stock = antibiotics_stock.astype(np.int64)
+        antipyretics_stock = antipyretics_stock.astype(np.int64)
+    
+    return pd.DataFrame({
+        "location_id": health_df["location_id"].to_numpy(),
+        "date": health_df["date"].to_numpy(),
+        "total_beds": total_beds,
+        "available_beds": available_beds,
+        "doctors": total_doctors,
+        "nurses": total_nurses,
+        "iv_fluids_stock": iv_fluids_stock,
+        "antibiotics_stock": antibiotics_stock,
+        "antipyretics_stock": antipyretics_stock,
+        "is_projected": health_df["is_projected"].to_numpy(),
+        "projection_year": projection_year
+    })
+
+def location_rng(seed, location_id):
+    """Create the random Generator for one location, derived from (global seed, location id)"""
+    return np.random.default_rng([seed, location_id])
+
+def generate_location_frames(locations, history_dates, projection_years, seed):
+    """
+    Generate climate, health and hospital frames for a group of locations, seeding
+    each location independently so the output does not depend on how locations
+    are grouped
+    
+    Returns:
+        Tuple of (climate_df, health_df, hospital_df)
+    """
+    projection_dates = [CURRENT_DATE.replace(year=year) for year in projection_years]
+    climate_frames, health_frames, hospital_frames = [], [], []
+    
+    for location in locations:
+        rng = location_rng(seed, location["id"])
+        climate = [
+            generate_climate_frame([location], history_dates, rng=rng),
+            generate_climate_frame([location], projection_dates, projection_years=projection_years, rng=rng)
+        ]
+        health = [generate_health_frame(frame, [location], rng=rng) for frame in climate]
+        hospital = [generate_hospital_frame(frame, [location], rng=rng) for frame in health]
+        climate_frames += climate
+        health_frames += health
+        hospital_frames += hospital
+    
+    return (
+        pd.concat(climate_frames, ignore_index=True),
+        pd.concat(health_frames, ignore_index=True),
+        pd.concat(hospital_frames, ignore_index=True)
+    )
+
+def generate_frames(locations, history_dates, projection_years, seed=None, rng=None):
+    """
+    Generate climate, health and hospital frames for a list of locations
+    
+    With a seed, every location gets its own Generator (see location_rng) so the
+    rows are reproducible; otherwise all locations are drawn together from rng.
+    
+    Returns:
+        Tuple of (climate_df, health_df, hospital_df)
+    """
+    if seed is not None:
+        return generate_location_frames(locations, history_dates, projection_years, seed)
+    
+    rng = rng if rng is not None else np.random.default_rng()
+    projection_dates = [CURRENT_DATE.replace(year=year) for year in projection_years]
+    climate_frames = [
+        generate_climate_frame(locations, history_dates, rng=rng),
+        generate_climate_frame(locations, projection_dates, projection_years=projection_years, rng=rng)
+    ]
+    health_frames = [generate_health_frame(frame, locations, rng=rng) for frame in climate_frames]
+    hospital_frames = [generate_hospital_frame(frame, locations, rng=rng) for frame in health_frames]
+    
+    return (
+        pd.concat(climate_frames, ignore_index=True),
+        pd.concat(health_frames, ignore_index=True),
+        pd.concat(hospital_frames, ignore_index=True)
+    )
+
+def _write_shard(task):
+    """Generate one shard and write its CSV files (runs in a worker process)"""
+    shard_dir, locations, history_dates, projection_years, seed = task
+    climate_df, health_df, hospital_df = generate_location_frames(locations, history_dates, projection_years, seed)
+    
+    os.makedirs(shard_dir, exist_ok=True)
+    climate_df.to_csv(os.path.join(shard_dir, "climate_data.csv"), index=False)
+    health_df.to_csv(os.path.join(shard_dir, "health_data.csv"), index=False)
+    hospital_df.to_csv(os.path.join(shard_dir, "hospital_data.csv"), index=False)
+    
+    return {
+        "path": os.path.basename(shard_dir),
+        "location_ids": [location["id"] for location in locations],
+        "rows": len(climate_df)
+    }
+
+def generate_sharded_data(save_path, locations, history_dates, projection_years, seed=None,
+                          workers=None, locations_per_shard=LOCATIONS_PER_SHARD):
+    """
+    Partition locations into shards and generate them across a process pool
+    
+    Shard boundaries depend only on locations_per_shard and every location is
+    seeded from (seed, location id), so the shard files are byte-identical for
+    any number of workers.
+    
+    Returns:
+        Manifest dictionary describing the shards (also written to shards/manifest.json)
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+    
+    shards_root = os.path.join(save_path, "shards")
+    shutil.rmtree(shards_root, ignore_errors=True)
+    tasks = [
+        (
+            os.path.join(shards_root, f"shard-{index:05d}"),
+            locations[start:start + locations_per_shard],
+            history_dates,
+            projection_years,
+            seed
+        )
+        for index, start in enumerate(range(0, len(locations), locations_per_shard))
+    ]
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        shards = list(executor.map(_write_shard, tasks))
+    
+    manifest = {
+        "seed": seed,
+        "locations_per_shard": locations_per_shard,
+        "total_rows": sum(shard["rows"] for shard in shards),
+        "shards": shards
+    }
+    with open(os.path.join(shards_root, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    
+    return manifest
+
+def resolve_profile(profile=None, **overrides):
+    """
+    Resolve generator scale knobs from a named dataset profile
+    
+    Args:
+        profile: Name of a DATASET_PROFILES entry (defaults to "small")
+        **overrides: Explicit knob values; None values fall back to the profile
+        
+    Returns:
+        Dictionary with sub_locations_per_state, history_days and projection_horizon
+    """
+    profile = profile or DEFAULT_PROFILE
+    if profile not in DATASET_PROFILES:
+        raise ValueError(f"Unknown dataset profile '{profile}'. Choose from: {', '.join(DATASET_PROFILES)}")
+    
+    options = dict(DATASET_PROFILES[profile])
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    return options
+
+def build_locations(sub_locations_per_state=0):
+    """
+    Build the list of locations to generate data for
+    
+    With sub_locations_per_state=0 this is INDIAN_LOCATIONS. Otherwise each
+    state/UT is split into that many synthetic sub-locations (districts or
+    hospital catchments) whose populations and areas sum to the parent's. The
+    split only depends on the parent's position, so IDs and populations are
+    stable between runs.
+    """
     # Add IDs to locations
     for i, location in enumerate(INDIAN_LOCATIONS):
         location["id"] = i + 1
     
-    # Data lists
-    all_climate_data = []
-    all_health_data = []
-    all_hospital_data = []
+    if not sub_locations_per_state:
+        return INDIAN_LOCATIONS
+    
+    locations = []
+    for index, parent in enumerate(INDIAN_LOCATIONS):
+        weights = np.random.default_rng([SUB_LOCATION_SEED, index]).dirichlet(np.full(sub_locations_per_state, 5.0))
+        for k, weight in enumerate(weights):
+            locations.append({
+                "name": f"{parent['name']} District {k + 1}",
+                "type": "district",
+                "population": max(1, int(parent["population"] * weight)),
+                "area": round(parent["area"] * weight, 2),
+                "state": parent["name"],
+                "id": len(locations) + 1
+            })
+    return locations
+
+def parent_location_name(name):
+    """State/UT a synthetic sub-location was split from, or the name itself for a state/UT"""
+    match = SUB_LOCATION_NAME.match(name)
+    return match.group("state") if match else name
+
+def generate_locations_frame(locations=None):
+    """Return the locations (INDIAN_LOCATIONS by default) as a DataFrame"""
+    return pd.DataFrame(locations if locations is not None else build_locations())
+
+def generation_schedule(history_days=30, projection_horizon=5):
+    """Return the history dates and projection years to generate data for"""
+    # Current day (September 21, 2025) plus the past history_days days
+    history_dates = [CURRENT_DATE - timedelta(days=i) for i in range(0, history_days + 1)]
+    
+    # Future projections (one date per year for projection_horizon years)
+    projection_years = list(range(CURRENT_DATE.year + 1, CURRENT_DATE.year + 1 + projection_horizon))
     
-    # Generate current data (for September 21, 2025)
-    for location in INDIAN_LOCATIONS:
-        # Current day data
-        current_climate = generate_climate_data(location, CURRENT_DATE)
-        all_climate_data.append(current_climate)
-        
-        current_health = generate_health_data(current_climate, location)
-        all_health_data.append(current_health)
-        
-        current_hospital = generate_hospital_data(current_health, location, CURRENT_DATE)
-        all_hospital_data.append(current_hospital)
-        
-        # Historical data (past 30 days)
-        for i in range(1, 31):
-            past_date = CURRENT_DATE - timedelta(days=i)
-            past_climate = generate_climate_data(location, past_date)
-            all_climate_data.append(past_climate)
-            
-            past_health = generate_health_data(past_climate, location)
-            all_health_data.append(past_health)
-            
-            past_hospital = generate_hospital_data(past_health, location, past_date)
-            all_hospital_data.append(past_hospital)
-    
-    # Generate future projections (for 1-5 years)
-    for projection_year in range(2026, 2031):
-        future_date = CURRENT_DATE.replace(year=projection_year)
+    return history_dates, projection_years
+
+def generate_data_batches(seed=None, locations_per_batch=LOCATIONS_PER_SHARD, rng=None, profile=None,
+                          sub_locations_per_state=None, history_days=None, projection_horizon=None):
+    """
+    Yield generated data one group of locations at a time, without writing files
+    
+    Each batch is a dict of typed "climate", "health" and "hospital" DataFrames
+    for locations_per_batch locations, so memory stays bounded by the batch size.
+    With a seed, batches contain the same rows as generate_all_data(seed=seed).
+    Scale knobs are resolved as in generate_all_data.
+    """
+    options = resolve_profile(
+        profile,
+        sub_locations_per_state=sub_locations_per_state,
+        history_days=history_days,
+        projection_horizon=projection_horizon
+    )
+    all_locations = build_locations(options["sub_locations_per_state"])
+    history_dates, projection_years = generation_schedule(options["history_days"], options["projection_horizon"])
+    rng = rng if rng is not None else np.random.default_rng()
+    
+    for start in range(0, len(all_locations), locations_per_batch):
+        locations = all_locations[start:start + locations_per_batch]
+        climate_df, health_df, hospital_df = generate_frames(
+            locations, history_dates, projection_years, seed=seed, rng=rng
+        )
         
-        for location in INDIAN_LOCATIONS:
-            # Projected climate data
-            projected_climate = generate_climate_data(
-                location, 
-                future_date, 
-                is_projected=True, 
-                projection_year=projection_year
-            )
-            all_climate_data.append(projected_climate)
-            
-            # Projected health impact
-            projected_health = generate_health_data(
-                projected_climate, 
-                location, 
-                population_factor=1 + ((projection_year - 2025) * 0.01)  # Population growth factor
-            )
-            all_health_data.append(projected_health)
-            
-            # Projected hospital resources
-            projected_hospital = generate_hospital_data(projected_health, location, future_date)
-            all_hospital_data.append(projected_hospital)
-    
-    # Convert to dataframes
-    locations_df = pd.DataFrame(INDIAN_LOCATIONS)
-    climate_df = pd.DataFrame(all_climate_data)
-    health_df = pd.DataFrame(all_health_data)
-    hospital_df = pd.DataFrame(all_hospital_data)
+        yield {
+            "climate": climate_df,
+            "health": health_df,
+            "hospital": hospital_df
+        }
+
+def generate_all_data(save_path=None, rng=None, sharded=False, seed=None, workers=None,
+                      locations_per_shard=LOCATIONS_PER_SHARD, profile=None,
+                      sub_locations_per_state=None, history_days=None, projection_horizon=None):
+    """
+    Generate data for all locations and save to CSV/JSON files
+    
+    Args:
+        save_path: Directory to write the generated files to
+        rng: numpy Generator used for sampling in the default (single process) mode
+        sharded: Partition locations across a process pool and write one set of
+            CSV files per shard under save_path/shards instead of single files
+        seed: Global seed; with it, each location is seeded from (seed, location id)
+        workers: Number of worker processes in sharded mode (defaults to all cores)
+        locations_per_shard: Number of locations per shard in sharded mode
+        profile: Name of a DATASET_PROFILES entry providing the scale knobs below
+        sub_locations_per_state: Synthetic sub-locations generated per state/UT
+            (0 keeps the 36 states and union territories)
+        history_days: Days of history generated before CURRENT_DATE
+        projection_horizon: Number of yearly projections after CURRENT_DATE
+    """
+    options = resolve_profile(
+        profile,
+        sub_locations_per_state=sub_locations_per_state,
+        history_days=history_days,
+        projection_horizon=projection_horizon
+    )
+    locations = build_locations(options["sub_locations_per_state"])
+    locations_df = generate_locations_frame(locations)
+    history_dates, projection_years = generation_schedule(options["history_days"], options["projection_horizon"])
+    
+    if sharded:
+        if not save_path:
+            raise ValueError("save_path is required in sharded mode")
+        os.makedirs(save_path, exist_ok=True)
+        locations_df.to_csv(os.path.join(save_path, "locations.csv"), index=False)
+        manifest = generate_sharded_data(
+            save_path, locations, history_dates, projection_years,
+            seed=seed, workers=workers, locations_per_shard=locations_per_shard
+        )
+        return {
+            "locations": locations_df,
+            "manifest": manifest
+        }
+    
+    climate_df, health_df, hospital_df = generate_frames(
+        locations, history_dates, projection_years, seed=seed, rng=rng
+    )
     
     # Save data if path provided
     if save_path:
         os.makedirs(save_path, exist_ok=True)
+        # Remove stale shards so the ETL picks up the single-file output
+        shutil.rmtree(os.path.join(save_path, "shards"), ignore_errors=True)
         locations_df.to_csv(os.path.join(save_path, "locations.csv"), index=False)
         climate_df.to_csv(os.path.join(save_path, "climate_data.csv"), index=False)
         health_df.to_csv(os.path.join(save_path, "health_data.csv"), index=False)
@@ -442,9 +947,34 @@ def generate_all_data(save_path=None):
     }
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate synthetic climate-health data")
+    parser.add_argument("--profile", choices=list(DATASET_PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument("--sub-locations-per-state", type=int)
+    parser.add_argument("--history-days", type=int)
+    parser.add_argument("--projection-horizon", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--sharded", action="store_true")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--save-path", default="../data/raw")
+    args = parser.parse_args()
+    
     # Generate data and save to raw data folder
-    data = generate_all_data(save_path="../data/raw")
-    print(f"Generated data for {len(INDIAN_LOCATIONS)} locations")
-    print(f"Climate data points: {len(data['climate'])}")
-    print(f"Health data points: {len(data['health'])}")
-    print(f"Hospital data points: {len(data['hospital'])}")
+    data = generate_all_data(
+        save_path=args.save_path,
+        sharded=args.sharded,
+        seed=args.seed,
+        workers=args.workers,
+        profile=args.profile,
+        sub_locations_per_state=args.sub_locations_per_state,
+        history_days=args.history_days,
+        projection_horizon=args.projection_horizon
+    )
+    print(f"Generated data for {len(data['locations'])} locations")
+    if args.sharded:
+        print(f"Rows per table: {data['manifest']['total_rows']} in {len(data['manifest']['shards'])} shards")
+    else:
+        print(f"Climate data points: {len(data['climate'])}")
+        print(f"Health data points: {len(data['health'])}")
+        print(f"Hospital data points: {len(data['hospital'])}")
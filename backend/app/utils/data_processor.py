@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 import os
+import json
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import sys
@@ -45,57 +47,102 @@ def load_data_from_csv(data_dir="./data/raw"):
         logger.error(f"Error loading data from CSV: {e}")
         raise
 
+def load_shard_from_csv(shard_dir):
+    """Load the climate, health and hospital CSV files of one generator shard"""
+    return {
+        "climate": pd.read_csv(os.path.join(shard_dir, "climate_data.csv")),
+        "health": pd.read_csv(os.path.join(shard_dir, "health_data.csv")),
+        "hospital": pd.read_csv(os.path.join(shard_dir, "hospital_data.csv"))
+    }
+
+def _init_shard_worker():
+    """Drop connections inherited from the parent process before using the engine"""
+    engine.dispose(close=False)
+
+def ingest_shard(shard_dir):
+    """Insert one generator shard using its own database session"""
+    db = SessionLocal()
+    try:
+        data_dict = load_shard_from_csv(shard_dir)
+        process_climate_data(data_dict["climate"], db)
+        process_health_data(data_dict["health"], db)
+        process_hospital_data(data_dict["hospital"], db)
+        return len(data_dict["climate"])
+    finally:
+        db.close()
+
+def process_shards(data_dir="./data/raw", workers=None):
+    """
+    Ingest the shard files written by generate_all_data(sharded=True)
+    
+    Shards are inserted in parallel worker processes. SQLite only supports a
+    single writer, so shards are ingested sequentially there unless workers is
+    given explicitly.
+    """
+    shards_root = os.path.join(data_dir, "shards")
+    with open(os.path.join(shards_root, "manifest.json")) as f:
+        manifest = json.load(f)
+    
+    shard_dirs = [os.path.join(shards_root, shard["path"]) for shard in manifest["shards"]]
+    
+    if workers is None and engine.dialect.name == "sqlite":
+        workers = 1
+    
+    if workers == 1:
+        rows = [ingest_shard(shard_dir) for shard_dir in shard_dirs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker) as executor:
+            rows = list(executor.map(ingest_shard, shard_dirs))
+    
+    logger.info(f"Ingested {len(shard_dirs)} shards ({sum(rows)} rows per table)")
+
 def process_locations(locations_df, db):
     """Process and insert location data into the database"""
     try:
-        # Convert dataframe to dict for SQLAlchemy
-        locations_data = locations_df.to_dict('records')
-        
-        # Insert locations
-        for loc_data in locations_data:
-            location = Location(
-                id=loc_data["id"],
-                name=loc_data["name"],
-                type=loc_data["type"],
-                population=loc_data["population"],
-                area=loc_data["area"]
-            )
-            db.add(location)
-        
+        inserted = bulk_insert(Location, locations_df, db)
         db.commit()
-        logger.info(f"Inserted {len(locations_data)} locations into database")
+        logger.info(f"Inserted {inserted} locations into database")
     except Exception as e:
         db.rollback()
         logger.error(f"Error processing locations: {e}")
         raise
 
+# Rows per executemany call when bulk inserting
+BULK_INSERT_CHUNK_SIZE = 10000
+
+def frame_to_records(df, model):
+    """
+    Convert a generated/loaded DataFrame into typed dicts for a table insert
+    
+    Dates become date objects, is_projected becomes bool and missing
+    projection years become None, matching the SQLAlchemy column types.
+    """
+    columns = [c.name for c in model.__table__.columns if c.name in df.columns]
+    df = df[columns].copy()
+    
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"]).dt.date
+    if "is_projected" in df.columns:
+        df["is_projected"] = df["is_projected"].astype(bool)
+    if "projection_year" in df.columns:
+        df["projection_year"] = df["projection_year"].astype("Int64")
+    
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict("records")
+
+def bulk_insert(model, df, db):
+    """Insert a DataFrame into the model's table with chunked executemany calls"""
+    records = frame_to_records(df, model)
+    for start in range(0, len(records), BULK_INSERT_CHUNK_SIZE):
+        db.execute(model.__table__.insert(), records[start:start + BULK_INSERT_CHUNK_SIZE])
+    return len(records)
+
 def process_climate_data(climate_df, db):
     """Process and insert climate data into the database"""
     try:
-        # Convert dataframe to dict for SQLAlchemy
-        climate_data = climate_df.to_dict('records')
-        
-        # Insert climate data
-        for data in climate_data:
-            # Convert string date to Date object
-            date = pd.to_datetime(data["date"]).date()
-            
-            climate = ClimateData(
-                location_id=data["location_id"],
-                date=date,
-                temperature=data["temperature"],
-                rainfall=data["rainfall"],
-                humidity=data["humidity"],
-                flood_probability=data["flood_probability"],
-                cyclone_probability=data["cyclone_probability"],
-                heatwave_probability=data["heatwave_probability"],
-                is_projected=bool(data["is_projected"]),
-                projection_year=data["projection_year"]
-            )
-            db.add(climate)
-        
+        inserted = bulk_insert(ClimateData, climate_df, db)
         db.commit()
-        logger.info(f"Inserted {len(climate_data)} climate data points into database")
+        logger.info(f"Inserted {inserted} climate data points into database")
     except Exception as e:
         db.rollback()
         logger.error(f"Error processing climate data: {e}")
@@ -104,28 +151,9 @@ def process_climate_data(climate_df, db):
 def process_health_data(health_df, db):
     """Process and insert health data into the database"""
     try:
-        # Convert dataframe to dict for SQLAlchemy
-        health_data = health_df.to_dict('records')
-        
-        # Insert health data
-        for data in health_data:
-            # Convert string date to Date object
-            date = pd.to_datetime(data["date"]).date()
-            
-            health = HealthData(
-                location_id=data["location_id"],
-                date=date,
-                dengue_cases=data["dengue_cases"],
-                malaria_cases=data["malaria_cases"],
-                heatstroke_cases=data["heatstroke_cases"],
-                diarrhea_cases=data["diarrhea_cases"],
-                is_projected=bool(data["is_projected"]),
-                projection_year=data["projection_year"]
-            )
-            db.add(health)
-        
+        inserted = bulk_insert(HealthData, health_df, db)
         db.commit()
-        logger.info(f"Inserted {len(health_data)} health data points into database")
+        logger.info(f"Inserted {inserted} health data points into database")
     except Exception as e:
         db.rollback()
         logger.error(f"Error processing health data: {e}")
@@ -134,36 +162,37 @@ def process_health_data(health_df, db):
 def process_hospital_data(hospital_df, db):
     """Process and insert hospital data into the database"""
     try:
-        # Convert dataframe to dict for SQLAlchemy
-        hospital_data = hospital_df.to_dict('records')
-        
-        # Insert hospital data
-        for data in hospital_data:
-            # Convert string date to Date object
-            date = pd.to_datetime(data["date"]).date()
-            
-            hospital = HospitalData(
-                location_id=data["location_id"],
-                date=date,
-                total_beds=data["total_beds"],
-                available_beds=data["available_beds"],
-                doctors=data["doctors"],
-                nurses=data["nurses"],
-                iv_fluids_stock=data["iv_fluids_stock"],
-                antibiotics_stock=data["antibiotics_stock"],
-                antipyretics_stock=data["antipyretics_stock"],
-                is_projected=bool(data["is_projected"]),
-                projection_year=data["projection_year"]
-            )
-            db.add(hospital)
-        
+        inserted = bulk_insert(HospitalData, hospital_df, db)
         db.commit()
-        logger.info(f"Inserted {len(hospital_data)} hospital data points into database")
+        logger.info(f"Inserted {inserted} hospital data points into database")
     except Exception as e:
         db.rollback()
         logger.error(f"Error processing hospital data: {e}")
         raise
 
+def process_data_batches(batches, db):
+    """
+    Insert generated record batches straight into the database
+    
+    Each batch is a dict with "climate", "health" and "hospital" frames, as
+    yielded by generate_data_batches. Batches are committed one at a time so
+    only a single batch is held in memory.
+    """
+    batch_count = 0
+    row_count = 0
+    try:
+        for batch in batches:
+            row_count += bulk_insert(ClimateData, batch["climate"], db)
+            bulk_insert(HealthData, batch["health"], db)
+            bulk_insert(HospitalData, batch["hospital"], db)
+            db.commit()
+            batch_count += 1
+        logger.info(f"Streamed {batch_count} batches ({row_count} rows per table) into database")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error streaming generated data: {e}")
+        raise
+
 def calculate_derived_metrics():
     """Calculate additional metrics and store them in the processed folder"""
     try:
@@ -254,7 +283,7 @@ def calculate_derived_metrics():
     finally:
         pass
 
-def main():
+def main(data_dir="./data/raw", workers=None):
     """Main ETL function"""
     # Initialize database
     init_db()
@@ -263,14 +292,19 @@ def main():
     db = SessionLocal()
     
     try:
-        # Load data from CSV files
-        data_dict = load_data_from_csv()
-        
-        # Process and insert data
-        process_locations(data_dict["locations"], db)
-        process_climate_data(data_dict["climate"], db)
-        process_health_data(data_dict["health"], db)
-        process_hospital_data(data_dict["hospital"], db)
+        if os.path.exists(os.path.join(data_dir, "shards", "manifest.json")):
+            # Sharded output: locations first, then shards in parallel
+            process_locations(pd.read_csv(os.path.join(data_dir, "locations.csv")), db)
+            process_shards(data_dir, workers=workers)
+        else:
+            # Load data from CSV files
+            data_dict = load_data_from_csv(data_dir)
+            
+            # Process and insert data
+            process_locations(data_dict["locations"], db)
+            process_climate_data(data_dict["climate"], db)
+            process_health_data(data_dict["health"], db)
+            process_hospital_data(data_dict["hospital"], db)
         
         # Calculate derived metrics
         calculate_derived_metrics()
@@ -281,5 +315,41 @@ def main():
     finally:
         db.close()
 
+def stream_generated_data(seed=None, profile=None, **generator_options):
+    """
+    ETL without the CSV round trip: generate data batch by batch and insert it
+    directly, then calculate derived metrics
+    
+    Args:
+        seed: Optional global seed for reproducible data
+        profile: Dataset profile name (see DATASET_PROFILES in data_generator)
+        **generator_options: Scale knob overrides and locations_per_batch,
+            passed through to generate_data_batches
+    """
+    from app.utils.data_generator import (
+        resolve_profile, build_locations, generate_locations_frame, generate_data_batches
+    )
+    
+    init_db()
+    db = SessionLocal()
+    
+    try:
+        options = resolve_profile(
+            profile,
+            sub_locations_per_state=generator_options.pop("sub_locations_per_state", None),
+            history_days=generator_options.pop("history_days", None),
+            projection_horizon=generator_options.pop("projection_horizon", None)
+        )
+        locations = build_locations(options["sub_locations_per_state"])
+        process_locations(generate_locations_frame(locations), db)
+        process_data_batches(generate_data_batches(seed=seed, **options, **generator_options), db)
+        calculate_derived_metrics()
+        logger.info("Streaming ETL process completed successfully")
+    except Exception as e:
+        logger.error(f"Streaming ETL process failed: {e}")
+        raise
+    finally:
+        db.close()
+
 if __name__ == "__main__":
     main()
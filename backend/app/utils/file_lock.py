@@ -0,0 +1,119 @@
+"""
+Cross-process locking with a lock file
+
+threading.Lock only serializes the threads of one process, but API workers,
+training jobs and scripts share files such as the model registry manifest.
+FileLock holds an exclusive lock on a file next to them for the duration of
+a with block: an fcntl lock where fcntl is available, which the OS releases
+if the holder dies, and otherwise a lock file created with O_EXCL, which is
+taken over once it is older than stale_after seconds.
+
+The lock is not reentrant, and only serializes processes on hosts that share
+the file system.
+"""
+import errno
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class LockTimeout(Exception):
+    """Raised when a FileLock could not be acquired in time"""
+
+
+class FileLock:
+    """Exclusive lock on path across processes, and across threads of this process"""
+
+    def __init__(self, path, timeout=None, poll_interval=0.05, stale_after=300):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        # flock locks belong to the open file, so threads of one process
+        # using separate FileLock objects are serialized by this lock too
+        self._thread_lock = _thread_lock(path)
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        """Take the lock, waiting up to timeout seconds if blocking; False if not taken"""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(blocking, -1 if self.timeout is None or not blocking else self.timeout):
+            return self._give_up(blocking)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        try:
+            while not self._try_acquire():
+                if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                    self._thread_lock.release()
+                    return self._give_up(blocking)
+                time.sleep(self.poll_interval)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return True
+
+    def _give_up(self, blocking):
+        if blocking:
+            raise LockTimeout(f"Timed out waiting for lock {self.path}")
+        return False
+
+    def _try_acquire(self):
+        if fcntl is not None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as e:
+                os.close(fd)
+                if e.errno in (errno.EAGAIN, errno.EACCES):
+                    return False
+                raise
+            self._fd = fd
+            return True
+
+        try:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                    # Left behind by a process that died holding the lock
+                    os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            return False
+        os.write(self._fd, str(os.getpid()).encode())
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        if fcntl is not None:
+            # The lock file stays; removing it would let a waiter lock an
+            # unlinked file while a newcomer locks a new one
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        else:
+            os.close(fd)
+            os.remove(self.path)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+_thread_locks = {}
+_thread_locks_lock = threading.Lock()
+
+
+def _thread_lock(path):
+    path = os.path.abspath(path)
+    with _thread_locks_lock:
+        return _thread_locks.setdefault(path, threading.Lock())
@@ -2,22 +2,33 @@
 OpenWeather API integration for real-time weather data
 """
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
 import numpy as np
 
+from .cache import create_cache
+from .data_generator import parent_location_name
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, RetryBudget
+from .single_flight import SingleFlight
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # OpenWeather API key - in production, store this in environment variables or secure storage
-OPENWEATHER_API_KEY = "efa07bbde5e87fdc177baac21387b040"  # Replace with your actual API key
+OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "efa07bbde5e87fdc177baac21387b040")  # Replace with your actual API key
 
-# Base URL for OpenWeather API
-OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5"
+# Base URL for OpenWeather API (point it at scripts/openweather_standin.py to run offline)
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5")
 
 # Indian states and their coordinates (approximate centers)
 INDIAN_STATES = {
@@ -59,14 +70,174 @@ INDIAN_STATES = {
     "Puducherry": {"lat": 11.9416, "lon": 79.8083}
 }
 
-# Cache for weather data to avoid excessive API calls
-WEATHER_CACHE = {}
+# Cache for weather data to avoid excessive API calls, keyed by location name.
+# The backend is 'memory' (this process only), 'sqlite' (a file shared by the
+# workers on one host) or 'redis' (shared by all hosts and Lambda containers);
+# WEATHER_CACHE_URL is the database file or the server URL.
 CACHE_DURATION = 1800  # 30 minutes in seconds
+# How long past CACHE_DURATION an entry is still served while it is refreshed
+STALE_DURATION = int(os.getenv("WEATHER_STALE_DURATION", "1800"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "256"))
+WEATHER_CACHE_BACKEND = os.getenv("WEATHER_CACHE_BACKEND", "memory")
+WEATHER_CACHE_URL = os.getenv("WEATHER_CACHE_URL") or (
+    os.path.join(tempfile.gettempdir(), "climate-health-weather-cache.db")
+    if WEATHER_CACHE_BACKEND == "sqlite" else None
+)
+WEATHER_CACHE = create_cache(
+    WEATHER_CACHE_BACKEND, WEATHER_CACHE_URL, maxsize=WEATHER_CACHE_SIZE,
+    ttl=CACHE_DURATION + STALE_DURATION, prefix="weather:"
+)
+
+# Seconds between prefetch rounds (0 disables prefetching), and how long
+# before an entry goes stale the prefetcher refreshes it. Off by default on
+# Lambda, which freezes background threads between invocations.
+PREFETCH_INTERVAL = float(os.getenv(
+    "WEATHER_PREFETCH_INTERVAL", "0" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "60"
+))
+PREFETCH_LEAD = float(os.getenv("WEATHER_PREFETCH_LEAD", "300"))
+
+# Largest number of API calls in flight at once, which is also the number of
+# kept-alive connections to OpenWeather
+MAX_CONCURRENCY = int(os.getenv("OPENWEATHER_MAX_CONCURRENCY", "8"))
+
+# (connect, read) timeout in seconds of each API call
+REQUEST_TIMEOUT = (
+    float(os.getenv("OPENWEATHER_CONNECT_TIMEOUT", "3.05")),
+    float(os.getenv("OPENWEATHER_READ_TIMEOUT", "5"))
+)
+
+# Retries of a call that failed to connect or got a 5xx response, and the
+# base and cap in seconds of the jittered exponential backoff between them.
+# RETRY_BUDGET keeps retries under a fifth of recent calls.
+MAX_RETRIES = int(os.getenv("OPENWEATHER_MAX_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("OPENWEATHER_RETRY_BACKOFF", "0.2"))
+RETRY_BACKOFF_CAP = 2.0
+RETRY_BUDGET = RetryBudget(ratio=0.2, min_retries=3, window=10)
+
+# Stops calling OpenWeather for OPENWEATHER_BREAKER_RESET seconds once half of
+# the calls of the last 30 seconds (at least 10 of them) failed; lookups then
+# fall back to cached or synthetic weather straight away
+OPENWEATHER_BREAKER = CircuitBreaker(
+    "openweather",
+    failure_threshold=float(os.getenv("OPENWEATHER_BREAKER_THRESHOLD", "0.5")),
+    min_calls=10,
+    window=30,
+    reset_timeout=float(os.getenv("OPENWEATHER_BREAKER_RESET", "30"))
+)
+
+_session = None
+_executor = None
+_refresh_executor = None
+_refreshing = set()
+_client_lock = threading.Lock()
+
+# Fetches in flight per location, shared by concurrent callers
+WEATHER_FLIGHTS = SingleFlight()
+
+def get_session() -> requests.Session:
+    """Shared HTTP session that keeps connections to OpenWeather alive"""
+    global _session
+    with _client_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENCY)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _client_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="openweather")
+        return _executor
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    # Separate from the API call pool, whose workers a refresh waits on
+    global _refresh_executor
+    with _client_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="weather-refresh")
+        return _refresh_executor
 
 def kelvin_to_celsius(kelvin):
     """Convert temperature from Kelvin to Celsius"""
     return kelvin - 273.15
 
+def weather_location(location_name: str) -> Optional[str]:
+    """
+    State/UT whose weather a location has: the location itself, or the
+    state/UT a generated sub-location (district) was split from; None if
+    neither has known coordinates
+    """
+    if location_name in INDIAN_STATES:
+        return location_name
+    parent = parent_location_name(location_name)
+    return parent if parent in INDIAN_STATES else None
+
+def get_coordinates(location_name: str) -> Dict[str, float]:
+    """Coordinates of a state/UT or of a district's state/UT, defaulting to Delhi for unknown names"""
+    source = weather_location(location_name)
+    if source is None:
+        logger.warning(f"Location {location_name} not found, using Delhi coordinates")
+        return INDIAN_STATES["Delhi"]
+    return INDIAN_STATES[source]
+
+def _fetch(endpoint: str, coords: Dict[str, float]) -> requests.Response:
+    """
+    One OpenWeather API call on the shared session
+    
+    Connection errors and 5xx responses are retried after a jittered
+    backoff, up to MAX_RETRIES times and as far as RETRY_BUDGET allows.
+    Read timeouts and 429s are not: the API is slow or throttling us, and
+    calling it again would only make that worse. Every attempt counts
+    towards OPENWEATHER_BREAKER.
+    
+    Raises:
+        CircuitOpenError: if the circuit is open, without calling the API
+    """
+    params = {
+        'lat': coords['lat'],
+        'lon': coords['lon'],
+        'appid': OPENWEATHER_API_KEY,
+        'units': 'metric'  # Use metric units
+    }
+    RETRY_BUDGET.record_call()
+    attempt = 0
+    while True:
+        if not OPENWEATHER_BREAKER.allow():
+            raise CircuitOpenError("OpenWeather circuit is open")
+        try:
+            response = get_session().get(f"{OPENWEATHER_BASE_URL}/{endpoint}", params=params, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.ReadTimeout:
+            OPENWEATHER_BREAKER.record_failure()
+            raise
+        except requests.exceptions.RequestException:
+            OPENWEATHER_BREAKER.record_failure()
+            if not _may_retry(attempt):
+                raise
+        else:
+            if response.status_code != 429 and response.status_code < 500:
+                OPENWEATHER_BREAKER.record_success()
+                return response
+            OPENWEATHER_BREAKER.record_failure()
+            if response.status_code == 429 or not _may_retry(attempt):
+                return response
+        time.sleep(random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF * 2 ** attempt)))
+        attempt += 1
+
+def _may_retry(attempt: int) -> bool:
+    return attempt < MAX_RETRIES and RETRY_BUDGET.try_retry()
+
+def get_client_stats() -> Dict[str, Any]:
+    """Circuit breaker state, retry budget use and fetches in flight of this worker"""
+    return {
+        'circuit_breaker': OPENWEATHER_BREAKER.stats(),
+        'retry_budget': RETRY_BUDGET.stats(),
+        'fetches': WEATHER_FLIGHTS.stats()
+    }
+
 def get_real_time_weather(location_name: str) -> Dict[str, Any]:
     """
     Get real-time weather data from OpenWeather API for a location
@@ -77,153 +248,359 @@ def get_real_time_weather(location_name: str) -> Dict[str, Any]:
     Returns:
         Dictionary with weather data
     """
-    # Check cache first
-    cache_key = f"{location_name}_{datetime.now().strftime('%Y-%m-%d-%H')}"
-    if cache_key in WEATHER_CACHE and (datetime.now() - WEATHER_CACHE[cache_key]['timestamp']).total_seconds() < CACHE_DURATION:
-        return WEATHER_CACHE[cache_key]['data']
+    return get_real_time_weather_many([location_name])[location_name]
+
+def get_real_time_weather_many(location_names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get real-time weather data for many locations at once
     
-    try:
-        # Get coordinates for the location
-        if location_name not in INDIAN_STATES:
-            # Default to Delhi if location not found
-            coords = INDIAN_STATES["Delhi"]
-            logger.warning(f"Location {location_name} not found, using Delhi coordinates")
-        else:
-            coords = INDIAN_STATES[location_name]
-        
-        # Make API call to OpenWeather
-        params = {
-            'lat': coords['lat'],
-            'lon': coords['lon'],
-            'appid': OPENWEATHER_API_KEY,
-            'units': 'metric'  # Use metric units
-        }
-        
-        # Current weather
-        current_url = f"{OPENWEATHER_BASE_URL}/weather"
-        current_response = requests.get(current_url, params=params)
-        current_data = current_response.json()
+    Cached weather is returned straight away, even when older than
+    CACHE_DURATION: stale entries are refreshed in the background and
+    served until then (stale-while-revalidate). Locations not in the cache
+    at all are fetched, with the current weather and forecast calls of all
+    of them running concurrently on the shared session, at most
+    MAX_CONCURRENCY at a time. A location whose calls fail gets synthetic
+    data, as in get_real_time_weather.
+    
+    Args:
+        location_names: Names of the locations (states/UTs)
         
-        # 5-day forecast
-        forecast_url = f"{OPENWEATHER_BASE_URL}/forecast"
-        forecast_response = requests.get(forecast_url, params=params)
-        forecast_data = forecast_response.json()
+    Returns:
+        Dictionary of location name to weather data
+    """
+    results = {}
+    missing, stale = [], []
+    now = time.time()
+    for location_name in dict.fromkeys(location_names):
+        # Check cache first
+        cached = _cached_entry(location_name)
+        if cached is None:
+            missing.append(location_name)
+            continue
+        results[location_name] = cached['data']
+        if now - cached['fetched_at'] >= CACHE_DURATION:
+            stale.append(location_name)
+    
+    if stale:
+        refresh_weather_in_background(stale)
+    
+    if missing:
+        fetched = fetch_weather(missing)
+        for location_name in missing:
+            # Fall back to synthetic data
+            results[location_name] = fetched[location_name] or generate_synthetic_weather(location_name)
+    
+    return {location_name: results[location_name] for location_name in dict.fromkeys(location_names)}
+
+def _cached_entry(location_name: str) -> Optional[Dict[str, Any]]:
+    """Cached {'fetched_at': wall-clock seconds, 'data': weather data}, or None"""
+    cached = WEATHER_CACHE.get(location_name)
+    if not isinstance(cached, dict) or 'fetched_at' not in cached:
+        return None
+    return cached
+
+def weather_age(location_name: str) -> Optional[float]:
+    """Seconds since the cached weather of a location was fetched, or None if not cached"""
+    cached = _cached_entry(location_name)
+    return None if cached is None else time.time() - cached['fetched_at']
+
+def fetch_weather(location_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Fetch the weather of locations from the API and cache it
+    
+    A location already being fetched by another thread (a request, a
+    background refresh or the prefetcher) is not fetched again: the caller
+    waits for that fetch and shares its result.
+    
+    Returns:
+        Dictionary of location name to weather data, or None where the API
+        calls failed (the cache keeps any previous entry)
+    """
+    calls, led, pending = {}, [], {}
+    for location_name in dict.fromkeys(location_names):
+        calls[location_name], leader = WEATHER_FLIGHTS.acquire(location_name)
+        if leader:
+            led.append(location_name)
+    
+    results, rejected = {}, []
+    try:
+        for location_name in led:
+            # Submit both calls of every location before waiting on any of them
+            coords = get_coordinates(location_name)
+            executor = _get_executor()
+            pending[location_name] = (
+                coords,
+                executor.submit(_fetch, "weather", coords),
+                executor.submit(_fetch, "forecast", coords)
+            )
         
-        # Process current weather data
-        if current_response.status_code == 200:
-            temperature = current_data['main']['temp']
-            humidity = current_data['main']['humidity']
-            
-            # Get rainfall data if available (last 3 hours)
-            rainfall = 0
-            if 'rain' in current_data and '3h' in current_data['rain']:
-                rainfall = current_data['rain']['3h']
-            elif 'rain' in current_data and '1h' in current_data['rain']:
-                rainfall = current_data['rain']['1h']
-            
-            # Calculate disaster probabilities based on weather conditions
-            weather_id = current_data['weather'][0]['id']
-            wind_speed = current_data['wind']['speed']
-            
-            # Calculate flood probability
-            flood_probability = 0.01  # Base probability
-            if rainfall > 20:  # Heavy rain
-                flood_probability = min(0.95, rainfall / 100)
-            elif weather_id >= 200 and weather_id < 300:  # Thunderstorm
-                flood_probability = 0.3
-            elif weather_id >= 300 and weather_id < 400:  # Drizzle
-                flood_probability = 0.1
-            elif weather_id >= 500 and weather_id < 600:  # Rain
-                flood_probability = 0.2 + (rainfall / 100)
-            
-            # Calculate cyclone probability
-            cyclone_probability = 0.01  # Base probability
-            if wind_speed > 20:  # Strong wind
-                cyclone_probability = min(0.95, wind_speed / 50)
-            
-            # Calculate heatwave probability
-            heatwave_probability = 0.01  # Base probability
-            if temperature > 35:  # Hot temperature
-                heatwave_probability = min(0.95, (temperature - 30) / 15)
+        for location_name, (coords, current_future, forecast_future) in pending.items():
+            weather_data = None
+            try:
+                weather_data = _parse_weather(location_name, coords, current_future.result(), forecast_future)
+            except CircuitOpenError:
+                rejected.append(location_name)
+            except Exception as e:
+                logger.error(f"Error fetching weather data for {location_name}: {e}")
             
-            # Process forecast data
-            forecast = []
-            if forecast_response.status_code == 200:
-                # Group by day (every 8 items is a new day, as data is 3-hourly)
-                for i in range(0, min(40, len(forecast_data['list'])), 8):
-                    day_data = forecast_data['list'][i]
-                    forecast_date = datetime.fromtimestamp(day_data['dt']).strftime("%Y-%m-%d")
-                    
-                    # Get rainfall data if available
-                    day_rainfall = 0
-                    if 'rain' in day_data and '3h' in day_data['rain']:
-                        day_rainfall = day_data['rain']['3h']
-                    
-                    # Calculate disaster probabilities for forecast
-                    day_weather_id = day_data['weather'][0]['id']
-                    day_wind_speed = day_data['wind']['speed']
-                    day_temp = day_data['main']['temp']
-                    
-                    day_flood_prob = 0.01
-                    if day_rainfall > 20:
-                        day_flood_prob = min(0.95, day_rainfall / 100)
-                    elif day_weather_id >= 200 and day_weather_id < 300:
-                        day_flood_prob = 0.3
-                    elif day_weather_id >= 500 and day_weather_id < 600:
-                        day_flood_prob = 0.2 + (day_rainfall / 100)
-                    
-                    day_cyclone_prob = 0.01
-                    if day_wind_speed > 20:
-                        day_cyclone_prob = min(0.95, day_wind_speed / 50)
-                    
-                    day_heatwave_prob = 0.01
-                    if day_temp > 35:
-                        day_heatwave_prob = min(0.95, (day_temp - 30) / 15)
-                    
-                    forecast.append({
-                        "date": forecast_date,
-                        "temperature": round(day_temp, 1),
-                        "humidity": day_data['main']['humidity'],
-                        "rainfall": round(day_rainfall, 1),
-                        "flood_probability": round(day_flood_prob, 3),
-                        "cyclone_probability": round(day_cyclone_prob, 3),
-                        "heatwave_probability": round(day_heatwave_prob, 3),
-                        "weather_description": day_data['weather'][0]['description']
-                    })
-            
-            # Compile weather data
-            weather_data = {
-                "location": location_name,
-                "latitude": coords["lat"],
-                "longitude": coords["lon"],
-                "timestamp": datetime.now(),
-                "temperature": round(temperature, 1),
-                "humidity": round(humidity, 1),
-                "rainfall": round(rainfall, 1),
-                "flood_probability": round(flood_probability, 3),
-                "cyclone_probability": round(cyclone_probability, 3),
-                "heatwave_probability": round(heatwave_probability, 3),
-                "weather_description": current_data['weather'][0]['description'],
-                "weather_icon": current_data['weather'][0]['icon'],
-                "forecast": forecast
-            }
-            
-            # Cache the result
-            WEATHER_CACHE[cache_key] = {
-                'data': weather_data,
-                'timestamp': datetime.now()
-            }
-            
-            return weather_data
-        else:
-            logger.error(f"Error fetching weather data: {current_response.status_code} - {current_data.get('message', 'Unknown error')}")
-            # Fall back to synthetic data
-            return generate_synthetic_weather(location_name)
+            if weather_data is not None:
+                # Cache the result
+                WEATHER_CACHE.set(location_name, {'fetched_at': time.time(), 'data': weather_data})
+            results[location_name] = weather_data
+            WEATHER_FLIGHTS.release(location_name, calls[location_name], result=weather_data)
+    finally:
+        # Never leave waiters hanging; they fall back as for a failed fetch
+        for location_name in led:
+            if location_name not in results:
+                WEATHER_FLIGHTS.release(location_name, calls[location_name], result=None)
+    if rejected:
+        logger.warning(f"OpenWeather circuit is open; weather of {len(rejected)} locations not fetched")
+    
+    return {location_name: call.wait() for location_name, call in calls.items()}
+
+def refresh_weather_in_background(location_names: List[str]) -> None:
+    """Fetch the weather of locations on a background thread, once per location at a time"""
+    with _client_lock:
+        names = [name for name in dict.fromkeys(location_names) if name not in _refreshing]
+        _refreshing.update(names)
+    if not names:
+        return
+    
+    def refresh():
+        try:
+            fetch_weather(names)
+        except Exception as e:
+            logger.error(f"Error refreshing weather data: {e}")
+        finally:
+            with _client_lock:
+                _refreshing.difference_update(names)
+    
+    _get_refresh_executor().submit(refresh)
+
+class WeatherPrefetcher:
+    """
+    Keeps the cached weather of every location fresh from a background thread
     
+    Every interval seconds, locations whose weather is missing or will go
+    stale within lead seconds are fetched together, so requests find fresh
+    entries and never wait on the API. With a shared cache each worker runs
+    its own prefetcher, and whichever sees an entry due first refreshes it
+    for all of them.
+    """
+    
+    def __init__(self, location_names: Optional[List[str]] = None, interval: float = PREFETCH_INTERVAL,
+                 lead: float = PREFETCH_LEAD):
+        self.location_names = list(location_names or INDIAN_STATES)
+        self.interval = interval
+        self.lead = lead
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def due(self) -> List[str]:
+        """Locations to fetch in the next round"""
+        refresh_after = max(0, CACHE_DURATION - self.lead)
+        due = []
+        for location_name in self.location_names:
+            age = weather_age(location_name)
+            if age is None or age >= refresh_after:
+                due.append(location_name)
+        return due
+    
+    def run_once(self) -> List[str]:
+        """Fetch the locations that are due; returns their names"""
+        due = self.due()
+        if due:
+            results = fetch_weather(due)
+            failed = [name for name, weather_data in results.items() if weather_data is None]
+            logger.info(f"Prefetched weather for {len(due) - len(failed)} of {len(due)} locations")
+        return due
+    
+    def start(self) -> None:
+        with self._lock:
+            if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="weather-prefetch", daemon=True)
+            self._thread.start()
+    
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error prefetching weather data: {e}")
+            if self._stop.wait(self.interval):
+                return
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+_prefetcher = None
+
+def get_prefetcher() -> WeatherPrefetcher:
+    """Shared prefetcher for all locations in INDIAN_STATES"""
+    global _prefetcher
+    with _client_lock:
+        if _prefetcher is None:
+            _prefetcher = WeatherPrefetcher()
+        return _prefetcher
+
+def _parse_weather(location_name: str, coords: Dict[str, float], current_response: requests.Response,
+                   forecast_future) -> Optional[Dict[str, Any]]:
+    """
+    Weather data from the API responses of one location
+    
+    Returns None if the current weather call failed. A failed forecast call
+    only leaves the forecast empty.
+    """
+    current_data = current_response.json()
+    
+    # Process current weather data
+    if current_response.status_code != 200:
+        logger.error(f"Error fetching weather data: {current_response.status_code} - {current_data.get('message', 'Unknown error')}")
+        return None
+    
+    temperature = current_data['main']['temp']
+    humidity = current_data['main']['humidity']
+    
+    # Get rainfall data if available (last 3 hours)
+    rainfall = 0
+    if 'rain' in current_data and '3h' in current_data['rain']:
+        rainfall = current_data['rain']['3h']
+    elif 'rain' in current_data and '1h' in current_data['rain']:
+        rainfall = current_data['rain']['1h']
+    
+    # Calculate disaster probabilities based on weather conditions
+    weather_id = current_data['weather'][0]['id']
+    wind_speed = current_data['wind']['speed']
+    flood_probability, cyclone_probability, heatwave_probability = (
+        float(p) for p in disaster_probabilities(temperature, rainfall, wind_speed, weather_id)
+    )
+    
+    # Process forecast data
+    forecast = []
+    try:
+        forecast_response = forecast_future.result()
+        forecast_data = forecast_response.json() if forecast_response.status_code == 200 else None
+    except CircuitOpenError:
+        # Not a forecast failure but a skipped call: do not cache weather without one
+        raise
     except Exception as e:
-        logger.error(f"Error fetching weather data for {location_name}: {e}")
-        # Fall back to synthetic data
-        return generate_synthetic_weather(location_name)
+        logger.warning(f"Error fetching forecast for {location_name}: {e}")
+        forecast_data = None
+    if forecast_data is not None:
+        forecast = aggregate_forecast(forecast_data)
+    
+    # Compile weather data
+    return {
+        "location": location_name,
+        "latitude": coords["lat"],
+        "longitude": coords["lon"],
+        "timestamp": datetime.now(),
+        "temperature": round(temperature, 1),
+        "humidity": round(humidity, 1),
+        "rainfall": round(rainfall, 1),
+        "flood_probability": round(flood_probability, 3),
+        "cyclone_probability": round(cyclone_probability, 3),
+        "heatwave_probability": round(heatwave_probability, 3),
+        "weather_description": current_data['weather'][0]['description'],
+        "weather_icon": current_data['weather'][0]['icon'],
+        "forecast": forecast
+    }
+
+def disaster_probabilities(temperature, rainfall, wind_speed, weather_id):
+    """
+    Flood, cyclone and heatwave probabilities from weather conditions
+    
+    Takes scalars or NumPy arrays of equal shape (one element per day or
+    reading) and returns arrays of that shape.
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    rainfall = np.asarray(rainfall, dtype=float)
+    wind_speed = np.asarray(wind_speed, dtype=float)
+    group = np.asarray(weather_id) // 100
+    flood = np.where(
+        rainfall > 20, np.minimum(0.95, rainfall / 100),  # Heavy rain
+        np.where(group == 2, 0.3,  # Thunderstorm
+                 np.where(group == 3, 0.1,  # Drizzle
+                          np.where(group == 5, 0.2 + rainfall / 100,  # Rain
+                                   0.01)))  # Base probability
+    )
+    # Strong wind
+    cyclone = np.where(wind_speed > 20, np.minimum(0.95, wind_speed / 50), 0.01)
+    # Hot temperature
+    heatwave = np.where(temperature > 35, np.minimum(0.95, (temperature - 30) / 15), 0.01)
+    return flood, cyclone, heatwave
+
+# Severity of OpenWeather condition groups (id // 100, index of this array),
+# for the condition that describes a day: thunderstorm, then rain, then
+# drizzle, then the rest
+CONDITION_SEVERITY = np.array([0, 0, 3, 1, 0, 2, 0, 0, 0, 0])
+
+def aggregate_forecast(forecast_data: Dict[str, Any], days: int = 5) -> List[Dict[str, Any]]:
+    """
+    Daily forecast from the 3-hourly entries of a /forecast response
+    
+    Entries are grouped by calendar day at the location (using the city's
+    UTC offset, or the server's when the response has none). Each day gets
+    its total rainfall, highest temperature, mean humidity and highest wind
+    speed, disaster probabilities computed from those, and the description
+    of its most severe condition. Returns the first `days` days, starting
+    with what is left of today.
+    """
+    entries = forecast_data.get('list') or []
+    if not entries:
+        return []
+    
+    # One row per entry: time, temperature, humidity, wind speed, rainfall, condition id
+    values = np.array([
+        (
+            entry['dt'], entry['main']['temp'], entry['main']['humidity'],
+            entry.get('wind', {}).get('speed', 0), entry.get('rain', {}).get('3h', 0), entry['weather'][0]['id']
+        )
+        for entry in entries
+    ], dtype=float)
+    order = np.argsort(values[:, 0], kind='stable')
+    entries = [entries[i] for i in order]
+    timestamps, temperature, humidity, wind_speed, rainfall, weather_id = values[order].T
+    timestamps, weather_id = timestamps.astype(np.int64), weather_id.astype(np.int64)
+    severity = CONDITION_SEVERITY[np.clip(weather_id // 100, 0, len(CONDITION_SEVERITY) - 1)]
+    
+    utc_offset = (forecast_data.get('city') or {}).get('timezone')
+    if utc_offset is None:
+        utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+    day_numbers = (timestamps + int(utc_offset)) // 86400
+    # Entries are in time order, so each day is one run of them
+    _, starts, counts = np.unique(day_numbers, return_index=True, return_counts=True)
+    
+    day_rainfall = np.add.reduceat(rainfall, starts)[:days]
+    day_temp = np.maximum.reduceat(temperature, starts)[:days]
+    day_humidity = (np.add.reduceat(humidity, starts) / counts)[:days]
+    day_wind_speed = np.maximum.reduceat(wind_speed, starts)[:days]
+    starts, counts = starts[:days], counts[:days]
+    # First entry of the most severe condition of each day
+    worst = [start + int(np.argmax(severity[start:start + count])) for start, count in zip(starts, counts)]
+    day_flood_prob, day_cyclone_prob, day_heatwave_prob = disaster_probabilities(
+        day_temp, day_rainfall, day_wind_speed, weather_id[worst]
+    )
+    
+    forecast = []
+    for i, start in enumerate(starts):
+        forecast.append({
+            "date": datetime.fromtimestamp(int(day_numbers[start]) * 86400, tz=timezone.utc).strftime("%Y-%m-%d"),
+            "temperature": round(float(day_temp[i]), 1),
+            "humidity": round(float(day_humidity[i]), 1),
+            "rainfall": round(float(day_rainfall[i]), 1),
+            "wind_speed": round(float(day_wind_speed[i]), 1),
+            "flood_probability": round(float(day_flood_prob[i]), 3),
+            "cyclone_probability": round(float(day_cyclone_prob[i]), 3),
+            "heatwave_probability": round(float(day_heatwave_prob[i]), 3),
+            "weather_description": entries[worst[i]]['weather'][0]['description']
+        })
+    return forecast
 
 def generate_synthetic_weather(location_name: str) -> Dict[str, Any]:
     """
@@ -236,10 +613,7 @@ def generate_synthetic_weather(location_name: str) -> Dict[str, Any]:
         Dictionary with synthetic weather data
     """
     # Get coordinates for the location
-    if location_name not in INDIAN_STATES:
-        coords = INDIAN_STATES["Delhi"]
-    else:
-        coords = INDIAN_STATES[location_name]
+    coords = INDIAN_STATES.get(location_name, INDIAN_STATES["Delhi"])
     
     # Current date and month for seasonal patterns
     now = datetime.now()
@@ -377,6 +751,9 @@ def update_climate_data_with_real_weather(db_session, location_id: int, location
     """
     Update climate data in the database with real-time weather data
     
+    Nothing is written when no real-time weather can be had: synthetic
+    weather must not be stored as observed data.
+    
     Args:
         db_session: SQLAlchemy database session
         location_id: Location ID
@@ -386,56 +763,181 @@ def update_climate_data_with_real_weather(db_session, location_id: int, location
         True if successful, False otherwise
     """
     try:
-        from sqlalchemy import update
-        from ..models.models import ClimateData
-        
         # Get real-time weather data
-        weather_data = get_real_time_weather(location_name)
-        
-        # Get current date
-        current_date = datetime.now().date()
-        
-        # Update or insert climate data for today
-        stmt = update(ClimateData).where(
-            ClimateData.location_id == location_id,
-            ClimateData.date == current_date,
-            ClimateData.is_projected == False
-        ).values(
-            temperature=weather_data["temperature"],
-            humidity=weather_data["humidity"],
-            rainfall=weather_data["rainfall"],
-            flood_probability=weather_data["flood_probability"],
-            cyclone_probability=weather_data["cyclone_probability"],
-            heatwave_probability=weather_data["heatwave_probability"],
-            last_updated=current_date
-        )
-        
-        result = db_session.execute(stmt)
-        
-        # If no rows were updated, insert new record
-        if result.rowcount == 0:
-            from ..models.models import ClimateData
-            
-            new_climate = ClimateData(
-                location_id=location_id,
-                date=current_date,
-                temperature=weather_data["temperature"],
-                humidity=weather_data["humidity"],
-                rainfall=weather_data["rainfall"],
-                flood_probability=weather_data["flood_probability"],
-                cyclone_probability=weather_data["cyclone_probability"],
-                heatwave_probability=weather_data["heatwave_probability"],
-                is_projected=False,
-                last_updated=current_date
-            )
-            
-            db_session.add(new_climate)
+        source = weather_location(location_name)
+        if source is None:
+            logger.warning(f"No coordinates for {location_name}; climate data not updated")
+            return False
+        weather_data = observed_weather([source])[0][source]
+        if weather_data is None:
+            logger.warning(f"No real-time weather for {location_name}; climate data not updated")
+            return False
         
-        db_session.commit()
+        upsert_climate_data(db_session, {location_id: weather_data}, datetime.now().date())
         logger.info(f"Updated climate data for {location_name} with real-time weather data")
         return True
         
     except Exception as e:
         logger.error(f"Error updating climate data with real-time weather: {e}")
-        db_session.rollback()
         return False
+
+def observed_weather(location_names: List[str]) -> Tuple[Dict[str, Optional[Dict[str, Any]]], List[str]]:
+    """
+    Real-time weather of states/UTs to write to the database
+    
+    Weather cached less than CACHE_DURATION ago is used as is, and that of
+    the other locations is fetched concurrently. Locations whose fetch
+    fails map to None rather than to synthetic data.
+    
+    Returns:
+        Tuple of the weather data by location name and the names fetched
+    """
+    weather, stale = {}, []
+    now = time.time()
+    for location_name in dict.fromkeys(location_names):
+        cached = _cached_entry(location_name)
+        if cached is not None and now - cached['fetched_at'] < CACHE_DURATION:
+            weather[location_name] = cached['data']
+        else:
+            stale.append(location_name)
+    weather.update(fetch_weather(stale))
+    return weather, stale
+
+def refresh_climate_data_with_real_weather(db_session) -> Dict[str, Any]:
+    """
+    Write today's real-time weather of every location to the database
+    
+    Districts generated by the larger dataset profiles get the weather of
+    their state/UT, so each state/UT is fetched once. Locations without
+    known coordinates are skipped, and those whose fetch fails are left out
+    rather than given synthetic data. All rows are written in one
+    transaction by upsert_climate_data.
+    
+    Returns:
+        Dictionary with the date written, the number of locations updated,
+        skipped and fetched, and the names of the states/UTs that failed
+    """
+    from ..models.models import Location
+    
+    locations = db_session.query(Location.id, Location.name).order_by(Location.id).all()
+    sources = {location_id: weather_location(name) for location_id, name in locations}
+    skipped = [name for location_id, name in locations if sources[location_id] is None]
+    if skipped:
+        logger.warning(f"No coordinates for {len(skipped)} locations, e.g. {skipped[0]}; not updated")
+    weather, fetched = observed_weather([source for source in sources.values() if source is not None])
+    
+    rows = {
+        location_id: weather[source] for location_id, source in sources.items()
+        if source is not None and weather[source] is not None
+    }
+    current_date = datetime.now().date()
+    if rows:
+        upsert_climate_data(db_session, rows, current_date)
+    failed = [source for source, data in weather.items() if data is None]
+    if failed:
+        logger.warning(f"No real-time weather for {len(failed)} locations: {', '.join(failed)}")
+    logger.info(f"Updated climate data for {len(rows)} locations with real-time weather data")
+    return {
+        "date": current_date.isoformat(),
+        "updated": len(rows),
+        "skipped": len(skipped),
+        "fetched": len(fetched),
+        "failed": failed
+    }
+
+def run_climate_data_refresh() -> Dict[str, Any]:
+    """refresh_climate_data_with_real_weather on a session of its own, for scheduled jobs"""
+    from ..models.database import SessionLocal
+    
+    db_session = SessionLocal()
+    try:
+        return refresh_climate_data_with_real_weather(db_session)
+    finally:
+        db_session.close()
+
+_observed_index_ready = False
+
+def ensure_observed_climate_index(db_session) -> None:
+    """
+    Create the unique index upserts of climate data rely on, once per process
+    
+    New databases get it from create_all; this adds it to tables created
+    before it existed. It cannot be created while a location has more than
+    one observed row for a day, and the error says so.
+    """
+    global _observed_index_ready
+    if _observed_index_ready:
+        return
+    from ..models.models import OBSERVED_CLIMATE_DAY_INDEX
+    
+    try:
+        OBSERVED_CLIMATE_DAY_INDEX.create(bind=db_session.connection(), checkfirst=True)
+    except Exception as e:
+        db_session.rollback()
+        raise RuntimeError(
+            f"Could not create index {OBSERVED_CLIMATE_DAY_INDEX.name}; remove duplicate observed "
+            f"climate_data rows (same location_id and date) first: {e}"
+        ) from e
+    _observed_index_ready = True
+
+def upsert_climate_data(db_session, weather_by_location: Dict[int, Dict[str, Any]], day) -> int:
+    """
+    Insert or update the observed climate data of many locations for a day
+    
+    One INSERT ... ON CONFLICT DO UPDATE statement, committed as a single
+    transaction (PostgreSQL and SQLite).
+    
+    Args:
+        db_session: SQLAlchemy database session
+        weather_by_location: Weather data by location ID
+        day: Date of the rows
+        
+    Returns:
+        Number of rows written
+    """
+    from sqlalchemy.dialects import postgresql, sqlite
+    from ..models.models import ClimateData
+    
+    if not weather_by_location:
+        return 0
+    dialect = db_session.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert
+    elif dialect == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"Upserting climate data is not supported on {dialect}")
+    
+    ensure_observed_climate_index(db_session)
+    rows = [
+        {
+            "location_id": location_id,
+            "date": day,
+            "temperature": weather_data["temperature"],
+            "humidity": weather_data["humidity"],
+            "rainfall": weather_data["rainfall"],
+            "flood_probability": weather_data["flood_probability"],
+            "cyclone_probability": weather_data["cyclone_probability"],
+            "heatwave_probability": weather_data["heatwave_probability"],
+            "is_projected": False,
+            "last_updated": day
+        }
+        for location_id, weather_data in weather_by_location.items()
+    ]
+    stmt = insert(ClimateData).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ClimateData.location_id, ClimateData.date],
+        index_where=ClimateData.is_projected == False,
+        set_={
+            column: stmt.excluded[column]
+            for column in ("temperature", "humidity", "rainfall", "flood_probability",
+                           "cyclone_probability", "heatwave_probability", "last_updated")
+        }
+    )
+    try:
+        db_session.execute(stmt)
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+        raise
+    return len(rows)
@@ -2,6 +2,8 @@
 Custom scaler classes for the ML models
 This module contains scaler classes that can be pickled and loaded by any module
 """
+import numpy as np
+
 
 class DummyScaler:
     """A simple scaler that doesn't transform the data.
@@ -18,3 +20,20 @@ class DummyScaler:
         
     def fit(self, X, y=None):
         return self
+
+
+class FittedScaler:
+    """Standard scaling with a known per-feature mean and scale.
+    Stands in for a fitted StandardScaler when scikit-learn is not imported.
+    """
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=float)
+        self.scale_ = np.asarray(scale, dtype=float)
+        self.var_ = self.scale_ ** 2
+        self.n_features_in_ = len(self.mean_)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+    def inverse_transform(self, y):
+        return np.asarray(y, dtype=float) * self.scale_ + self.mean_
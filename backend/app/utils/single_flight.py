@@ -0,0 +1,116 @@
+"""
+Request coalescing: concurrent callers asking for the same key share one call
+
+SingleFlight is for threads. While a call for a key is in flight, further
+callers for that key wait for it and get its result, or its exception,
+instead of starting their own. AsyncSingleFlight does the same for
+coroutines, running the call on a worker thread so that the event loop
+keeps serving other requests meanwhile.
+
+Nothing is kept once a call completes; caching results is the job of the
+caller (see app.utils.cache).
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key across threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counts = {'calls': 0, 'shared': 0}
+
+    def acquire(self, key):
+        """
+        The in-flight call for a key, and whether the caller leads it
+
+        A leader must run the work and pass the outcome to release; other
+        callers get the result from the call's wait.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counts['shared'] += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self._counts['calls'] += 1
+            return call, True
+
+    def release(self, key, call, result=None, error=None):
+        """Publish the outcome of a led call to its waiters"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result, call.error = result, error
+        call.done.set()
+
+    def do(self, key, fn, *args, **kwargs):
+        """fn(*args, **kwargs), shared with concurrent callers for the same key"""
+        call, leader = self.acquire(key)
+        if not leader:
+            return call.wait()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.release(key, call, error=e)
+            raise
+        self.release(key, call, result=result)
+        return result
+
+    def stats(self):
+        """Calls made, callers that shared one, and calls in flight"""
+        with self._lock:
+            return {**self._counts, 'in_flight': len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent calls per key across coroutines of one event loop"""
+
+    def __init__(self):
+        self._calls = {}
+        self._counts = {'calls': 0, 'shared': 0}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """
+        Run blocking fn(*args, **kwargs) on a worker thread, shared with
+        concurrent callers for the same key
+
+        A caller that is cancelled stops waiting but does not cancel the
+        call, which the other callers may still be waiting on.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            # In the leader's context, so the call sees its context variables
+            # (such as the model version pinned for its request)
+            context = contextvars.copy_context()
+            future = loop.run_in_executor(None, functools.partial(context.run, fn, *args, **kwargs))
+            self._calls[key] = future
+            self._counts['calls'] += 1
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self._counts['shared'] += 1
+        return await asyncio.shield(future)
+
+    def stats(self):
+        """Calls made, callers that shared one, and calls in flight"""
+        return {**self._counts, 'in_flight': len(self._calls)}
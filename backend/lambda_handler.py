@@ -1,6 +1,13 @@
 from mangum import Mangum
 from main import app
+from app.utils.openweather_api import run_climate_data_refresh
 
-handler = Mangum(app)
+asgi_handler = Mangum(app)
 
 
+def handler(event, context):
+    # EventBridge schedules invoke the function to refresh the climate data
+    # of all locations with real-time weather; everything else is the API
+    if isinstance(event, dict) and event.get("source") == "aws.events":
+        return run_climate_data_refresh()
+    return asgi_handler(event, context)
@@ -11,9 +11,11 @@ patch_bcrypt()
 
 from app.models.database import engine, Base, get_db
 from app.models.models import User
-from app.routers import auth, data, enhanced_predictions
-from app.utils.data_generator import generate_all_data
-from app.utils.data_processor import main as process_data
+from app.models.model_registry import get_registry
+from app.routers import auth, data, predictions, enhanced_predictions
+from app.utils.openweather_api import get_prefetcher
+from app.utils.data_generator import DATASET_PROFILES, DEFAULT_PROFILE
+from app.utils.data_processor import stream_generated_data
 
 # Set up logging
 logging.basicConfig(
@@ -38,9 +40,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def pin_model_version(request, call_next):
+    # Serve each request from one model version, even if another is swapped in meanwhile
+    with get_registry().pinned():
+        return await call_next(request)
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(data.router)
+app.include_router(predictions.router)
 app.include_router(enhanced_predictions.router)
 
 
@@ -59,11 +69,20 @@ async def health():
 
 
 @app.get("/setup", status_code=status.HTTP_200_OK)
-async def setup_system(db: Session = Depends(get_db)):
+async def setup_system(profile: str = DEFAULT_PROFILE, db: Session = Depends(get_db)):
     """
     Setup the system by generating synthetic data and processing it.
     This is a convenience endpoint for initial setup.
+    
+    The optional profile (small, medium, large or xl) sets the size of the
+    generated dataset for load testing.
     """
+    if profile not in DATASET_PROFILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown dataset profile. Choose from: {', '.join(DATASET_PROFILES)}"
+        )
+    
     try:
         # Check if system is already set up
         user_count = db.query(User).count()
@@ -71,13 +90,9 @@ async def setup_system(db: Session = Depends(get_db)):
         if user_count > 0:
             return {"message": "System is already set up"}
         
-        # Generate synthetic data
-        logger.info("Generating synthetic data...")
-        generate_all_data(save_path="./data/raw")
-        
-        # Process data
-        logger.info("Processing data...")
-        process_data()
+        # Generate synthetic data straight into the database (no CSV round trip)
+        logger.info("Generating and loading synthetic data...")
+        stream_generated_data(profile=profile)
         
         # Create admin user
         logger.info("Creating admin user...")
@@ -128,6 +143,17 @@ async def startup_event():
     # Create database tables if they don't exist
     Base.metadata.create_all(bind=engine)
     logger.info("Database tables created or verified")
+    
+    # Pick up model versions activated by other workers or training jobs
+    get_registry().watch()
+    
+    # Keep the weather of every location cached ahead of requests
+    get_prefetcher().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    get_prefetcher().stop()
 
 
 if __name__ == "__main__":
@@ -21,7 +21,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Import app modules
 from app.models.database import Base, engine
 from app.models.models import Location, ClimateData
-from app.utils.openweather_api import get_real_time_weather, update_climate_data_with_real_weather
+from app.utils.openweather_api import get_real_time_weather_many, update_climate_data_with_real_weather
 from app.utils.health_conditions import predict_all_health_conditions, predict_hospital_resource_needs
 
 def run_enhanced_models():
@@ -37,13 +37,16 @@ def run_enhanced_models():
         locations = session.query(Location).all()
         logger.info(f"Found {len(locations)} locations")
         
+        # Fetch the weather of all locations concurrently
+        weather_by_location = get_real_time_weather_many([location.name for location in locations])
+        
         # Process each location
         for location in locations:
             logger.info(f"Processing location: {location.name} (ID: {location.id})")
             
             # Get real-time weather data
             try:
-                weather_data = get_real_time_weather(location.name)
+                weather_data = weather_by_location[location.name]
                 logger.info(f"Got weather data for {location.name}: {weather_data['temperature']}°C, {weather_data['humidity']}%, {weather_data['rainfall']}mm")
                 
                 # Update climate data in the database
@@ -24,19 +24,10 @@ for path in ["data/raw", "data/processed", "models"]:
     logger.info(f"Directory '{path}' exists: {os.path.exists(path)}")
 
 try:
-    # Generate synthetic data
-    logger.info("Step 1: Generating synthetic data...")
-    from app.utils.data_generator import generate_all_data
-    data = generate_all_data(save_path="./data/raw")
-    logger.info(f"Generated data for {len(data['locations'])} locations")
-    logger.info(f"Climate data points: {len(data['climate'])}")
-    logger.info(f"Health data points: {len(data['health'])}")
-    logger.info(f"Hospital data points: {len(data['hospital'])}")
-    
-    # Process data
-    logger.info("Step 2: Processing data...")
-    from app.utils.data_processor import main as process_data
-    process_data()
+    # Generate synthetic data and load it directly into the database
+    logger.info("Step 1-2: Generating and loading synthetic data...")
+    from app.utils.data_processor import stream_generated_data
+    stream_generated_data()
     
     # Train models
     logger.info("Step 3: Training ML models...")
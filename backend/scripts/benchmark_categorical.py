@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Memory/latency comparison of one-hot versus native categorical encoding.
+
+Generates a synthetic dataset into a throwaway SQLite database (the 'medium'
+profile has 720 locations) and trains the overall risk classifier twice: once
+with the previous string-cast OneHotEncoder/ColumnTransformer preprocessing and
+once with CategoricalPreprocessor and XGBoost's native categorical support.
+
+Usage:
+    python scripts/benchmark_categorical.py --profile medium
+"""
+import argparse
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+NUMERIC_FEATURES = ['temperature', 'rainfall', 'humidity',
+                    'flood_probability', 'cyclone_probability', 'heatwave_probability']
+CATEGORICAL_FEATURES = ['location_id', 'month']
+
+
+def matrix_bytes(X):
+    """Memory held by a transformed feature matrix (sparse, dense or DataFrame)"""
+    if hasattr(X, "memory_usage"):
+        return int(X.memory_usage(deep=True).sum())
+    if hasattr(X, "data") and hasattr(X, "indices"):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def onehot_preprocessor():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    return ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), NUMERIC_FEATURES),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_FEATURES)
+        ]
+    )
+
+
+def run_variant(label, X, y, preprocessor, classifier_options, n_jobs, repeat):
+    import numpy as np
+    import xgboost as xgb
+
+    start = time.perf_counter()
+    X_encoded = preprocessor.fit_transform(X)
+    encode_time = time.perf_counter() - start
+
+    classifier = xgb.XGBClassifier(
+        n_estimators=100, learning_rate=0.1, max_depth=5, random_state=42,
+        n_jobs=n_jobs, **classifier_options
+    )
+    start = time.perf_counter()
+    classifier.fit(X_encoded, y)
+    fit_time = time.perf_counter() - start
+
+    row = X.iloc[[0]]
+    single = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        classifier.predict_proba(preprocessor.transform(row))
+        single.append(time.perf_counter() - start)
+
+    batch = X.drop_duplicates('location_id')
+    start = time.perf_counter()
+    classifier.predict_proba(preprocessor.transform(batch))
+    batch_time = time.perf_counter() - start
+
+    return {
+        'label': label,
+        'width': X_encoded.shape[1],
+        'matrix_mb': matrix_bytes(X_encoded) / 1e6,
+        'model_mb': len(pickle.dumps((preprocessor, classifier))) / 1e6,
+        'encode_s': encode_time,
+        'fit_s': fit_time,
+        'single_ms': float(np.median(single)) * 1000,
+        'batch_ms': batch_time * 1000,
+        'batch_rows': len(batch)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-hot and native categorical encoding")
+    parser.add_argument("--profile", default="medium", help="Dataset profile (small, medium, large, xl)")
+    parser.add_argument("--history-days", type=int, help="Override the profile's history length")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count(), help="XGBoost threads")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=200, help="Single-row predictions to time")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="categorical-benchmark-")
+    os.chdir(workdir)
+
+    # The database engine is created at import time, so point it at the
+    # throwaway database before importing anything from app
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/benchmark.db"
+    from sklearn.preprocessing import LabelEncoder
+    from app.utils.data_processor import stream_generated_data
+    from app.models import ml_models, feature_store, model_registry
+
+    logging.getLogger().setLevel(logging.WARNING)
+    ml_models.MODEL_DIR = workdir
+    feature_store.FEATURE_STORE_DIR = workdir
+    model_registry.REGISTRY_DIR = os.path.join(workdir, "registry")
+
+    print(f"Generating '{args.profile}' dataset in {workdir} ...")
+    stream_generated_data(seed=args.seed, profile=args.profile, history_days=args.history_days)
+
+    classifier = ml_models.RiskClassifier()
+    df = classifier.load_training_data()
+    X, y = classifier.prepare_features_target(df, 'overall')
+    y = LabelEncoder().fit_transform(y.astype(str))
+    print(f"Training samples: {len(X)}, locations: {X['location_id'].nunique()}")
+
+    # The previous pipeline cast the categorical columns to strings first
+    X_strings = X.astype({column: str for column in CATEGORICAL_FEATURES})
+
+    results = [
+        run_variant("one-hot", X_strings, y, onehot_preprocessor(), {}, args.n_jobs, args.repeat),
+        run_variant(
+            "categorical", X, y,
+            ml_models.CategoricalPreprocessor(NUMERIC_FEATURES, CATEGORICAL_FEATURES),
+            {'tree_method': 'hist', 'enable_categorical': True}, args.n_jobs, args.repeat
+        )
+    ]
+
+    header = f"{'encoding':>12} {'width':>6} {'matrix MB':>10} {'model MB':>9} {'encode s':>9} {'fit s':>7} {'1-row ms':>9} {'batch ms':>9}"
+    print(header)
+    for r in results:
+        print(f"{r['label']:>12} {r['width']:>6} {r['matrix_mb']:>10.2f} {r['model_mb']:>9.2f} "
+              f"{r['encode_s']:>9.3f} {r['fit_s']:>7.2f} {r['single_ms']:>9.2f} {r['batch_ms']:>9.2f}")
+    print(f"(batch = one row per location, {results[0]['batch_rows']} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Single-row latency benchmark for the risk models.
+
+Generates a synthetic dataset into a throwaway SQLite database, trains the
+risk models and times one prediction for all five diseases, as the ML
+fallback of RiskClassifier.predict_risk makes it, three ways:
+
+    pipeline   sklearn Pipeline with ColumnTransformer/OneHotEncoder on a
+               one-row DataFrame, calling predict and predict_proba
+    dataframe  CategoricalPreprocessor.transform plus XGBClassifier on a
+               one-row DataFrame, calling predict and predict_proba
+    compiled   RiskModel.predict_with_proba: NumPy encoding fed to
+               Booster.inplace_predict, one call per disease
+
+Usage:
+    python scripts/benchmark_inference.py --repeat 500
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+NUMERIC_FEATURES = ['temperature', 'rainfall', 'humidity',
+                    'flood_probability', 'cyclone_probability', 'heatwave_probability']
+CATEGORICAL_FEATURES = ['location_id', 'month']
+
+
+def train_pipelines(classifier, df):
+    """One-hot encoded Pipelines, as the risk models were built originally"""
+    import xgboost as xgb
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+
+    pipelines = {}
+    for disease in classifier.models:
+        X, y = classifier.prepare_features_target(df, disease)
+        X = X.astype({column: str for column in CATEGORICAL_FEATURES})
+        pipeline = Pipeline(steps=[
+            ('preprocessor', ColumnTransformer(transformers=[
+                ('num', StandardScaler(), NUMERIC_FEATURES),
+                ('cat', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_FEATURES)
+            ])),
+            ('classifier', xgb.XGBClassifier(n_estimators=100, learning_rate=0.1, max_depth=5, random_state=42))
+        ])
+        pipelines[disease] = pipeline.fit(X, LabelEncoder().fit_transform(y.astype(str)))
+    return pipelines
+
+
+def time_call(fn, repeat):
+    import numpy as np
+
+    fn()  # Warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000, float(np.percentile(timings, 99)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-row risk inference")
+    parser.add_argument("--profile", default="small", help="Dataset profile (small, medium, large, xl)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=500, help="Predictions to time per path")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="inference-benchmark-")
+    os.chdir(workdir)
+
+    # The database engine is created at import time, so point it at the
+    # throwaway database before importing anything from app
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/benchmark.db"
+    import pandas as pd
+    from app.utils.data_processor import stream_generated_data
+    from app.models import ml_models, feature_store, model_registry
+
+    logging.getLogger().setLevel(logging.WARNING)
+    ml_models.MODEL_DIR = workdir
+    feature_store.FEATURE_STORE_DIR = workdir
+    model_registry.REGISTRY_DIR = os.path.join(workdir, "registry")
+
+    print(f"Generating '{args.profile}' dataset in {workdir} ...")
+    stream_generated_data(seed=args.seed, profile=args.profile)
+    features = feature_store.get_feature_frame()
+
+    trainer = ml_models.RiskClassifier()
+    trainer.train_risk_models(features=features.copy())
+    pipelines = train_pipelines(trainer, trainer.load_training_data(features.copy()))
+
+    # Serve the compiled models the way the routers do, from the registry
+    classifier = ml_models.RiskClassifier()
+    classifier.load_models()
+    models = {disease: classifier.models[disease] for disease in classifier.models}
+
+    row = {
+        'location_id': 3, 'month': 7, 'temperature': 31.5, 'rainfall': 120.0, 'humidity': 82.0,
+        'flood_probability': 0.35, 'cyclone_probability': 0.1, 'heatwave_probability': 0.05
+    }
+
+    def pipeline_path():
+        input_df = pd.DataFrame([{**row, 'location_id': str(row['location_id']), 'month': str(row['month'])}])
+        for pipeline in pipelines.values():
+            pipeline.predict(input_df)
+            pipeline.predict_proba(input_df)
+
+    def dataframe_path():
+        input_df = pd.DataFrame([row])
+        for model in models.values():
+            proba = model.classifier.predict_proba(model.preprocessor.transform(input_df))
+            model.classifier.predict_proba(model.preprocessor.transform(input_df))
+            model.classes_[proba.argmax(axis=1)]
+
+    def compiled_path():
+        for model in models.values():
+            model.predict_with_proba(row)
+
+    print(f"Five risk models, one row, {args.repeat} repeats")
+    print(f"{'path':>10} {'median ms':>10} {'p99 ms':>8}")
+    results = {}
+    for label, fn in [("pipeline", pipeline_path), ("dataframe", dataframe_path), ("compiled", compiled_path)]:
+        results[label] = time_call(fn, args.repeat)
+        print(f"{label:>10} {results[label][0]:>10.3f} {results[label][1]:>8.3f}")
+
+    print(f"   speedup: {results['pipeline'][0] / results['compiled'][0]:.1f}x over pipeline, "
+          f"{results['dataframe'][0] / results['compiled'][0]:.1f}x over dataframe")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Request latency while new model versions are rolled out.
+
+Generates a synthetic dataset into a throwaway SQLite database and publishes
+three versions of the risk models, trained on different samples. Client
+threads then predict through a serving registry, as an API worker does,
+while a second registry instance (another worker or a training job)
+activates the versions in turn. Cycling through three versions means every
+activation needs models that are no longer cached.
+
+Runs three times: without rollouts as a baseline, with requests re-reading
+the manifest and loading the new version's models on first use (the
+behaviour before preloading), and with the serving registry's watcher thread
+preloading each new version before swapping it in.
+
+Usage:
+    python scripts/benchmark_reload.py --duration 10
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+
+def run_variant(mode, registry_dir, versions, args):
+    import numpy as np
+    from app.models import model_registry
+    from app.models.ml_models import RiskClassifier, RiskModel
+
+    serving = model_registry.ModelRegistry(registry_dir)
+    deployer = model_registry.ModelRegistry(registry_dir)
+    deployer.activate(versions[0])
+
+    classifier = RiskClassifier()
+    classifier.models = model_registry.LazyModels(
+        serving, classifier.models, RiskModel.from_artifact, key=lambda d: f"{d}_risk"
+    )
+    row = {
+        'location_id': 3, 'month': 7, 'temperature': 31.5, 'rainfall': 120.0, 'humidity': 82.0,
+        'flood_probability': 0.35, 'cyclone_probability': 0.1, 'heatwave_probability': 0.05
+    }
+    for disease in classifier.models:
+        classifier.models[disease].predict_with_proba(row)
+
+    if mode == 'preload':
+        serving.watch(args.interval)
+
+    latencies, errors = [], []
+    stop = threading.Event()
+
+    def client():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                if mode == 'lazy':
+                    # Forget the builders so that nothing is preloaded and the
+                    # new version's models load on first use
+                    serving._builders.clear()
+                    serving.manifest(reload=True)
+                for disease in classifier.models:
+                    classifier.models[disease].predict_with_proba(row)
+            except Exception as e:
+                errors.append(e)
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+
+    rollouts = 0
+    deadline = time.perf_counter() + args.duration
+    while time.perf_counter() < deadline:
+        time.sleep(args.rollout_every)
+        if mode != 'steady':
+            rollouts += 1
+            deployer.activate(versions[rollouts % len(versions)])
+
+    time.sleep(args.interval * 2)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    serving.stop_watching()
+
+    served = serving.active_version == deployer.active_version
+    latencies = np.array(latencies) * 1000
+    print(f"{mode:>10} {rollouts:>9} {len(latencies):>9} {len(errors):>7} "
+          f"{np.median(latencies):>7.2f} {np.percentile(latencies, 99):>7.2f} {latencies.max():>8.2f} "
+          f"{'yes' if served else 'no':>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request latency during model rollouts")
+    parser.add_argument("--profile", default="small", help="Dataset profile (small, medium, large, xl)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of traffic per variant")
+    parser.add_argument("--threads", type=int, default=1, help="Client threads")
+    parser.add_argument("--rollout-every", type=float, default=1.0, help="Seconds between activations")
+    parser.add_argument("--interval", type=float, default=0.2, help="Watcher poll interval")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="reload-benchmark-")
+    os.chdir(workdir)
+
+    # The database engine is created at import time, so point it at the
+    # throwaway database before importing anything from app
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/benchmark.db"
+    from app.utils.data_processor import stream_generated_data
+    from app.models import ml_models, feature_store, model_registry
+
+    logging.getLogger().setLevel(logging.WARNING)
+    ml_models.MODEL_DIR = workdir
+    feature_store.FEATURE_STORE_DIR = workdir
+    registry_dir = os.path.join(workdir, "registry")
+
+    print(f"Generating '{args.profile}' dataset in {workdir} ...")
+    stream_generated_data(seed=args.seed, profile=args.profile)
+    features = feature_store.get_feature_frame()
+
+    publisher = model_registry.ModelRegistry(registry_dir)
+    versions = []
+    for seed in range(3):
+        artifacts = ml_models.RiskClassifier().train_risk_models(
+            features=features.sample(frac=0.9, random_state=seed), publish=False
+        )
+        versions.append(publisher.publish(artifacts, note=f"sample {seed}"))
+
+    print(f"{args.threads} client threads, a rollout every {args.rollout_every}s")
+    print(f"{'models':>10} {'rollouts':>9} {'requests':>9} {'errors':>7} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'max ms':>8} {'current':>8}")
+    for mode in ['steady', 'lazy', 'preload']:
+        run_variant(mode, registry_dir, versions, args)
+
+
+if __name__ == "__main__":
+    main()
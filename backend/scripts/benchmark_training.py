@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Wall-clock benchmark for RiskClassifier.train_risk_models.
+
+Generates a synthetic dataset into a throwaway SQLite database and times
+training the five risk models one at a time versus concurrently.
+
+Usage:
+    python scripts/benchmark_training.py --profile medium --n-jobs 8
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark risk model training")
+    parser.add_argument("--profile", default="small", help="Dataset profile (small, medium, large, xl)")
+    parser.add_argument("--history-days", type=int, help="Override the profile's history length")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count(), help="Total CPU budget")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="training-benchmark-")
+    os.chdir(workdir)
+
+    # The database engine is created at import time, so point it at the
+    # throwaway database before importing anything from app
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/benchmark.db"
+    from app.utils.data_processor import stream_generated_data
+    from app.models import ml_models, feature_store, model_registry
+
+    logging.getLogger().setLevel(logging.WARNING)
+    ml_models.MODEL_DIR = workdir
+    feature_store.FEATURE_STORE_DIR = workdir
+    model_registry.REGISTRY_DIR = os.path.join(workdir, "registry")
+
+    print(f"Generating '{args.profile}' dataset in {workdir} ...")
+    stream_generated_data(seed=args.seed, profile=args.profile, history_days=args.history_days)
+    features = feature_store.get_feature_frame()
+    print(f"Training samples: {len(features)}, CPU budget: {args.n_jobs}")
+
+    results = {}
+    for label, max_workers in [("sequential", 1), ("concurrent", None)]:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            ml_models.RiskClassifier().train_risk_models(
+                n_jobs=args.n_jobs, max_workers=max_workers, features=features.copy()
+            )
+            timings.append(time.perf_counter() - start)
+        results[label] = min(timings)
+        print(f"{label:>10}: {results[label]:.2f}s (best of {args.repeat})")
+
+    print(f"   speedup: {results['sequential'] / results['concurrent']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
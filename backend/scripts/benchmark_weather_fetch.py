@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Weather refresh benchmark for all locations.
+
+Serves OpenWeather responses from the local stand-in (openweather_standin.py),
+which waits a fixed time per request, plus a further delay on every new
+connection to stand in for the TCP and TLS handshakes. Then fetches the
+current weather and forecast of every state and union territory two ways:
+
+    serial   two requests.get calls per location, one after the other and
+             each on a new connection, as get_real_time_weather made them
+    pooled   get_real_time_weather_many: all calls on the shared session,
+             MAX_CONCURRENCY at a time over kept-alive connections
+
+Usage:
+    python scripts/benchmark_weather_fetch.py --latency-ms 80 --handshake-ms 60
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+from scripts.openweather_standin import OpenWeatherStandIn
+
+
+def fetch_serial(openweather_api, names):
+    import requests
+
+    results = {}
+    for name in names:
+        coords = openweather_api.INDIAN_STATES[name]
+        params = {'lat': coords['lat'], 'lon': coords['lon'], 'appid': 'benchmark', 'units': 'metric'}
+        current = requests.get(f"{openweather_api.OPENWEATHER_BASE_URL}/weather", params=params)
+        forecast = requests.get(f"{openweather_api.OPENWEATHER_BASE_URL}/forecast", params=params)
+        results[name] = (current.json(), forecast.json())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetching the weather of all locations")
+    parser.add_argument("--latency-ms", type=float, default=80, help="Server time per request")
+    parser.add_argument("--handshake-ms", type=float, default=60, help="Extra delay per new connection")
+    parser.add_argument("--repeat", type=int, default=3, help="Refreshes per variant")
+    args = parser.parse_args()
+
+    from app.utils import openweather_api
+
+    logging.getLogger().setLevel(logging.WARNING)
+    standin = OpenWeatherStandIn(latency_ms=args.latency_ms, connect_ms=args.handshake_ms).start()
+    openweather_api.OPENWEATHER_BASE_URL = standin.base_url
+    names = list(openweather_api.INDIAN_STATES)
+
+    def pooled(names):
+        openweather_api.WEATHER_CACHE.clear()
+        results = openweather_api.get_real_time_weather_many(names)
+        assert all(result['weather_description'] != 'Generated weather data' for result in results.values())
+        return results
+
+    print(f"{len(names)} locations, {args.latency_ms:.0f}ms per request, {args.handshake_ms:.0f}ms per connection, "
+          f"MAX_CONCURRENCY={openweather_api.MAX_CONCURRENCY}")
+    print(f"{'variant':>8} {'median s':>9} {'requests':>9} {'connections':>12}")
+    for variant, fetch in [('serial', lambda: fetch_serial(openweather_api, names)), ('pooled', lambda: pooled(names))]:
+        timings = []
+        standin.reset_stats()
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fetch()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        counts = standin.stats()
+        print(f"{variant:>8} {timings[len(timings) // 2]:>9.2f} {counts.get('requests', 0) // args.repeat:>9} "
+              f"{counts.get('connections', 0) / args.repeat:>12.1f}")
+
+    standin.stop()
+
+
+if __name__ == "__main__":
+    main()
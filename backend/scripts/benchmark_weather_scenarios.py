@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Weather lookups under API failure scenarios, offline.
+
+Points app.utils.openweather_api at the local stand-in
+(openweather_standin.py), then has several threads call
+get_real_time_weather for a while, picking locations with a Zipf
+distribution so that a few states get most of the traffic, as dashboards
+do. This is repeated with the stand-in configured as:
+
+    healthy        80ms per call
+    slow           400ms per call, plus up to 400ms jitter
+    flaky          20% of calls fail with a 5xx error
+    hanging        10% of calls take longer than the read timeout
+    rate-limited   60 calls a minute, 429 beyond that
+    outage         every call fails
+
+Short cache and stale durations make entries expire during a run, and a
+short breaker reset makes the circuit breaker try the API again during one.
+Reports lookup latency, calls made to the API, retries, how often the
+breaker opened, the cache hit rate and the share of lookups answered with
+synthetic weather.
+
+Usage:
+    python scripts/benchmark_weather_scenarios.py --duration 10 --threads 8
+    python scripts/benchmark_weather_scenarios.py --scenario flaky --scenario outage
+"""
+import argparse
+import logging
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+from scripts.openweather_standin import OpenWeatherStandIn
+
+SCENARIOS = {
+    'healthy': {'latency_ms': 80},
+    'slow': {'latency_ms': 400, 'jitter_ms': 400},
+    'flaky': {'latency_ms': 80, 'error_rate': 0.2},
+    'hanging': {'latency_ms': 80, 'hang_rate': 0.1},
+    'rate-limited': {'latency_ms': 80, 'rate_limit': 60},
+    'outage': {'latency_ms': 20, 'error_rate': 1.0},
+}
+NO_FAULTS = {'latency_ms': 0, 'jitter_ms': 0, 'connect_ms': 0, 'error_rate': 0.0, 'hang_rate': 0.0, 'rate_limit': None}
+SYNTHETIC_DESCRIPTION = "Generated weather data"
+
+
+def zipf_weights(n, s=1.1):
+    return [1 / rank ** s for rank in range(1, n + 1)]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def run_scenario(openweather_api, names, duration, threads, seed):
+    weights = zipf_weights(len(names))
+    latencies, synthetic = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        local, local_synthetic = [], 0
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            weather = openweather_api.get_real_time_weather(name)
+            local.append(time.perf_counter() - start)
+            local_synthetic += weather['weather_description'] == SYNTHETIC_DESCRIPTION
+            # Think time between a user's requests
+            time.sleep(rng.uniform(0.005, 0.02))
+        with lock:
+            latencies.extend(local)
+            synthetic[0] += local_synthetic
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, synthetic[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark weather lookups under API failure scenarios")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run (repeatable; default all)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent callers")
+    parser.add_argument("--cache-s", type=float, default=3, help="CACHE_DURATION for the run")
+    parser.add_argument("--stale-s", type=float, default=3, help="STALE_DURATION for the run")
+    parser.add_argument("--read-timeout", type=float, default=2, help="Read timeout of API calls")
+    parser.add_argument("--breaker-reset", type=float, default=3, help="Seconds the circuit breaker stays open")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from app.utils import openweather_api
+    from app.utils.cache import TTLCache
+    from app.utils.circuit_breaker import CircuitBreaker, RetryBudget
+
+    logging.getLogger().setLevel(logging.CRITICAL)
+    standin = OpenWeatherStandIn(seed=args.seed, hang_s=args.read_timeout + 1).start()
+    openweather_api.OPENWEATHER_BASE_URL = standin.base_url
+    openweather_api.CACHE_DURATION = args.cache_s
+    openweather_api.REQUEST_TIMEOUT = (1, args.read_timeout)
+    names = list(openweather_api.INDIAN_STATES)
+
+    print(f"{len(names)} locations (Zipf), {args.threads} threads, {args.duration:.0f}s per scenario, "
+          f"cache {args.cache_s:.0f}s + stale {args.stale_s:.0f}s, read timeout {args.read_timeout:.0f}s, "
+          f"breaker reset {args.breaker_reset:.0f}s")
+    print(f"{'scenario':>13} {'lookups':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'API calls':>10} "
+          f"{'failed':>7} {'retries':>8} {'opened':>7} {'hit rate':>9} {'synthetic':>10}")
+    for scenario in args.scenario or SCENARIOS:
+        openweather_api.WEATHER_CACHE = TTLCache(
+            maxsize=openweather_api.WEATHER_CACHE_SIZE, ttl=args.cache_s + args.stale_s)
+        breaker = openweather_api.OPENWEATHER_BREAKER
+        openweather_api.OPENWEATHER_BREAKER = CircuitBreaker(
+            breaker.name, breaker.failure_threshold, breaker.min_calls, breaker.window, args.breaker_reset)
+        openweather_api.RETRY_BUDGET = RetryBudget()
+        standin.configure(**{**NO_FAULTS, **SCENARIOS[scenario]})
+        standin.reset_stats()
+
+        latencies, synthetic = run_scenario(openweather_api, names, args.duration, args.threads, args.seed)
+        # Let background refreshes of this scenario finish before the next one
+        time.sleep(args.read_timeout + 1)
+        counts = standin.stats()
+        failed = sum(n for status, n in counts['statuses'].items() if status != '200')
+        cache = openweather_api.WEATHER_CACHE.stats()
+        client = openweather_api.get_client_stats()
+        print(f"{scenario:>13} {len(latencies):>8} {percentile(latencies, 0.5) * 1000:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f} {max(latencies, default=0) * 1000:>8.1f} "
+              f"{counts.get('requests', 0):>10} {failed:>7} {client['retry_budget']['retries']:>8} "
+              f"{client['circuit_breaker']['opened']:>7} {cache['hit_rate'] or 0:>9.1%} "
+              f"{synthetic / max(1, len(latencies)):>10.1%}")
+
+    standin.stop()
+
+
+if __name__ == "__main__":
+    main()
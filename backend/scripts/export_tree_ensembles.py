@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Export the active version's XGBoost models as NumPy tree ensembles.
+
+Models trained since tree ensembles were introduced are published with a
+'<name>_trees' entry next to each booster. This script adds those entries to
+a version published before then, so the API can serve it with
+MODEL_BACKEND=numpy. Every exported ensemble is checked against the native
+booster on random encoded inputs, including missing values and unseen
+categories, and nothing is published if any prediction differs by more than
+the tolerance, relative to the prediction's size where that exceeds 1 (the
+ensembles sum leaf values in float32, in a different order than XGBoost).
+
+Usage:
+    python scripts/export_tree_ensembles.py --rows 10000
+    python scripts/export_tree_ensembles.py --check-only
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+BUILDERS = {'risk': 'RiskModel', 'resource': 'ResourceModel'}
+
+
+def random_inputs(preprocessor, rows, rng):
+    """Encoded feature matrix like CategoricalPreprocessor.encode returns"""
+    import numpy as np
+
+    numeric = rng.normal(scale=1.5, size=(rows, len(preprocessor.numeric_features)))
+    categorical = []
+    for categories in preprocessor.categories_.values():
+        codes = rng.integers(0, len(categories), size=rows).astype(float)
+        codes[rng.random(rows) < 0.05] = np.nan  # Unseen categories
+        categorical.append(codes)
+    X = np.column_stack([numeric] + categorical)
+    X[rng.random(X.shape) < 0.01] = np.nan
+    return X
+
+
+def median_us(fn, X, repeat=200):
+    import numpy as np
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export XGBoost models as NumPy tree ensembles")
+    parser.add_argument("--registry-dir", help="Model registry directory (default: the app's)")
+    parser.add_argument("--rows", type=int, default=10000, help="Random rows for the parity check")
+    parser.add_argument("--tolerance", type=float, default=1e-5, help="Largest allowed relative difference")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--check-only", action="store_true", help="Check parity without publishing")
+    args = parser.parse_args()
+
+    import numpy as np
+    from app.models import ml_models
+    from app.models.model_registry import get_registry
+
+    logging.getLogger().setLevel(logging.WARNING)
+    registry = get_registry(args.registry_dir)
+    version = registry.active_version
+    if version is None:
+        sys.exit("No active model version")
+    models = registry.manifest()['versions'][version]['models']
+    rng = np.random.default_rng(args.seed)
+
+    print(f"Version {version}, {args.rows} random rows per model")
+    print(f"{'model':>16} {'nodes':>7} {'max diff':>10} {'xgboost ms':>11} {'numpy ms':>9} {'1-row xgb µs':>13} {'1-row numpy µs':>15}")
+    artifacts, failed = {}, False
+    for name, entry in sorted(models.items()):
+        model_type = entry['metadata'].get('type')
+        if model_type not in BUILDERS or entry['format'] != 'ubj':
+            continue
+
+        model = getattr(ml_models, BUILDERS[model_type]).from_artifact(entry, registry.object_path(entry))
+        artifact = model.to_artifact(trees=True)
+        ensemble = artifact['booster']
+
+        X = random_inputs(model.preprocessor, args.rows, rng)
+        start = time.perf_counter()
+        native = model.booster.inplace_predict(X)
+        native_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        exported = ensemble.inplace_predict(X)
+        numpy_ms = (time.perf_counter() - start) * 1000
+
+        single_native = median_us(model.booster.inplace_predict, X[:1])
+        single_numpy = median_us(ensemble.inplace_predict, X[:1])
+
+        diff = float((np.abs(native - exported) / np.maximum(1, np.abs(native))).max())
+        failed |= diff > args.tolerance
+        print(f"{name:>16} {len(ensemble.feature):>7} {diff:>10.2e} {native_ms:>11.2f} {numpy_ms:>9.2f} "
+              f"{single_native:>13.1f} {single_numpy:>15.1f}")
+        artifacts[f"{name}_trees"] = artifact
+
+    if failed:
+        sys.exit(f"Exported ensembles differ from the boosters by more than {args.tolerance}")
+    if not artifacts:
+        sys.exit("No XGBoost models in the active version")
+    if not args.check_only:
+        print(f"Published version {registry.publish(artifacts, note='tree ensembles')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenWeather API.
+
+Serves /data/2.5/weather and /data/2.5/forecast for any coordinates, so
+app.utils.openweather_api can be benchmarked and tested offline. Responses
+are replayed from recordings where there is one for the coordinates, and
+otherwise synthesized in the OpenWeather format, deterministically per
+location and seed.
+
+Every response can be made slow, fail or be throttled:
+
+    --latency-ms / --jitter-ms   time per request, plus a uniform random extra
+    --connect-ms                 delay on each new connection (TCP and TLS setup)
+    --error-rate                 share of requests answered with a 5xx error
+    --hang-rate, --hang-s        share of requests held for hang-s seconds
+                                 before answering (to trip client timeouts)
+    --rate-limit                 requests per minute, answered with 429 beyond
+                                 that, as OpenWeather's free tier does
+
+GET /__stats returns request, status and connection counts, and POST
+/__config with a JSON object changes any of the settings above while the
+server runs (for example to simulate an outage and recovery).
+
+Usage:
+    python scripts/openweather_standin.py serve --port 8089 --latency-ms 120 --error-rate 0.05
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8089/data/2.5 uvicorn main:app
+
+    # Record live responses for every state, then replay them
+    OPENWEATHER_API_KEY=... python scripts/openweather_standin.py record --out recordings/
+    python scripts/openweather_standin.py serve --recordings recordings/
+
+The benchmark scripts start it in-process through OpenWeatherStandIn.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+SETTINGS = ('latency_ms', 'jitter_ms', 'connect_ms', 'error_rate', 'hang_rate', 'hang_s', 'rate_limit')
+
+# (id, main, description, icon) of the conditions synthesized responses use
+CONDITIONS = [
+    (800, 'Clear', 'clear sky', '01d'),
+    (802, 'Clouds', 'scattered clouds', '03d'),
+    (804, 'Clouds', 'overcast clouds', '04d'),
+    (500, 'Rain', 'light rain', '10d'),
+    (501, 'Rain', 'moderate rain', '10d'),
+    (502, 'Rain', 'heavy intensity rain', '10d'),
+    (211, 'Thunderstorm', 'thunderstorm', '11d'),
+]
+
+
+def coordinate_key(lat, lon):
+    return f"{float(lat):.4f},{float(lon):.4f}"
+
+
+def synthesize(lat, lon, seed=0, now=None):
+    """
+    (current weather, 5-day forecast) payloads for a location
+
+    Monsoon months are wetter, and the south and the coast warmer; the
+    values only need to look like the real thing to the parser.
+    """
+    now = int(now if now is not None else time.time())
+    rng = random.Random(f"{coordinate_key(lat, lon)}:{seed}")
+    month = time.gmtime(now).tm_mon
+    monsoon = 6 <= month <= 9
+    base_temp = 33 - (float(lat) - 10) * 0.45 + rng.uniform(-3, 3) - (8 if month in (12, 1, 2) else 0)
+    wetness = rng.uniform(0.4, 1.0) if monsoon else rng.uniform(0, 0.4)
+
+    def entry(dt, hour_offset):
+        diurnal = 4 * math.sin((hour_offset % 24 - 9) / 24 * 2 * math.pi)
+        temp = round(base_temp + diurnal + rng.uniform(-1.5, 1.5), 2)
+        rain = round(max(0.0, rng.gauss(wetness * 6, 3)), 2) if rng.random() < wetness else 0.0
+        condition = CONDITIONS[min(len(CONDITIONS) - 1, int(rain // 2) + 3)] if rain else CONDITIONS[rng.randrange(3)]
+        return {
+            'dt': dt,
+            'main': {
+                'temp': temp, 'feels_like': round(temp + 2, 2), 'temp_min': temp, 'temp_max': temp,
+                'pressure': rng.randint(998, 1014), 'humidity': int(min(100, 45 + wetness * 45 + rng.uniform(-8, 8)))
+            },
+            'weather': [dict(zip(('id', 'main', 'description', 'icon'), condition))],
+            'wind': {'speed': round(abs(rng.gauss(4, 2.5)), 2), 'deg': rng.randrange(360)},
+            'clouds': {'all': rng.randrange(101)},
+            'rain': {'3h': rain} if rain else {}
+        }
+
+    current = entry(now, 0)
+    current.update(coord={'lat': float(lat), 'lon': float(lon)}, cod=200, name="Stand-in")
+    if current['rain']:
+        current['rain'] = {'1h': round(current['rain']['3h'] / 3, 2)}
+    else:
+        current.pop('rain')
+
+    start = now - now % 10800 + 10800
+    forecast = {'cod': '200', 'message': 0, 'cnt': 40, 'list': [], 'city': {'coord': {'lat': float(lat), 'lon': float(lon)}, 'timezone': 19800}}
+    for i in range(40):
+        item = entry(start + i * 10800, 3 * i)
+        if not item['rain']:
+            item.pop('rain')
+        item['dt_txt'] = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(item['dt']))
+        forecast['list'].append(item)
+    return current, forecast
+
+
+def load_recordings(directory):
+    """{coordinate key: {'weather': payload, 'forecast': payload}} from record's output"""
+    recordings = {}
+    for path in sorted(Path(directory).glob('*.json')):
+        with open(path) as f:
+            recording = json.load(f)
+        recordings[coordinate_key(recording['lat'], recording['lon'])] = recording
+    return recordings
+
+
+class OpenWeatherStandIn:
+    """
+    The stand-in server, running on a background thread
+
+    Usable as a context manager; base_url is what OPENWEATHER_BASE_URL
+    should be set to.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, recordings=None, seed=0, latency_ms=0, jitter_ms=0,
+                 connect_ms=0, error_rate=0.0, hang_rate=0.0, hang_s=30.0, rate_limit=None):
+        self.recordings = load_recordings(recordings) if recordings else {}
+        self.seed = seed
+        self.latency_ms, self.jitter_ms, self.connect_ms = latency_ms, jitter_ms, connect_ms
+        self.error_rate, self.hang_rate, self.hang_s = error_rate, hang_rate, hang_s
+        self.rate_limit = rate_limit
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._counts = Counter()
+        self._statuses = Counter()
+        self._window = []  # Request times of the last minute, for rate limiting
+        self._synthesized = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/data/2.5"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="openweather-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def configure(self, **settings):
+        unknown = set(settings) - set(SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        with self._lock:
+            for name, value in settings.items():
+                setattr(self, name, value)
+
+    def stats(self):
+        with self._lock:
+            return {**self._counts, 'statuses': dict(self._statuses)}
+
+    def reset_stats(self):
+        with self._lock:
+            self._counts.clear()
+            self._statuses.clear()
+
+    # Serving
+
+    def _payload(self, endpoint, lat, lon):
+        key = coordinate_key(lat, lon)
+        if key in self.recordings:
+            return self.recordings[key][endpoint]
+        with self._lock:
+            if key not in self._synthesized:
+                current, forecast = synthesize(lat, lon, self.seed)
+                self._synthesized[key] = {'weather': current, 'forecast': forecast}
+            return self._synthesized[key][endpoint]
+
+    def _decide(self):
+        """(status, body, seconds to wait) for the next request"""
+        with self._lock:
+            self._counts['requests'] += 1
+            now = time.monotonic()
+            if self.rate_limit:
+                self._window = [t for t in self._window if now - t < 60]
+                if len(self._window) >= self.rate_limit:
+                    return 429, {'cod': 429, 'message': 'Your account is temporary blocked due to exceeding of '
+                                                        'requests limitation of your subscription type.'}, 0
+                self._window.append(now)
+            delay = (self.latency_ms + self._rng.uniform(0, self.jitter_ms)) / 1000
+            roll = self._rng.random()
+            if roll < self.hang_rate:
+                return None, None, self.hang_s
+            if roll < self.hang_rate + self.error_rate:
+                status = self._rng.choice((500, 502, 503))
+                return status, {'cod': status, 'message': 'Internal error'}, delay
+            return 200, None, delay
+
+    def _record(self, status):
+        with self._lock:
+            self._statuses[str(status)] += 1
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with standin._lock:
+                    standin._counts['connections'] += 1
+                    connect_ms = standin.connect_ms
+                time.sleep(connect_ms / 1000)
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/__stats':
+                    return self._send(200, standin.stats())
+                endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+                if endpoint not in ('weather', 'forecast'):
+                    return self._send(404, {'cod': '404', 'message': 'Internal error'})
+                query = parse_qs(url.query)
+                if 'lat' not in query or 'lon' not in query:
+                    standin._record(400)
+                    return self._send(400, {'cod': '400', 'message': 'Nothing to geocode'})
+
+                status, body, delay = standin._decide()
+                time.sleep(delay)
+                if status is None:
+                    # Hung request: answer late, if the client is still there
+                    status, body = 504, {'cod': 504, 'message': 'Gateway timeout'}
+                elif status == 200:
+                    body = standin._payload(endpoint, query['lat'][0], query['lon'][0])
+                standin._record(status)
+                try:
+                    self._send(status, body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def do_POST(self):
+                if urlparse(self.path).path != '/__config':
+                    return self._send(404, {'cod': '404', 'message': 'Not found'})
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    standin.configure(**json.loads(self.rfile.read(length) or b'{}'))
+                except (ValueError, TypeError) as e:
+                    return self._send(400, {'message': str(e)})
+                self._send(200, {name: getattr(standin, name) for name in SETTINGS})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def record(out, api_key, base_url):
+    """Save live responses for every location in INDIAN_STATES"""
+    import requests
+    from app.utils.openweather_api import INDIAN_STATES
+
+    os.makedirs(out, exist_ok=True)
+    session = requests.Session()
+    for name, coords in INDIAN_STATES.items():
+        params = {'lat': coords['lat'], 'lon': coords['lon'], 'appid': api_key, 'units': 'metric'}
+        recording = {'name': name, 'lat': coords['lat'], 'lon': coords['lon']}
+        for endpoint in ('weather', 'forecast'):
+            response = session.get(f"{base_url}/{endpoint}", params=params, timeout=10)
+            response.raise_for_status()
+            recording[endpoint] = response.json()
+        path = os.path.join(out, name.lower().replace(' ', '_') + '.json')
+        with open(path, 'w') as f:
+            json.dump(recording, f)
+        print(f"Recorded {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenWeather API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the stand-in server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8089)
+    serve.add_argument("--recordings", help="Directory written by 'record'")
+    serve.add_argument("--seed", type=int, default=0, help="Seed of synthesized payloads and failures")
+    serve.add_argument("--latency-ms", type=float, default=0)
+    serve.add_argument("--jitter-ms", type=float, default=0)
+    serve.add_argument("--connect-ms", type=float, default=0)
+    serve.add_argument("--error-rate", type=float, default=0.0)
+    serve.add_argument("--hang-rate", type=float, default=0.0)
+    serve.add_argument("--hang-s", type=float, default=30.0)
+    serve.add_argument("--rate-limit", type=int, help="Requests per minute")
+
+    rec = commands.add_parser("record", help="Record live responses for every state")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--base-url", default="https://api.openweathermap.org/data/2.5")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        api_key = os.getenv("OPENWEATHER_API_KEY")
+        if not api_key:
+            sys.exit("Set OPENWEATHER_API_KEY to record")
+        record(args.out, api_key, args.base_url)
+        return
+
+    settings = {name: getattr(args, name) for name in SETTINGS}
+    standin = OpenWeatherStandIn(args.host, args.port, recordings=args.recordings, seed=args.seed, **settings)
+    print(f"Serving OpenWeather stand-in at {standin.base_url} "
+          f"({len(standin.recordings)} recorded locations); Ctrl-C to stop")
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Update today's climate data of every location with real-time weather.
+
+Fetches the weather of all locations concurrently and writes every row
+in one transaction, as POST /data/real-time-weather/refresh does. Run it
+from cron, or leave it running with --interval. On Lambda, an EventBridge
+schedule invoking the function does the same (see lambda_handler.py).
+
+Usage:
+    python scripts/refresh_real_time_weather.py
+    python scripts/refresh_real_time_weather.py --interval 1800
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Ensure 'backend' is on sys.path so we can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.append(str(backend_dir))
+
+from app.utils.openweather_api import run_climate_data_refresh
+
+logger = logging.getLogger("refresh_real_time_weather")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update today's climate data with real-time weather")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Seconds between refreshes; 0 refreshes once and exits")
+    args = parser.parse_args()
+
+    while True:
+        start = time.perf_counter()
+        try:
+            result = run_climate_data_refresh()
+            print(json.dumps({**result, "seconds": round(time.perf_counter() - start, 2)}), flush=True)
+        except Exception as e:
+            logger.error(f"Refresh failed: {e}")
+            if not args.interval:
+                sys.exit(1)
+        if not args.interval:
+            return
+        time.sleep(max(0.0, args.interval - (time.perf_counter() - start)))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,9 +13,6 @@ Usage: python showcase_predictions.py
 
 import os
 import sys
-import pickle
-import joblib
-import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -32,9 +29,10 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Import app modules
 from app.models.database import SessionLocal
 from app.models.models import Location
+from app.models.model_registry import get_registry, build_from_class
+from app.models.ml_models import build_scaler
 
 # Setup directories
-MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "showcase_output")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -47,31 +45,29 @@ RISK_COLORS = {
 }
 
 def load_models():
-    """Load the enhanced prediction models"""
+    """Load the enhanced prediction models from the active model registry version"""
     print(f"{Fore.CYAN}Loading enhanced prediction models...{Style.RESET_ALL}")
     
+    registry = get_registry()
+    version = registry.active_version
+    if version is None:
+        raise RuntimeError("No model version registered. Run save_enhanced_models.py first.")
+    
     # Load risk model
-    risk_model_path = os.path.join(MODELS_DIR, "enhanced_risk_model.pkl")
-    with open(risk_model_path, 'rb') as f:
-        risk_model = pickle.load(f)
-    print(f"✓ Loaded enhanced risk model from {risk_model_path}")
+    risk_model = registry.load("enhanced_risk", build_from_class)
+    print(f"✓ Loaded enhanced risk model from version {version}")
     
     # Load forecast model
-    forecast_model_path = os.path.join(MODELS_DIR, "enhanced_forecast_model.pkl")
-    with open(forecast_model_path, 'rb') as f:
-        forecast_model = pickle.load(f)
-    print(f"✓ Loaded enhanced forecast model from {forecast_model_path}")
+    forecast_model = registry.load("enhanced_forecast", build_from_class)
+    print(f"✓ Loaded enhanced forecast model from version {version}")
     
     # Load scaler
-    scaler_path = os.path.join(MODELS_DIR, "enhanced_scaler.joblib")
-    scaler = joblib.load(scaler_path)
-    print(f"✓ Loaded enhanced scaler from {scaler_path}")
+    scaler = registry.load("enhanced_scaler", build_scaler)
+    print(f"✓ Loaded enhanced scaler from version {version}")
     
     # Load metadata
-    metadata_path = os.path.join(MODELS_DIR, "enhanced_models_metadata.json")
-    with open(metadata_path, 'r') as f:
-        metadata = json.load(f)
-    print(f"✓ Loaded metadata from {metadata_path}")
+    metadata = registry.manifest()["versions"][version]
+    print(f"✓ Loaded metadata from {registry.manifest_path}")
     
     return risk_model, forecast_model, scaler, metadata
 
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Ensure 'backend' is on sys.path so tests can import app.* regardless of CWD
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
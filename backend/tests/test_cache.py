@@ -0,0 +1,133 @@
+"""
+RedisCache against an in-memory stand-in for the Redis client
+"""
+import fnmatch
+from datetime import datetime
+
+import pytest
+
+from app.utils.cache import RedisCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeRedis:
+    """The part of redis.Redis that RedisCache uses, with key expiry on a shared clock"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.entries = {}
+        self.down = False
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("Connection refused")
+
+    def _live(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+            del self.entries[key]
+            entry = None
+        return entry
+
+    def get(self, key):
+        self._call()
+        entry = self._live(key)
+        return None if entry is None else entry[0]
+
+    def set(self, key, value, px=None):
+        self._call()
+        expires_at = None if px is None else self.clock() + px / 1000
+        self.entries[key] = (value.encode() if isinstance(value, str) else value, expires_at)
+        return True
+
+    def delete(self, *keys):
+        self._call()
+        return sum(self.entries.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match='*', count=None):
+        self._call()
+        return iter([key for key in list(self.entries) if self._live(key) and fnmatch.fnmatchcase(key, match)])
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def client(clock):
+    return FakeRedis(clock)
+
+
+@pytest.fixture
+def cache(client, clock):
+    return RedisCache(ttl=60, prefix="test:", client=client, retry_after=30, clock=clock)
+
+
+def test_hit_and_miss(cache, client):
+    assert cache.get('weather:1') is None
+    assert cache.get('weather:1', 'default') == 'default'
+
+    value = {'temperature': 31.5, 'fetched_at': datetime(2026, 10, 19, 6, 30)}
+    cache.set('weather:1', value)
+    assert 'test:weather:1' in client.entries
+    assert cache.get('weather:1') == value
+    assert 'weather:1' in cache
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['errors']) == (2, 2, 0)
+    assert stats['size'] is None
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set('weather:1', 20)
+    clock.advance(59.9)
+    assert cache.get('weather:1') == 20
+    clock.advance(0.2)
+    assert cache.get('weather:1') is None
+
+
+def test_delete_and_clear_keep_other_prefixes(cache, client):
+    client.set('other:weather:1', 'x')
+    cache.set('weather:1', 1)
+    cache.set('weather:2', 2)
+    assert len(cache) == 2
+
+    cache.delete('weather:1')
+    assert cache.get('weather:1') is None
+    cache.clear()
+    assert len(cache) == 0
+    assert list(client.entries) == ['other:weather:1']
+
+
+def test_failed_server_is_bypassed_for_retry_after(cache, client, clock):
+    cache.set('weather:1', 1)
+    client.down = True
+    assert cache.get('weather:1') is None
+    assert cache.stats()['errors'] == 1
+
+    # Within retry_after the server is not contacted at all
+    calls = client.calls
+    client.down = False
+    assert cache.get('weather:1') is None
+    cache.set('weather:2', 2)
+    assert client.calls == calls
+    assert len(cache) == 0
+
+    clock.advance(30)
+    assert cache.get('weather:1') == 1
+    cache.set('weather:2', 2)
+    assert cache.get('weather:2') == 2
+    assert cache.stats()['errors'] == 1
@@ -0,0 +1,103 @@
+"""
+Parity of exported tree ensembles with the XGBoost boosters they came from
+"""
+import numpy as np
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+pd = pytest.importorskip("pandas")
+
+from app.models.tree_ensemble import TreeEnsemble, export_booster
+
+N_LOCATIONS = 12
+N_ROWS = 2000
+
+
+def training_frame(rng):
+    """Numeric weather features plus location_id and month as categoricals"""
+    frame = pd.DataFrame({
+        'temperature': rng.normal(28, 5, N_ROWS),
+        'rainfall': rng.gamma(2, 20, N_ROWS),
+        'humidity': rng.uniform(30, 100, N_ROWS),
+        'location_id': pd.Categorical(rng.integers(0, N_LOCATIONS, N_ROWS), categories=range(N_LOCATIONS)),
+        'month': pd.Categorical(rng.integers(1, 13, N_ROWS), categories=range(1, 13)),
+    })
+    frame.loc[rng.random(N_ROWS) < 0.05, 'rainfall'] = np.nan
+    score = (
+        (frame['temperature'] - 28) / 5
+        + frame['location_id'].cat.codes.isin([2, 5, 7]) * 1.5
+        - frame['month'].cat.codes.isin([0, 1, 11])
+        + rng.normal(0, 0.5, N_ROWS)
+    )
+    return frame, score.to_numpy()
+
+
+def encoded_inputs(rng, rows=5000):
+    """Category codes as floats, with missing values and unseen categories"""
+    X = np.column_stack([
+        rng.normal(28, 8, rows),
+        rng.gamma(2, 20, rows),
+        rng.uniform(20, 110, rows),
+        rng.integers(0, N_LOCATIONS + 3, rows).astype(float),
+        rng.integers(0, 14, rows).astype(float),
+    ])
+    X[rng.random(X.shape) < 0.02] = np.nan
+    return X
+
+
+def train(model, frame, target):
+    model.set_params(n_estimators=40, max_depth=5, tree_method='hist', enable_categorical=True,
+                     max_cat_to_onehot=1, random_state=0)
+    return model.fit(frame, target)
+
+
+@pytest.fixture(scope='module')
+def rng():
+    return np.random.default_rng(7)
+
+
+@pytest.fixture(scope='module')
+def data(rng):
+    return training_frame(rng)
+
+
+def assert_parity(model, X, atol=1e-6):
+    booster = model.get_booster()
+    ensemble = export_booster(model)
+    native = booster.inplace_predict(X)
+    exported = ensemble.inplace_predict(X)
+    assert exported.shape == native.shape
+    assert ensemble.category_mask.shape[0] > 0, "no categorical splits to compare"
+    np.testing.assert_allclose(exported, native, rtol=1e-6, atol=atol)
+    return ensemble
+
+
+def test_binary_classifier_matches_booster(rng, data):
+    frame, score = data
+    model = train(xgb.XGBClassifier(), frame, (score > 0).astype(int))
+    ensemble = assert_parity(model, encoded_inputs(rng))
+    assert ensemble.objective == 'binary:logistic'
+
+
+def test_multiclass_classifier_matches_booster(rng, data):
+    frame, score = data
+    model = train(xgb.XGBClassifier(), frame, np.digitize(score, [-1, 0, 1]))
+    ensemble = assert_parity(model, encoded_inputs(rng))
+    assert ensemble.n_groups == 4
+
+
+def test_regressor_matches_booster(rng, data):
+    frame, score = data
+    # Leaf sums are accumulated in float32 in a different order than XGBoost
+    model = train(xgb.XGBRegressor(), frame, 50 + 20 * score)
+    assert_parity(model, encoded_inputs(rng), atol=1e-4)
+
+
+def test_saved_ensemble_round_trips(tmp_path, rng, data):
+    frame, score = data
+    model = train(xgb.XGBClassifier(), frame, (score > 0).astype(int))
+    ensemble = export_booster(model)
+    path = tmp_path / 'risk.npz'
+    ensemble.save_model(path)
+    X = encoded_inputs(rng, rows=500)
+    np.testing.assert_array_equal(TreeEnsemble.load(path).inplace_predict(X), ensemble.inplace_predict(X))
@@ -207,4 +207,14 @@ export const trainModels = async () => {
   return response.data;
 };
 
+export const getTrainingJob = async (jobId: string) => {
+  const response = await api.get(`/predictions/train-models/${jobId}`);
+  return response.data;
+};
+
+export const cancelTrainingJob = async (jobId: string) => {
+  const response = await api.post(`/predictions/train-models/${jobId}/cancel`);
+  return response.data;
+};
+
 export default api;